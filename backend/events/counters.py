@@ -0,0 +1,144 @@
+"""
+Per-event counters (EventCounter)
+
+⚡ attendee / scan / like numbers without COUNT queries.
+
+- bump(): atomic F() increment of one event's counters (row created on first use)
+- reserve_seats(): capacity check + issued increment under the counter row lock
+- lock_counter(): the locked counter row (created with the event, see signals.py)
+- get_counters(): current values as a dict
+- reconcile(): recount from tickets / likes and repair rows that drifted
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from .models import Event, EventCounter, EventLike, SEAT_HOLDING_STATUSES
+
+COUNTER_FIELDS = ('issued', 'scanned', 'likes')
+
+
+def bump(event_id, issued=0, scanned=0, likes=0):
+    """
+    Add deltas to an event's counters in one UPDATE.
+
+    Call inside the transaction that changes the tickets / likes, so the
+    counters commit (or roll back) with them.
+    """
+    deltas = {'issued': issued, 'scanned': scanned, 'likes': likes}
+    increments = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not increments:
+        return
+    if EventCounter.objects.filter(event_id=event_id).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            EventCounter.objects.create(event_id=event_id, **{f: max(d, 0) for f, d in deltas.items()})
+    except IntegrityError:
+        # Another request created the row first
+        EventCounter.objects.filter(event_id=event_id).update(**increments)
+
+
+def lock_counter(event_id):
+    """
+    SELECT ... FOR UPDATE the event's counter row, creating it first if missing.
+
+    Rows are created with the Event (see signals.py). Locking a missing row
+    with get_or_create takes a gap lock on MySQL, and concurrent first buyers
+    then deadlock on the INSERT, so the row is inserted without a lock instead.
+    """
+    counter = EventCounter.objects.select_for_update().filter(event_id=event_id).first()
+    if counter is not None:
+        return counter
+    try:
+        with transaction.atomic():
+            EventCounter.objects.create(event_id=event_id)
+    except IntegrityError:
+        # Another request created the row first
+        pass
+    return EventCounter.objects.select_for_update().get(event_id=event_id)
+
+
+class SoldOut(Exception):
+    """Not enough capacity left for the requested seats."""
+
+    def __init__(self, available):
+        self.available = available
+        super().__init__(f"Only {available} seat(s) left")
+
+
+def reserve_seats(event, quantity):
+    """
+    🎟️ Claim `quantity` seats of `event` or raise SoldOut.
+
+    The EventCounter row is the event's inventory: it is locked with
+    SELECT ... FOR UPDATE, so concurrent buyers queue on one row instead of
+    each COUNTing tickets and overselling. Must run inside transaction.atomic()
+    together with the ticket inserts; a rollback gives the seats back.
+    """
+    counter = lock_counter(event.pk)
+    available = event.capacity - counter.issued
+    if quantity > available:
+        raise SoldOut(max(available, 0))
+    EventCounter.objects.filter(event_id=event.pk).update(issued=F('issued') + quantity)
+
+
+def get_counters(event_id):
+    row = EventCounter.objects.filter(event_id=event_id).values(*COUNTER_FIELDS).first()
+    return row or dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def count_actual(event_ids=None):
+    """{event_id: {'issued', 'scanned', 'likes'}} recounted from the source tables."""
+    from tickets.models import Ticket
+
+    events = Event.objects.all()
+    tickets = Ticket.objects.all()
+    likes = EventLike.objects.all()
+    if event_ids is not None:
+        events = events.filter(id__in=event_ids)
+        tickets = tickets.filter(event_id__in=event_ids)
+        likes = likes.filter(event_id__in=event_ids)
+
+    actual = {event_id: dict.fromkeys(COUNTER_FIELDS, 0) for event_id in events.values_list('id', flat=True)}
+    ticket_counts = tickets.values('event_id').annotate(
+        issued=Count('id', filter=Q(status__in=SEAT_HOLDING_STATUSES)),
+        scanned=Count('id', filter=Q(status='scanned')),
+    ).order_by()
+    for row in ticket_counts:
+        if row['event_id'] in actual:
+            actual[row['event_id']].update(issued=row['issued'], scanned=row['scanned'])
+    for row in likes.values('event_id').annotate(n=Count('id')).order_by():
+        if row['event_id'] in actual:
+            actual[row['event_id']]['likes'] = row['n']
+    return actual
+
+
+def reconcile(event_ids=None, dry_run=False):
+    """
+    Repair counter rows that disagree with a recount.
+
+    Returns:
+        List of (event_id, stored, actual) for every event that drifted
+    """
+    actual = count_actual(event_ids)
+    stored = {
+        row['event_id']: {f: row[f] for f in COUNTER_FIELDS}
+        for row in EventCounter.objects.filter(event_id__in=list(actual)).values('event_id', *COUNTER_FIELDS)
+    }
+
+    drifted = []
+    for event_id, counts in actual.items():
+        current = stored.get(event_id)
+        if current == counts:
+            continue
+        drifted.append((event_id, current, counts))
+        if dry_run:
+            continue
+        with transaction.atomic():
+            # Recount under the row lock so concurrent bumps aren't lost
+            counter = lock_counter(event_id)
+            fresh = count_actual([event_id])[event_id]
+            for field in COUNTER_FIELDS:
+                setattr(counter, field, fresh[field])
+            counter.save()
+    return drifted
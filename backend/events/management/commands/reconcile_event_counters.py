@@ -0,0 +1,27 @@
+"""
+🔧 Repair drift in the denormalized EventCounter rows
+
+Usage:
+    python manage.py reconcile_event_counters
+    python manage.py reconcile_event_counters --event 12 --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from events.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount issued / scanned tickets and likes per event and fix EventCounter rows that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help='Only this event (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        drifted = reconcile(options['events'], dry_run=options['dry_run'])
+        for event_id, stored, actual in drifted:
+            self.stdout.write(f"Event {event_id}: {stored or 'missing'} -> {actual}")
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} event counter(s) {verb}"))
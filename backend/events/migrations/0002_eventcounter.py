@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    """One counter row per existing event (bumps maintain them from now on)."""
+    Event = apps.get_model('events', 'Event')
+    EventLike = apps.get_model('events', 'EventLike')
+    EventCounter = apps.get_model('events', 'EventCounter')
+    Ticket = apps.get_model('tickets', 'Ticket')
+
+    counters = {event_id: EventCounter(event_id=event_id) for event_id in Event.objects.values_list('id', flat=True)}
+    ticket_counts = Ticket.objects.values('event_id').annotate(
+        issued=Count('id', filter=Q(status__in=['issued', 'scanned'])),
+        scanned=Count('id', filter=Q(status='scanned')),
+    ).order_by()
+    for row in ticket_counts:
+        if row['event_id'] in counters:
+            counters[row['event_id']].issued = row['issued']
+            counters[row['event_id']].scanned = row['scanned']
+    for row in EventLike.objects.values('event_id').annotate(n=Count('id')).order_by():
+        if row['event_id'] in counters:
+            counters[row['event_id']].likes = row['n']
+    EventCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('tickets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCounter',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='events.event')),
+                ('issued', models.IntegerField(default=0)),
+                ('scanned', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,30 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+# Ticket statuses that hold a seat (attendee_count / is_sold_out)
+SEAT_HOLDING_STATUSES = ['issued', 'scanned']
+
+
+class EventQuerySet(models.QuerySet):
+    def with_listing_stats(self, user=None):
+        """
+        ⚡ Everything EventSerializer needs, in the listing query itself.
+        
+        Annotates num_attendees and num_likes from the EventCounter row (one
+        LEFT JOIN, nothing is counted) and liked_by_user (Exists), joins the
+        organizer and prefetches ticket packages.
+        """
+        liked = Value(False)
+        if user is not None and user.is_authenticated:
+            liked = Exists(EventLike.objects.filter(event=OuterRef('pk'), user=user))
+        return self.select_related('organizer').prefetch_related('ticket_packages').annotate(
+            num_attendees=Coalesce(F('counters__issued'), Value(0)),
+            num_likes=Coalesce(F('counters__likes'), Value(0)),
+            liked_by_user=liked,
+        )
+
 
 class Event(models.Model):
     STATUS_CHOICES = (
@@ -46,6 +70,8 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EventQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['id']),
@@ -54,7 +80,10 @@ class Event(models.Model):
 
     @property
     def attendee_count(self):
-        return self.tickets.filter(status__in=['issued', 'scanned']).count()
+        if 'num_attendees' in self.__dict__:
+            return self.num_attendees
+        issued = EventCounter.objects.filter(event_id=self.pk).values_list('issued', flat=True).first()
+        return issued or 0
 
     def __str__(self):
         return f"{self.name} ({self.status})"
@@ -89,3 +118,23 @@ class EventLike(models.Model):
 
     def __str__(self):
         return f"{self.user} likes {self.event.name}"
+
+
+class EventCounter(models.Model):
+    """
+    ⚡ Denormalized per-event counters, so listings and live broadcasts never COUNT.
+    
+    - issued: seat-holding tickets (issued + scanned), i.e. attendee_count
+    - scanned: tickets scanned at the gate
+    - likes: EventLike rows
+    
+    Maintained with F() updates by the order, scan, cancel and like paths
+    (events/counters.py); `manage.py reconcile_event_counters` repairs drift.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    issued = models.IntegerField(default=0)
+    scanned = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.event_id}: {self.issued} issued, {self.scanned} scanned, {self.likes} likes"
@@ -23,8 +23,11 @@ class EventSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'organizer', 'created_at', 'updated_at']
 
+    # Listing querysets annotate these via Event.objects.with_listing_stats();
+    # single events fall back to a query each
+
     def get_attendee_count(self, obj):
-        return obj.tickets.filter(status__in=['issued', 'scanned']).count()
+        return obj.attendee_count
 
     def get_is_past(self, obj):
         return obj.end_datetime < timezone.now()
@@ -33,9 +36,13 @@ class EventSerializer(serializers.ModelSerializer):
         return self.get_attendee_count(obj) >= obj.capacity
 
     def get_like_count(self, obj):
+        if hasattr(obj, 'num_likes'):
+            return obj.num_likes
         return obj.likes.count()
 
     def get_is_liked(self, obj):
+        if hasattr(obj, 'liked_by_user'):
+            return bool(obj.liked_by_user)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
@@ -0,0 +1,16 @@
+"""
+Model signals for events.
+
+- Every new Event gets its EventCounter row right away, so seat reservations
+  only ever lock an existing row (see counters.lock_counter)
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Event, EventCounter
+
+
+@receiver(post_save, sender=Event)
+def create_event_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EventCounter.objects.get_or_create(event=instance)
@@ -4,10 +4,12 @@ from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Event, TicketPackage, EventLike
 from .serializers import EventSerializer, TicketPackageSerializer
+from .counters import bump as bump_event_counters, get_counters as get_event_counters
 from accounts.serializers import UserSerializer
 from monitoring.models import ResponderLocation
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
 from datetime import timedelta
 import json
 from asgiref.sync import async_to_sync
@@ -37,17 +39,18 @@ class EventListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         user = self.request.user
+        events = Event.objects.with_listing_stats(user).order_by('-created_at')
         if user.is_authenticated:
             if user.role == 'admin':
-                return Event.objects.order_by('-created_at')
+                return events
             if user.role == 'organizer':
                 # Organizers see ONLY their own events
-                return Event.objects.filter(organizer=user).order_by('-created_at')
+                return events.filter(organizer=user)
             if user.role in ['volunteer', 'authority']:
                 # Show all active events to volunteers and authorities
-                return Event.objects.filter(status='active').order_by('-created_at')
+                return events.filter(status='active')
         # Unauthenticated users see only active events
-        return Event.objects.filter(status='active').order_by('-created_at')
+        return events.filter(status='active')
 
     def perform_create(self, serializer):
         event = serializer.save(organizer=self.request.user)
@@ -95,10 +98,12 @@ class EventListCreateView(generics.ListCreateAPIView):
 
 
 class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [IsOrganizerActive]
 
+    def get_queryset(self):
+        return Event.objects.with_listing_stats(self.request.user)
+
     def perform_update(self, serializer):
         event = serializer.save()
         packages_json = self.request.data.get('ticket_packages')
@@ -195,16 +200,18 @@ class ToggleLikeView(APIView):
         except Event.DoesNotExist:
             return Response({'error': 'Event not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        like, created = EventLike.objects.get_or_create(user=request.user, event=event)
-        if not created:
-            like.delete()
-            is_liked = False
-        else:
-            is_liked = True
+        with transaction.atomic():
+            like, created = EventLike.objects.get_or_create(user=request.user, event=event)
+            if not created:
+                like.delete()
+                is_liked = False
+            else:
+                is_liked = True
+            bump_event_counters(event.id, likes=1 if is_liked else -1)
 
         return Response({
             'is_liked': is_liked,
-            'like_count': event.likes.count()
+            'like_count': get_event_counters(event.id)['likes']
         })
 
 
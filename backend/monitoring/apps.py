@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MonitoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'monitoring'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # 🌍 Build the country boundary index once at startup, not on the first request
+        from .countries import get_country_index
+        get_country_index()
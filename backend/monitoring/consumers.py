@@ -1,26 +1,20 @@
 import json
-import math
+import time
+import hashlib
 from datetime import datetime
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from .models import CrowdLocation, ResponderLocation
+from .models import ResponderLocation
 from events.models import Event
 from django.contrib.auth import get_user_model
-import redis
 from django.conf import settings
+from .redis_clients import redis_client, async_redis_client
+from .telemetry import record_location
+from .fanout import location_fanout
+from .writebehind import crowd_writer
 
 User = get_user_model()
 
-redis_client = redis.StrictRedis(host='127.0.0.1', port=6379, db=0, decode_responses=True)
-
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    dLat = math.radians(lat2 - lat1)
-    dLon = math.radians(lon2 - lon1)
-    a = math.sin(dLat/2)**2 + math.cos(math.radians(lat1))*math.cos(math.radians(lat2))*math.sin(dLon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
-
 class HeatmapConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.event_id = self.scope['url_route']['kwargs'].get('event_id')
@@ -34,7 +28,12 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
         await self.channel_layer.group_add('global', self.channel_name)
         
         user = self.scope.get('user')
+        # ⚡ Identity never changes during a socket's lifetime: resolve it once here
+        self._identity = None
+        self._claimed_identities = {}
         if user and user.is_authenticated:
+            self._identity = self.build_identity(user)
+
             await self.channel_layer.group_add(f"user_{user.id}", self.channel_name)
             
             if hasattr(user, 'role'):
@@ -42,10 +41,62 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+    def build_identity(self, user):
+        """Profile fields + anonymized heatmap alias for an authenticated socket"""
+        name = user.full_name
+        pic = getattr(user, 'profile_image', None)
+        return {
+            'user_id': user.id,
+            'name': name,
+            'role': getattr(user, 'role', 'attendee'),
+            'phone': user.phone_number if hasattr(user, 'phone_number') else 'N/A',
+            'pic': pic.url if pic else f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&background=random",
+            'secure_alias': self.secure_alias(user.id),
+        }
+
+    def secure_alias(self, user_id):
+        return hashlib.sha256(f"{user_id}_SALT_{self.event_id}".encode()).hexdigest()[:16]
+
+    async def resolve_identity(self, data):
+        """
+        Identity for this ping.
+
+        Authenticated sockets use the profile cached in connect(). Anonymous
+        sockets claim a user_id per message; its existence check and alias
+        are cached per claimed id, so the DB is hit once per id, not per ping.
+        """
+        if self._identity is not None:
+            return self._identity
+
+        user_id = data.get('user_id', 0)
+        key = str(user_id)
+        if key not in self._claimed_identities:
+            if len(self._claimed_identities) >= 1000:
+                self._claimed_identities.clear()
+            exists = await self.check_user_exists(user_id)
+            self._claimed_identities[key] = self.secure_alias(user_id) if exists else None
+
+        alias = self._claimed_identities[key]
+        if alias is None:
+            return None
+
+        name = data.get('full_name', f"Anonymous {user_id}")
+        return {
+            'user_id': user_id,
+            'name': name,
+            'role': data.get('role', 'attendee'),
+            'phone': 'N/A',
+            'pic': f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&background=random",
+            'secure_alias': alias,
+        }
+
     async def disconnect(self, close_code):
         user = self.scope.get('user')
         if user and user.is_authenticated:
-            redis_client.hdel(self.locations_key, str(user.id))
+            try:
+                await async_redis_client.hdel(self.locations_key, str(user.id))
+            except Exception as e:
+                print(f"WS Disconnect cleanup failed: {e}")
             
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -73,119 +124,91 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
                 lat = float(data.get('lat'))
                 lng = float(data.get('lng'))
                 battery = data.get('battery', '100%')
-                user_id = user.id if user and user.is_authenticated else data.get('user_id', 0)
-
-                user_exists = await self.check_user_exists(user_id)
-                if not user_exists:
-                    print(f"Rejected location update from non-existent user {user_id}")
+                identity = await self.resolve_identity(data)
+                if identity is None:
+                    print(f"Rejected location update from non-existent user {data.get('user_id', 0)}")
                     return
 
                 # Event Lifecycle Check: DO NOT process telemetry if event is cancelled or deleted
                 event_info = await self.get_event_cached()
                 if not event_info.get('is_active', True):
                     return
-                
-                name = user.full_name if user and user.is_authenticated else data.get('full_name', f"Anonymous {user_id}")
-                role = getattr(user, 'role', 'attendee') if user and user.is_authenticated else data.get('role', 'attendee')
-                phone_number = user.phone_number if (user and user.is_authenticated and hasattr(user, 'phone_number')) else 'N/A'
-                
-                pic = getattr(user, 'profile_image', None)
-                pic = pic.url if pic else f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&background=random"
+
+                user_id = identity['user_id']
+                name = identity['name']
+                role = identity['role']
+                phone_number = identity['phone']
+                pic = identity['pic']
 
                 now_str = datetime.now().strftime("%I:%M %p")
 
-                # Get previous data from redis for anti-jitter
-                prev_str = redis_client.hget(self.locations_key, str(user_id))
-                prev = json.loads(prev_str) if prev_str else None
-                
-                distance_km = 0.0
-                first_seen = now_str
-                first_seen_ts = now_ts
-
-                if prev:
-                    prev_lat, prev_lng = float(prev['lat']), float(prev['lng'])
-                    dist_moved = haversine(prev_lat, prev_lng, lat, lng)
-                    distance_km = prev.get('distance', 0.0)
-                    
-                    if dist_moved < 0.003:
-                        return
-                        
-                    distance_km += dist_moved
-                    first_seen = prev.get('first_seen', now_str)
-                    first_seen_ts = prev.get('first_seen_ts', now_ts)
-
-                active_seconds = now_ts - first_seen_ts
-                hours = int(active_seconds // 3600)
-                minutes = int((active_seconds % 3600) // 60)
-                active_time = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
-
-                new_data = {
-                    "user_id": user_id,
-                    "lat": lat,
-                    "lng": lng,
-                    "name": name,
-                    "role": role,
-                    "phone": phone_number,
-                    "pic": pic,
-                    "distance": round(distance_km, 2),
-                    "battery": battery,
-                    "first_seen": first_seen,
-                    "first_seen_ts": first_seen_ts,
-                    "last_seen": now_str,
-                    "active_time": active_time,
-                    "event_name": event_info.get('name'),
-                    "venue_address": event_info.get('venue'),
-                    "intensity": 1.0 if role == 'attendee' else 0.5
-                }
+                is_volunteer = role == 'volunteer' and bool(user and user.is_authenticated)
 
-                geo_users_key = f"event:{self.event_id}:users"
-                redis_client.execute_command('GEOADD', geo_users_key, lng, lat, str(user_id))
-                redis_client.expire(geo_users_key, 60) 
+                # ⚡ Anti-jitter, distance, GEOADD and save throttle in ONE async round-trip
+                accepted, new_data, save_due = await record_location(
+                    self.event_id, user_id, lat, lng, now_ts, now_str,
+                    {
+                        "user_id": user_id,
+                        "lat": lat,
+                        "lng": lng,
+                        "name": name,
+                        "role": role,
+                        "phone": phone_number,
+                        "pic": pic,
+                        "battery": battery,
+                        "last_seen": now_str,
+                        "event_name": event_info.get('name'),
+                        "venue_address": event_info.get('venue'),
+                        "intensity": 1.0 if role == 'attendee' else 0.5
+                    },
+                    is_volunteer=is_volunteer,
+                )
+                if not accepted:
+                    return
 
-                if role == 'volunteer' and user and user.is_authenticated:
-                    geo_volunteers_key = f"event:{self.event_id}:volunteers"
-                    redis_client.execute_command('GEOADD', geo_volunteers_key, lng, lat, str(user_id))
-                    redis_client.expire(geo_volunteers_key, 60)
+                if is_volunteer:
                     await self.update_responder_location(user, lat, lng)
 
-                last_db_save = redis_client.get(f"user:{user_id}:last_save")
-                if not last_db_save or (now_ts - float(last_db_save)) > 60:
-                    await self.save_crowd_location(user_id, lat, lng)
-                    redis_client.set(f"user:{user_id}:last_save", now_ts)
+                if save_due:
+                    # 💾 Write-behind: batched into bulk_create by the crowd writer
+                    crowd_writer.enqueue(
+                        self.event_id,
+                        int(user_id) if str(user_id).isdigit() else None,
+                        lat, lng, 'live_tracking'
+                    )
 
                 # PRIVACY FILTERING / MULTI-ROLE BRANCHING
                 # Organizers & Admin get FULL identifiable user context
+                # 📡 Coalesced: flushed once per tick as a single entity_batch per group
+                entity_key = f"{self.event_id}:{user_id}"
                 for secure_group in ['role_organizer', 'role_admin', 'role_volunteer']:
-                    await self.channel_layer.group_send(
-                        secure_group,
-                        {
-                            'type': 'entity_broadcast',
-                            'entity_type': 'user',
-                            **new_data
-                        }
-                    )
-                
-                import hashlib
-                secure_alias = hashlib.sha256(f"{user_id}_SALT_{self.event_id}".encode()).hexdigest()[:16]
-                
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
+                    location_fanout.publish(secure_group, entity_key, {
                         'type': 'entity_broadcast',
                         'entity_type': 'user',
-                        'user_id': secure_alias,
-                        'name': 'Anonymous Attendee',
-                        'role': 'attendee',
-                        'lat': lat,
-                        'lng': lng,
-                        'intensity': new_data['intensity']
-                    }
-                )
+                        **new_data
+                    })
+
+                location_fanout.publish(self.room_group_name, entity_key, {
+                    'type': 'entity_broadcast',
+                    'entity_type': 'user',
+                    'user_id': identity['secure_alias'],
+                    'name': 'Anonymous Attendee',
+                    'role': 'attendee',
+                    'lat': lat,
+                    'lng': lng,
+                    'intensity': new_data['intensity']
+                })
         except Exception as e:
             print(f"WS Receive Error: {e}")
 
     async def get_event_cached(self):
-        if hasattr(self, '_event_cache'):
+        """
+        Event name/venue/lifecycle for this socket, cached for EVENT_CACHE_TTL_SECONDS.
+        The cache is also invalidated by 'event' entity broadcasts (see entity_broadcast).
+        """
+        ttl = getattr(settings, 'EVENT_CACHE_TTL_SECONDS', 30)
+        cached_at = getattr(self, '_event_cache_at', None)
+        if cached_at is not None and time.monotonic() - cached_at < ttl:
             return self._event_cache
             
         @database_sync_to_async
@@ -194,10 +217,14 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
                 e = Event.objects.get(id=eid)
                 is_evt_active = getattr(e, 'status', 'published') != 'cancelled'
                 return {'name': e.name, 'venue': e.venue_address, 'is_active': is_evt_active}
+            except (Event.DoesNotExist, ValueError, TypeError):
+                # Unknown or non-numeric event id (the route accepts any path segment)
+                return {'name': 'OwlEye Event', 'venue': 'Main Stadium, KTM', 'is_active': False}
             except:
                 return {'name': 'OwlEye Event', 'venue': 'Main Stadium, KTM', 'is_active': True}
         
         self._event_cache = await fetch_event(self.event_id)
+        self._event_cache_at = time.monotonic()
         return self._event_cache
 
     @database_sync_to_async
@@ -209,8 +236,33 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
             return False
 
     async def entity_broadcast(self, event):
+        if event.get('entity_type') == 'event' and str(event.get('id')) == str(self.event_id):
+            # Lifecycle change for this socket's event: refresh the telemetry gate immediately
+            if event.get('action') == 'deleted' or event.get('status') == 'cancelled':
+                self._event_cache = {
+                    'name': event.get('name'),
+                    'venue': event.get('venue'),
+                    'is_active': False,
+                }
+                self._event_cache_at = time.monotonic()
+            else:
+                self._event_cache_at = None
         await self.send(text_data=json.dumps(event))
 
+    async def notification_batch(self, event):
+        """Role-group notification fan-out: deliver only this socket's own entry."""
+        user = self.scope.get('user')
+        if not (user and user.is_authenticated):
+            return
+        payload = event.get('notifications', {}).get(str(user.id))
+        if payload:
+            await self.send(text_data=json.dumps(payload))
+
+    async def entity_batch(self, event):
+        """Unpack a coalesced fan-out tick into the per-entity frames clients expect."""
+        for entity in event.get('entities', []):
+            await self.send(text_data=json.dumps(entity))
+
     async def heatmap_broadcast(self, event):
         await self.send(text_data=json.dumps({
             'type': 'heatmap_point',
@@ -244,24 +296,6 @@ class HeatmapConsumer(AsyncWebsocketConsumer):
             'message': event.get('message')
         }))
 
-    @database_sync_to_async
-    def save_crowd_location(self, user_id, lat, lng):
-        try:
-            event = Event.objects.get(id=self.event_id)
-            user = None
-            if str(user_id).isdigit():
-                user = User.objects.filter(id=user_id).first()
-                
-            CrowdLocation.objects.create(
-                event=event,
-                user=user,
-                latitude=lat,
-                longitude=lng,
-                source_type='live_tracking'
-            )
-        except Exception as e:
-            print(f"Error persisting crowd location: {e}")
-
     @database_sync_to_async
     def update_responder_location(self, user, lat, lng):
         try:
@@ -0,0 +1,92 @@
+"""
+Country Boundary Index
+
+🌍 Which supported country is (lat, lng) in? Answered in microseconds.
+
+Simplified boundary polygons for every country in locations.ISO_COUNTRIES
+are loaded once into a 1° PolygonGridIndex (see gazetteer.py): bounding-box
+prefilter, then ray casting, smallest country first so enclaves and border
+overlaps resolve to the more specific country.
+
+The shipped polygons are simplified (tens of vertices per country) but
+built for city-level answers: coastlines are pushed out to sea so coastal
+and island cities stay inside, and land borders are traced closely, with
+shared borders using the same vertices on both sides (Nepal's border with
+India and China most closely of all, for the Terai towns). Neighbouring
+countries that are not supported (Mexico, Eswatini, Bhutan, ...) are left
+out, so their cities resolve to None. monitoring/tests.py pins major cities
+of every supported country. Towns split by the border itself can still land
+on the wrong side; point COUNTRY_BOUNDARIES_PATH at a finer GeoJSON
+(properties.iso_a2 per feature) when that matters.
+
+Used by infer_country_code, generate_location_id and
+LocationMigrationHelper._infer_location_id.
+"""
+
+import json
+import logging
+import os
+import threading
+from django.conf import settings
+from .gazetteer import PolygonGridIndex
+
+logger = logging.getLogger('owl_eye.countries')
+
+DEFAULT_COUNTRY_BOUNDARIES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'countries_simplified.geojson')
+
+
+class CountryIndex:
+    """ISO 3166-1 alpha-2 lookup by coordinates."""
+
+    def __init__(self, cell_degrees=1.0):
+        self.index = PolygonGridIndex(cell_degrees)
+        self.codes = set()
+
+    @classmethod
+    def from_geojson(cls, data, **kwargs):
+        country_index = cls(**kwargs)
+        for feature in data.get('features', []):
+            properties = feature.get('properties') or {}
+            code = (properties.get('iso_a2') or '').upper()
+            geometry = feature.get('geometry') or {}
+            if not code or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+                continue
+            coords = geometry['coordinates']
+            country_index.index.add([coords] if geometry['type'] == 'Polygon' else coords, code)
+            country_index.codes.add(code)
+        country_index.index.finalize()
+        return country_index
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_geojson(json.load(f), **kwargs)
+
+    def lookup(self, lat, lng):
+        """Country code containing (lat, lng), or None."""
+        return self.index.find(float(lng), float(lat))
+
+
+_country_index = None
+_country_index_lock = threading.Lock()
+
+
+def get_country_index():
+    """Process-wide country index, built on first use (warmed in MonitoringConfig.ready)."""
+    global _country_index
+    if _country_index is None:
+        with _country_index_lock:
+            if _country_index is None:
+                path = str(getattr(settings, 'COUNTRY_BOUNDARIES_PATH', '') or DEFAULT_COUNTRY_BOUNDARIES_PATH)
+                try:
+                    _country_index = CountryIndex.load(path)
+                    logger.info(f"[COUNTRIES] Indexed {len(_country_index.codes)} countries from {path}")
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"[COUNTRIES] Could not load {path}: {e}. Country inference disabled.")
+                    _country_index = CountryIndex()
+    return _country_index
+
+
+def infer_country(lat, lng):
+    """Shortcut: country code for (lat, lng) from the shared index, or None."""
+    return get_country_index().lookup(lat, lng)
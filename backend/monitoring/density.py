@@ -0,0 +1,194 @@
+"""
+Crowd Density Aggregation (Heatmap Tiles)
+
+🔥 Heatmaps are read from pre-aggregated cells, not raw points.
+
+Every CrowdLocation point increments one CrowdDensityCell per zoom level:
+(event, time bucket, geohash prefix) -> count + coordinate sums. Reads then
+cost O(cells) no matter how many points were recorded.
+
+- record_points(): fold a batch of points in with one multi-row upsert per
+  UPSERT_BATCH_SIZE cells, keys sorted so concurrent flushes can't deadlock.
+  Called from the CrowdLocation write-behind flush, never per request
+- density_tiles(): summed cells for a zoom level over a recent window
+
+Settings:
+- CROWD_DENSITY_BUCKET_SECONDS: time bucket size (default 300)
+- CROWD_DENSITY_PRECISIONS: geohash lengths kept, coarse to fine (default 5, 6, 7)
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .geo import geohash_encode
+
+logger = logging.getLogger('owl_eye.density')
+
+# Map zoom level (Leaflet / OSM) -> geohash precision
+ZOOM_PRECISION = ((11, 5), (14, 6), (99, 7))
+
+# Backends with a native "insert or add to" statement, and cells per statement
+UPSERT_VENDORS = ('mysql', 'postgresql', 'sqlite')
+UPSERT_BATCH_SIZE = 500
+
+
+def bucket_seconds():
+    return getattr(settings, 'CROWD_DENSITY_BUCKET_SECONDS', 300)
+
+
+def precisions():
+    return tuple(getattr(settings, 'CROWD_DENSITY_PRECISIONS', (5, 6, 7)))
+
+
+def precision_for_zoom(zoom):
+    """Pick the stored precision that best matches a map zoom level."""
+    stored = precisions()
+    for max_zoom, precision in ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            break
+    # Closest precision that is actually being aggregated
+    return min(stored, key=lambda p: abs(p - precision))
+
+
+def bucket_for(ts):
+    size = bucket_seconds()
+    if timezone.is_naive(ts):
+        ts = timezone.make_aware(ts)
+    epoch = int(ts.timestamp()) // size * size
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+
+def record_points(points):
+    """
+    Fold points into the density cells.
+
+    Args:
+        points: iterable of (event_id, lat, lng, timestamp)
+
+    Returns:
+        Number of cells touched
+    """
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    levels = precisions()
+    finest = max(levels)
+    for event_id, lat, lng, ts in points:
+        if lat is None or lng is None:
+            continue
+        lat = float(lat)
+        lng = float(lng)
+        bucket = bucket_for(ts or timezone.now())
+        full_hash = geohash_encode(lat, lng, finest)
+        for precision in levels:
+            cell = cells[(event_id, precision, bucket, full_hash[:precision])]
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lng
+
+    if not cells:
+        return 0
+
+    # Sorted so concurrent flushes take the cell row locks in the same order
+    rows = [
+        (event_id, precision, bucket, geohash, count, lat_sum, lng_sum)
+        for (event_id, precision, bucket, geohash), (count, lat_sum, lng_sum) in sorted(cells.items())
+    ]
+    with transaction.atomic():
+        if connection.vendor in UPSERT_VENDORS:
+            _upsert_cells(rows)
+        else:
+            _increment_cells(rows)
+    return len(rows)
+
+
+def _upsert_cells(rows):
+    """Multi-row INSERT that adds to existing cells (ON DUPLICATE KEY / ON CONFLICT)."""
+    from .models import CrowdDensityCell
+
+    qn = connection.ops.quote_name
+    table = qn(CrowdDensityCell._meta.db_table)
+    keys = [qn(CrowdDensityCell._meta.get_field(f).column) for f in ('event', 'precision', 'bucket_start', 'geohash')]
+    sums = [qn(f) for f in ('count', 'lat_sum', 'lng_sum')]
+    if connection.vendor == 'mysql':
+        conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(f"{c} = {c} + VALUES({c})" for c in sums)
+    else:
+        conflict = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ', '.join(
+            f"{c} = {table}.{c} + excluded.{c}" for c in sums
+        )
+    columns = ', '.join(keys + sums)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            chunk = rows[start:start + UPSERT_BATCH_SIZE]
+            params = []
+            for event_id, precision, bucket, geohash, count, lat_sum, lng_sum in chunk:
+                bucket = connection.ops.adapt_datetimefield_value(bucket)
+                params.extend((event_id, precision, bucket, geohash, count, lat_sum, lng_sum))
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(chunk))
+            cursor.execute(f"INSERT INTO {table} ({columns}) VALUES {values} {conflict}", params)
+
+
+def _increment_cells(rows):
+    """Fallback for backends without an upsert: one F() UPDATE (or INSERT) per cell."""
+    from .models import CrowdDensityCell
+
+    for event_id, precision, bucket, geohash, count, lat_sum, lng_sum in rows:
+        lookup = dict(event_id=event_id, precision=precision, bucket_start=bucket, geohash=geohash)
+        increments = dict(
+            count=F('count') + count,
+            lat_sum=F('lat_sum') + lat_sum,
+            lng_sum=F('lng_sum') + lng_sum,
+        )
+        if CrowdDensityCell.objects.filter(**lookup).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                CrowdDensityCell.objects.create(count=count, lat_sum=lat_sum, lng_sum=lng_sum, **lookup)
+        except IntegrityError:
+            # Another worker created the cell first
+            CrowdDensityCell.objects.filter(**lookup).update(**increments)
+
+
+def density_tiles(event_id, zoom=None, precision=None, minutes=60, bbox=None):
+    """
+    Heatmap cells for one event, summed over the last `minutes`.
+
+    Args:
+        zoom: Map zoom level (used when precision is not given)
+        precision: Geohash length (must be one of CROWD_DENSITY_PRECISIONS)
+        bbox: Optional (min_lat, min_lng, max_lat, max_lng) viewport
+
+    Returns:
+        (precision, [{"geohash", "lat", "lng", "count", "intensity"}, ...])
+    """
+    from .models import CrowdDensityCell
+
+    if precision is None:
+        precision = precision_for_zoom(zoom if zoom is not None else 16)
+
+    since = bucket_for(timezone.now() - timedelta(minutes=minutes))
+    rows = CrowdDensityCell.objects.filter(
+        event_id=event_id, precision=precision, bucket_start__gte=since
+    ).values('geohash').annotate(
+        total=Sum('count'), lat_total=Sum('lat_sum'), lng_total=Sum('lng_sum')
+    )
+
+    cells = []
+    for row in rows:
+        total = row['total']
+        if not total:
+            continue
+        lat = row['lat_total'] / total
+        lng = row['lng_total'] / total
+        if bbox and not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lng <= bbox[3]):
+            continue
+        cells.append({"geohash": row['geohash'], "lat": round(lat, 6), "lng": round(lng, 6), "count": total})
+
+    peak = max((c["count"] for c in cells), default=0)
+    for cell in cells:
+        cell["intensity"] = round(cell["count"] / peak, 3) if peak else 0
+    cells.sort(key=lambda c: c["count"], reverse=True)
+    return precision, cells
@@ -0,0 +1,98 @@
+"""
+Background SOS Dispatch Pipeline
+
+🚨 The panic button returns after the INSERT; everything else runs here.
+
+SOSAlertViewSet.perform_create saves the alert and enqueues a dispatch job
+with transaction.on_commit. A small thread pool then runs the proximity
+search, metrics, notifications, SOS log and websocket broadcasts off the
+request thread.
+
+Settings:
+- SOS_DISPATCH_WORKERS: worker threads per process (default 4)
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger('owl_eye.dispatch')
+
+
+class SOSDispatcher:
+    """Thread pool that executes SOS side effects outside the HTTP request."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or getattr(settings, 'SOS_DISPATCH_WORKERS', 4)
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # Pipeline health counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.last_duration_ms = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='owl-eye-sos-dispatch'
+                )
+            return self._executor
+
+    def submit(self, job, *args, **kwargs):
+        """Queue a dispatch job. Falls back to running inline if the pool is gone."""
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        try:
+            return self._get_executor().submit(self._run, job, *args, **kwargs)
+        except RuntimeError:
+            # Interpreter shutting down: better late than never
+            logger.warning("[SOS_DISPATCH] Pool unavailable, running dispatch inline")
+            return self._run(job, *args, **kwargs)
+
+    def _run(self, job, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            close_old_connections()
+            job(*args, **kwargs)
+            with self._lock:
+                self.completed += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.exception(f"[SOS_DISPATCH] Dispatch job failed: {e}")
+        finally:
+            self.last_duration_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+            close_old_connections()
+
+    def stats(self):
+        return {
+            'workers': self.max_workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'last_duration_ms': round(self.last_duration_ms, 2),
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Global dispatcher instance (one per worker process)
+sos_dispatcher = SOSDispatcher()
+atexit.register(sos_dispatcher.shutdown)
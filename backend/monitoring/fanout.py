@@ -0,0 +1,131 @@
+"""
+Coalesced Channel-Layer Fan-Out
+
+📡 Location pings are buffered per group and flushed once per tick.
+
+Every accepted GPS ping used to cost four group_send publishes (three role
+groups + the event heatmap). The coalescer keeps only the latest payload per
+(group, entity key) and publishes one `entity_batch` message per group on each
+tick, so channel-layer traffic scales with ticks instead of pings.
+
+Consumers unpack `entity_batch` into the same per-entity `entity_broadcast`
+frames clients already understand.
+
+Settings:
+- LOCATION_FANOUT_INTERVAL_MS: flush tick (default 500 ms)
+- LOCATION_FANOUT_MAX_BATCH: entities per published message (default 500)
+"""
+
+import asyncio
+import atexit
+import threading
+from django.conf import settings
+
+
+class BroadcastCoalescer:
+    """
+    Thread-safe, latest-wins buffer in front of channel_layer.group_send.
+
+    publish() never blocks on Redis: it only swaps a dict entry under a lock.
+    A daemon thread owns a private event loop and flushes the buffer every tick.
+    Safe to call from async consumers and from sync DRF views alike.
+    """
+
+    def __init__(self, interval_ms=None, max_batch=None):
+        self.interval = (interval_ms or getattr(settings, 'LOCATION_FANOUT_INTERVAL_MS', 500)) / 1000.0
+        self.max_batch = max_batch or getattr(settings, 'LOCATION_FANOUT_MAX_BATCH', 500)
+        self._pending = {}  # group -> {key: payload}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._stopped = threading.Event()
+
+        # Counters for SystemHealthView / debugging
+        self.published = 0
+        self.coalesced = 0
+        self.flushes = 0
+
+    def publish(self, group, key, payload):
+        """
+        Queue a payload for `group`. A newer payload with the same key replaces
+        the older one if the tick has not flushed yet.
+        """
+        with self._lock:
+            bucket = self._pending.setdefault(group, {})
+            if key in bucket:
+                self.coalesced += 1
+            bucket[key] = payload
+        self._ensure_started()
+
+    def stats(self):
+        with self._lock:
+            queued = sum(len(b) for b in self._pending.values())
+        return {
+            'queued': queued,
+            'published_messages': self.published,
+            'coalesced_updates': self.coalesced,
+            'flushes': self.flushes,
+            'interval_ms': int(self.interval * 1000),
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='owl-eye-fanout', daemon=True)
+            self._thread.start()
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            while not self._stopped.wait(self.interval):
+                self._loop.run_until_complete(self._flush(self._drain()))
+            # Final drain after stop() so nothing queued is lost on shutdown
+            self._loop.run_until_complete(self._flush(self._drain()))
+        finally:
+            self._loop.close()
+
+    async def _flush(self, pending):
+        if not pending:
+            return
+
+        from channels.layers import get_channel_layer
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+
+        sends = []
+        for group, bucket in pending.items():
+            entities = list(bucket.values())
+            for i in range(0, len(entities), self.max_batch):
+                sends.append(channel_layer.group_send(group, {
+                    'type': 'entity_batch',
+                    'entities': entities[i:i + self.max_batch],
+                }))
+
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"WS Batch broadcast failed: {result}")
+        self.published += len(sends)
+        self.flushes += 1
+
+    def stop(self, timeout=5):
+        """Flush whatever is buffered and stop the worker thread."""
+        self._stopped.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+
+# Global coalescer instance (one per worker process)
+location_fanout = BroadcastCoalescer()
+atexit.register(location_fanout.stop)
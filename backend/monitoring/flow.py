@@ -0,0 +1,177 @@
+"""
+Crowd Flow Engine
+
+🌊 Which way is the crowd moving, and where is it building up?
+
+For one event, CrowdLocation snapshots in [now - window - step, now] are
+loaded as flat NumPy arrays ordered by (user, timestamp). Then, fully
+vectorized:
+
+- Consecutive samples of the same user give displacement vectors, turned
+  into velocities (m/s east / north) and binned by the grid cell they start in
+- Distinct users per cell are counted for the current window
+  [now - window, now] and the previous one [now - window - step, now - step];
+  the difference is the density change
+
+Results are cached per (event, window, step, time slot) so dashboards that
+refresh every few seconds share one computation per step.
+
+Settings:
+- CROWD_FLOW_CELL_METERS: grid cell size (default 50)
+- CROWD_FLOW_MAX_POINTS: newest snapshots considered (default 200000)
+- CROWD_FLOW_MAX_GAP_SECONDS: samples further apart aren't one movement (default 600)
+"""
+
+import math
+import re
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LNG_EQUATOR = 111320.0
+
+# '15', '15m', '1.5h': no signs, exponents, inf/nan, or more digits than a year of minutes
+MINUTES_PATTERN = re.compile(r'^(\d{1,6}(?:\.\d{1,6})?)\s*([mh]?)$')
+
+
+def parse_minutes(value, default):
+    """'15' / '15m' / '2h' -> minutes (int); None -> default. ValueError on anything else."""
+    if value in (None, ''):
+        return default
+    match = MINUTES_PATTERN.match(str(value).strip().lower())
+    if match is None:
+        raise ValueError(f"Not a number of minutes: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * (60 if unit == 'h' else 1))
+
+
+def _load_points(event_id, since, max_points):
+    """(user_idx, lat, lng, epoch_seconds) arrays, ordered by user then time."""
+    from .models import CrowdLocation
+
+    rows = list(
+        CrowdLocation.objects.filter(
+            event_id=event_id, timestamp__gte=since, user_id__isnull=False
+        ).order_by('-timestamp').values_list('user_id', 'latitude', 'longitude', 'timestamp')[:max_points]
+    )
+    if not rows:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty, empty
+
+    users, lats, lngs, stamps = zip(*rows)
+    _, user_idx = np.unique(np.asarray(users), return_inverse=True)
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    seconds = np.fromiter((ts.timestamp() for ts in stamps), dtype=np.float64, count=len(stamps))
+
+    order = np.lexsort((seconds, user_idx))
+    return user_idx[order], lats[order], lngs[order], seconds[order]
+
+
+def compute_flow(event_id, window_minutes=15, step_minutes=5, now=None):
+    """
+    Per-cell flow vectors and density change between two consecutive windows.
+
+    Returns:
+        dict with window/step metadata and a list of cells:
+        {"lat", "lng", "users", "previous_users", "density_change",
+         "vx_mps", "vy_mps", "speed_mps", "bearing_deg", "samples"}
+    """
+    now = now or timezone.now()
+    window_s = window_minutes * 60
+    step_s = step_minutes * 60
+    cell_m = getattr(settings, 'CROWD_FLOW_CELL_METERS', 50)
+    max_gap = getattr(settings, 'CROWD_FLOW_MAX_GAP_SECONDS', 600)
+    max_points = getattr(settings, 'CROWD_FLOW_MAX_POINTS', 200000)
+
+    user_idx, lats, lngs, seconds = _load_points(
+        event_id, now - timedelta(seconds=window_s + step_s), max_points
+    )
+    result = {
+        "event_id": event_id,
+        "window_minutes": window_minutes,
+        "step_minutes": step_minutes,
+        "generated_at": now.isoformat(),
+        "cell_meters": cell_m,
+        "points": int(lats.size),
+        "cells": [],
+    }
+    if lats.size == 0:
+        return result
+
+    # Local equirectangular grid around the crowd (fine at venue scale)
+    lat0 = float(lats.mean())
+    deg_lat = cell_m / METERS_PER_DEG_LAT
+    deg_lng = cell_m / (METERS_PER_DEG_LNG_EQUATOR * max(math.cos(math.radians(lat0)), 1e-6))
+    rows = np.floor(lats / deg_lat).astype(np.int64)
+    cols = np.floor(lngs / deg_lng).astype(np.int64)
+    cell_keys = np.stack((rows, cols), axis=1)
+    cells, cell_idx = np.unique(cell_keys, axis=0, return_inverse=True)
+    cell_idx = cell_idx.reshape(-1)
+    n_cells = len(cells)
+
+    # ── Density: distinct users per cell in each window ──
+    end = now.timestamp()
+    current = seconds >= end - window_s
+    previous = (seconds >= end - window_s - step_s) & (seconds < end - step_s)
+
+    def distinct_users(mask):
+        pairs = np.unique(np.stack((cell_idx[mask], user_idx[mask]), axis=1), axis=0)
+        return np.bincount(pairs[:, 0], minlength=n_cells) if len(pairs) else np.zeros(n_cells, dtype=np.int64)
+
+    users_now = distinct_users(current)
+    users_before = distinct_users(previous)
+
+    # ── Flow: consecutive samples of the same user ──
+    same_user = user_idx[1:] == user_idx[:-1]
+    dt = seconds[1:] - seconds[:-1]
+    moves = same_user & (dt > 0) & (dt <= max_gap) & current[1:]
+    origin = cell_idx[:-1][moves]
+    dt = dt[moves]
+    vy = (lats[1:] - lats[:-1])[moves] * METERS_PER_DEG_LAT / dt
+    vx = (lngs[1:] - lngs[:-1])[moves] * METERS_PER_DEG_LNG_EQUATOR * np.cos(np.radians(lats[:-1][moves])) / dt
+
+    samples = np.bincount(origin, minlength=n_cells)
+    sum_vx = np.bincount(origin, weights=vx, minlength=n_cells)
+    sum_vy = np.bincount(origin, weights=vy, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_vx = np.where(samples > 0, sum_vx / samples, 0.0)
+        mean_vy = np.where(samples > 0, sum_vy / samples, 0.0)
+    speed = np.hypot(mean_vx, mean_vy)
+    bearing = (np.degrees(np.arctan2(mean_vx, mean_vy)) + 360) % 360
+
+    centers_lat = (cells[:, 0] + 0.5) * deg_lat
+    centers_lng = (cells[:, 1] + 0.5) * deg_lng
+
+    active = np.flatnonzero((users_now > 0) | (users_before > 0) | (samples > 0))
+    result["cells"] = [
+        {
+            "lat": round(float(centers_lat[i]), 6),
+            "lng": round(float(centers_lng[i]), 6),
+            "users": int(users_now[i]),
+            "previous_users": int(users_before[i]),
+            "density_change": int(users_now[i] - users_before[i]),
+            "vx_mps": round(float(mean_vx[i]), 3),
+            "vy_mps": round(float(mean_vy[i]), 3),
+            "speed_mps": round(float(speed[i]), 3),
+            "bearing_deg": round(float(bearing[i]), 1) if samples[i] else None,
+            "samples": int(samples[i]),
+        }
+        for i in active
+    ]
+    return result
+
+
+def cached_flow(event_id, window_minutes=15, step_minutes=5):
+    """compute_flow(), memoized per event/window/step for one step-sized time slot."""
+    step_s = max(step_minutes * 60, 1)
+    slot = int(timezone.now().timestamp() // step_s)
+    key = f"crowd_flow:{event_id}:{window_minutes}:{step_minutes}:{slot}"
+    flow = cache.get(key)
+    if flow is None:
+        flow = compute_flow(event_id, window_minutes, step_minutes)
+        cache.set(key, flow, step_s)
+    return flow
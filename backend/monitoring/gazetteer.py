@@ -0,0 +1,269 @@
+"""
+Offline Reverse Geocoder (Local Gazetteer)
+
+📍 Answers "which ward / suburb is this?" without touching the network.
+
+A gazetteer file shipped with the deployment is loaded once into a uniform
+grid index. A lookup then checks only the polygons registered in the
+point's grid cell (bounding-box prefilter + ray casting, smallest area
+first) and, if no polygon contains the point, the nearest named place
+within GAZETTEER_MAX_DISTANCE_KM.
+
+Supported files:
+- GeoJSON FeatureCollection of Polygon / MultiPolygon / Point features with
+  properties {"name", "city", "country"}
+- CSV with columns name, city, country, lat, lng (named places only)
+
+Settings:
+- GAZETTEER_PATH: gazetteer file (default monitoring/data/gazetteer_kathmandu.geojson)
+- GAZETTEER_MAX_DISTANCE_KM: nearest-place search radius (default 1.0)
+- GEOCODE_HTTP_FALLBACK: fall back to Nominatim on a gazetteer miss (default True)
+"""
+
+import csv
+import json
+import logging
+import math
+import os
+import threading
+from django.conf import settings
+from .geo import haversine
+
+logger = logging.getLogger('owl_eye.gazetteer')
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer_kathmandu.geojson')
+
+
+# ═══════════════════════════════════════════════════════════════════
+# GEOMETRY HELPERS (rings are lists of (lng, lat) pairs, GeoJSON order)
+# ═══════════════════════════════════════════════════════════════════
+
+def ring_contains(ring, lng, lat):
+    """Even-odd ray casting test for a single ring."""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lng < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def polygon_contains(polygon, lng, lat):
+    """polygon = [exterior, hole, hole, ...]"""
+    if not ring_contains(polygon[0], lng, lat):
+        return False
+    return not any(ring_contains(hole, lng, lat) for hole in polygon[1:])
+
+
+def ring_area(ring):
+    """Planar shoelace area in square degrees (only used to rank overlaps)."""
+    area = 0.0
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        area += (ring[j][0] + ring[i][0]) * (ring[j][1] - ring[i][1])
+        j = i
+    return abs(area) / 2.0
+
+
+def bounding_box(polygons):
+    """(min_lng, min_lat, max_lng, max_lat) over the exterior rings."""
+    xs = [x for polygon in polygons for x, _ in polygon[0]]
+    ys = [y for polygon in polygons for _, y in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class PolygonGridIndex:
+    """
+    Uniform grid over (lng, lat). Each area is registered in every cell its
+    bounding box overlaps, so a query only tests a handful of candidates.
+    """
+
+    def __init__(self, cell_degrees=0.01):
+        self.cell_degrees = cell_degrees
+        self.areas = []  # (bbox, polygons, area, payload)
+        self.cells = {}
+
+    def _cell(self, lng, lat):
+        return (math.floor(lng / self.cell_degrees), math.floor(lat / self.cell_degrees))
+
+    def add(self, polygons, payload):
+        """polygons: list of [exterior, holes...] (a MultiPolygon's coordinates)"""
+        bbox = bounding_box(polygons)
+        area = sum(ring_area(polygon[0]) for polygon in polygons)
+        index = len(self.areas)
+        self.areas.append((bbox, polygons, area, payload))
+
+        x0, y0 = self._cell(bbox[0], bbox[1])
+        x1, y1 = self._cell(bbox[2], bbox[3])
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                self.cells.setdefault((x, y), []).append(index)
+
+    def finalize(self):
+        """Sort each cell smallest area first so the most specific match wins."""
+        for members in self.cells.values():
+            members.sort(key=lambda i: self.areas[i][2])
+
+    def find(self, lng, lat):
+        """Payload of the smallest area containing the point, or None."""
+        for i in self.cells.get(self._cell(lng, lat), ()):
+            (min_x, min_y, max_x, max_y), polygons, _, payload = self.areas[i]
+            if not (min_x <= lng <= max_x and min_y <= lat <= max_y):
+                continue
+            if any(polygon_contains(polygon, lng, lat) for polygon in polygons):
+                return payload
+        return None
+
+    def __len__(self):
+        return len(self.areas)
+
+
+class PointGridIndex:
+    """Uniform grid of named points for nearest-place queries."""
+
+    def __init__(self, cell_degrees=0.01):
+        self.cell_degrees = cell_degrees
+        self.points = []  # (lat, lng, payload)
+        self.cells = {}
+
+    def _cell(self, lng, lat):
+        return (math.floor(lng / self.cell_degrees), math.floor(lat / self.cell_degrees))
+
+    def add(self, lat, lng, payload):
+        self.cells.setdefault(self._cell(lng, lat), []).append(len(self.points))
+        self.points.append((lat, lng, payload))
+
+    def nearest(self, lat, lng, max_distance_km):
+        """(payload, km) of the closest point within max_distance_km, or None."""
+        if not self.points:
+            return None
+        # Widest ring of cells that can still hold a point inside the radius
+        km_per_cell = self.cell_degrees * 111.32 * max(math.cos(math.radians(lat)), 0.01)
+        rings = int(math.ceil(max_distance_km / km_per_cell))
+        cx, cy = self._cell(lng, lat)
+
+        best = None
+        for x in range(cx - rings, cx + rings + 1):
+            for y in range(cy - rings, cy + rings + 1):
+                for i in self.cells.get((x, y), ()):
+                    p_lat, p_lng, payload = self.points[i]
+                    km = haversine(lat, lng, p_lat, p_lng)
+                    if km <= max_distance_km and (best is None or km < best[1]):
+                        best = (payload, km)
+        return best
+
+    def __len__(self):
+        return len(self.points)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# GAZETTEER
+# ═══════════════════════════════════════════════════════════════════
+
+class Gazetteer:
+    """Ward / suburb polygons plus named places, answering reverse lookups offline."""
+
+    def __init__(self, cell_degrees=0.01, max_distance_km=None):
+        self.polygons = PolygonGridIndex(cell_degrees)
+        self.places = PointGridIndex(cell_degrees)
+        self.max_distance_km = (
+            max_distance_km if max_distance_km is not None
+            else getattr(settings, 'GAZETTEER_MAX_DISTANCE_KM', 1.0)
+        )
+
+    @staticmethod
+    def _payload(properties):
+        return {
+            'name': properties.get('name') or properties.get('ward') or 'Unknown',
+            'city': properties.get('city') or '',
+            'country': properties.get('country') or 'Nepal',
+        }
+
+    def add_feature(self, feature):
+        geometry = feature.get('geometry') or {}
+        payload = self._payload(feature.get('properties') or {})
+        kind = geometry.get('type')
+        coords = geometry.get('coordinates')
+
+        if kind == 'Polygon':
+            self.polygons.add([coords], payload)
+        elif kind == 'MultiPolygon':
+            self.polygons.add(coords, payload)
+        elif kind == 'Point':
+            self.places.add(float(coords[1]), float(coords[0]), payload)
+
+    @classmethod
+    def from_geojson(cls, data, **kwargs):
+        """Build from a parsed GeoJSON FeatureCollection dict."""
+        gazetteer = cls(**kwargs)
+        for feature in data.get('features', []):
+            gazetteer.add_feature(feature)
+        gazetteer.polygons.finalize()
+        return gazetteer
+
+    @classmethod
+    def from_csv(cls, rows, **kwargs):
+        """Build from an iterable of dicts with name, city, country, lat, lng."""
+        gazetteer = cls(**kwargs)
+        for row in rows:
+            gazetteer.places.add(float(row['lat']), float(row['lng']), cls._payload(row))
+        return gazetteer
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Load a .geojson / .json or .csv gazetteer file."""
+        if path.lower().endswith('.csv'):
+            with open(path, newline='', encoding='utf-8') as f:
+                return cls.from_csv(csv.DictReader(f), **kwargs)
+        with open(path, encoding='utf-8') as f:
+            return cls.from_geojson(json.load(f), **kwargs)
+
+    def lookup(self, lat, lng):
+        """
+        Place dict for (lat, lng): the containing polygon, else the nearest
+        named place within max_distance_km. None on a miss.
+        """
+        lat = float(lat)
+        lng = float(lng)
+        payload = self.polygons.find(lng, lat)
+        if payload is not None:
+            return payload
+        nearest = self.places.nearest(lat, lng, self.max_distance_km)
+        return nearest[0] if nearest else None
+
+    def display_name(self, lat, lng):
+        """
+        "Ward, City, Country" (e.g. "Thamel, Kathmandu, Nepal"), the layout
+        generate_location_id() parses, or None on a miss. Places without a
+        city use their own name as the city.
+        """
+        place = self.lookup(lat, lng)
+        if place is None:
+            return None
+        return f"{place['name']}, {place['city'] or place['name']}, {place['country']}"
+
+    def __len__(self):
+        return len(self.polygons) + len(self.places)
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Process-wide gazetteer, loaded lazily from GAZETTEER_PATH (empty if missing)."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                path = str(getattr(settings, 'GAZETTEER_PATH', '') or DEFAULT_GAZETTEER_PATH)
+                try:
+                    _gazetteer = Gazetteer.load(path)
+                    logger.info(f"[GAZETTEER] Loaded {len(_gazetteer)} places from {path}")
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"[GAZETTEER] Could not load {path}: {e}. Offline geocoding disabled.")
+                    _gazetteer = Gazetteer()
+    return _gazetteer
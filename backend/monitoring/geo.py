@@ -0,0 +1,162 @@
+"""
+Shared Great-Circle Distance Engine
+
+📐 One haversine implementation for the whole backend.
+
+- haversine(): scalar distance, no per-call imports
+- haversine_many(): NumPy-vectorized distance from one point to N points
+- k_nearest(): top-K selection with argpartition (O(N) instead of a full sort)
+- bounding_box() / geohash_encode() / geohash_cover(): index-friendly
+  prefilters for radius queries on plain latitude/longitude columns
+
+Used by SOS dispatch (find_nearby_volunteers DB path, accept metrics) and
+available for geofence checks that need to score many responders at once.
+"""
+
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers between two points (decimal degrees)."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Distances in kilometers from (lat, lon) to every point in (lats, lons).
+
+    Args:
+        lat, lon: Origin in decimal degrees
+        lats, lons: Sequences / arrays of equal length (floats or Decimals)
+
+    Returns:
+        float64 ndarray of distances, same order as the input
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    lat0 = math.radians(float(lat))
+    lon0 = math.radians(float(lon))
+
+    a = np.sin((lats - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def k_nearest(distances, k, max_distance=None):
+    """
+    Indices of the k smallest distances, nearest first.
+
+    Args:
+        distances: ndarray from haversine_many()
+        k: Number of results wanted (None for all)
+        max_distance: Optional radius; farther points are discarded
+
+    Returns:
+        int ndarray of indices into `distances`
+    """
+    distances = np.asarray(distances)
+    candidates = np.arange(distances.size)
+    if max_distance is not None:
+        candidates = np.flatnonzero(distances <= max_distance)
+    if candidates.size == 0:
+        return candidates
+
+    if k is not None and k < candidates.size:
+        # Partial selection first, then sort only the k survivors
+        part = np.argpartition(distances[candidates], k - 1)[:k]
+        candidates = candidates[part]
+
+    return candidates[np.argsort(distances[candidates], kind='stable')]
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing a radius around a point.
+    Slightly generous; pair with an exact haversine check.
+    """
+    lat = float(lat)
+    lon = float(lon)
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6 or abs(lat) + dlat >= 90:
+        dlon = 180.0  # Near a pole every longitude is in range
+    else:
+        dlon = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return (
+        max(-90.0, lat - dlat), min(90.0, lat + dlat),
+        max(-180.0, lon - dlon), min(180.0, lon + dlon),
+    )
+
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells
+
+def geohash_encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    lat = float(lat)
+    lon = float(lon)
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_cover(lat, lon, radius_km, max_cells=16):
+    """
+    Geohash prefixes whose cells together cover the radius' bounding box.
+
+    Picks the longest prefix that still needs at most `max_cells` cells, so a
+    query becomes a handful of `geohash LIKE 'prefix%'` index range scans.
+    Returns [] when the area is too large for a useful prefix.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        # Cell size in degrees for this precision (lon gets the odd bit)
+        lat_step = 180.0 / (2 ** ((5 * precision) // 2))
+        lon_step = 360.0 / (2 ** ((5 * precision + 1) // 2))
+        rows = int(math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step)) + 1
+        cols = int(math.floor(max_lon / lon_step) - math.floor(min_lon / lon_step)) + 1
+        if rows * cols > max_cells:
+            continue
+        prefixes = set()
+        for r in range(rows):
+            for c in range(cols):
+                cell_lat = min(max_lat, min_lat + r * lat_step)
+                cell_lon = min(max_lon, min_lon + c * lon_step)
+                prefixes.add(geohash_encode(cell_lat, cell_lon, precision))
+        # Corners can fall in a cell the stepping skipped
+        for corner_lat in (min_lat, max_lat):
+            for corner_lon in (min_lon, max_lon):
+                prefixes.add(geohash_encode(corner_lat, corner_lon, precision))
+        return sorted(prefixes)
+    return []
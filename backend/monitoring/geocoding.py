@@ -0,0 +1,208 @@
+"""
+Two-Tier Reverse-Geocoding Cache
+
+🗺️ One Nominatim lookup per ~11m cell, shared by every daphne worker.
+
+- Tier 1: bounded in-process LRU (no Redis round-trip for hot cells)
+- Tier 2: Redis with TTL (survives restarts, shared across workers)
+- Single-flight: concurrent misses for the same cell wait for one upstream
+  call, in-process via a per-key Event and across workers via a Redis
+  SET NX lock
+
+Settings:
+- GEOCODE_LRU_SIZE: cells kept per process (default 2048)
+- GEOCODE_CACHE_TTL_SECONDS: Redis TTL for resolved names (default 30 days)
+- GEOCODE_NEGATIVE_TTL_SECONDS: LRU and Redis TTL for cells upstream had no
+  address for (default 10 minutes), so a transient miss doesn't stick for a month
+- GEOCODE_LOCK_SECONDS: how long one worker owns an upstream lookup (default 10)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+import redis
+from django.conf import settings
+from .redis_clients import redis_client
+
+logger = logging.getLogger('owl_eye.geocoding')
+
+UNKNOWN_LOCATION = "Unknown Location"
+
+
+class GeocodeCache:
+    """LRU → Redis → upstream, with per-cell request coalescing."""
+
+    KEY_PREFIX = 'geocode:name:v2'  # v2: "Ward, City, Country"; v1 names lacked the city
+    LOCK_PREFIX = 'geocode:lock'
+
+    def __init__(self, client=None, max_size=None, ttl=None, lock_seconds=None, precision=4, negative_ttl=None):
+        self.client = client or redis_client
+        self.max_size = max_size or getattr(settings, 'GEOCODE_LRU_SIZE', 2048)
+        self.ttl = ttl or getattr(settings, 'GEOCODE_CACHE_TTL_SECONDS', 30 * 86400)
+        self.negative_ttl = negative_ttl or getattr(settings, 'GEOCODE_NEGATIVE_TTL_SECONDS', 600)
+        self.lock_seconds = lock_seconds or getattr(settings, 'GEOCODE_LOCK_SECONDS', 10)
+        self.precision = precision  # 4 decimals ≈ 11m
+
+        self._lru = OrderedDict()  # cell -> (name, monotonic expiry or None)
+        self._lock = threading.Lock()
+        self._inflight = {}  # cell -> threading.Event
+
+        # Cache effectiveness counters
+        self.lru_hits = 0
+        self.redis_hits = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def cell(self, lat, lon):
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    def _redis_key(self, cell):
+        return f'{self.KEY_PREFIX}:{cell[0]:.{self.precision}f}:{cell[1]:.{self.precision}f}'
+
+    def _lock_key(self, cell):
+        return f'{self.LOCK_PREFIX}:{cell[0]:.{self.precision}f}:{cell[1]:.{self.precision}f}'
+
+    # ═══ Tier 1: in-process LRU ═══
+
+    def _lru_get(self, cell):
+        with self._lock:
+            entry = self._lru.get(cell)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._lru[cell]
+                return None
+            self._lru.move_to_end(cell)
+            self.lru_hits += 1
+            return value
+
+    def _lru_put(self, cell, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._lru[cell] = (value, expires_at)
+            self._lru.move_to_end(cell)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _ttl_for(self, value):
+        """Negative answers expire quickly; None means keep until evicted (LRU) / full TTL."""
+        return self.negative_ttl if value == UNKNOWN_LOCATION else None
+
+    # ═══ Tier 2: Redis ═══
+
+    def _redis_get(self, cell):
+        try:
+            value = self.client.get(self._redis_key(cell))
+        except redis.RedisError:
+            return None
+        if value is not None:
+            self.redis_hits += 1
+            self._lru_put(cell, value, self._ttl_for(value))
+        return value
+
+    def _redis_put(self, cell, value):
+        try:
+            self.client.set(self._redis_key(cell), value, ex=self._ttl_for(value) or self.ttl)
+        except redis.RedisError:
+            pass
+
+    def _acquire_upstream(self, cell):
+        """Cross-worker single-flight. True if this worker should call upstream."""
+        try:
+            return bool(self.client.set(self._lock_key(cell), '1', nx=True, ex=self.lock_seconds))
+        except redis.RedisError:
+            return True  # No Redis: the in-process single-flight still applies
+
+    def _release_upstream(self, cell):
+        try:
+            self.client.delete(self._lock_key(cell))
+        except redis.RedisError:
+            pass
+
+    def _wait_for_peer(self, cell):
+        """Another worker owns the lookup: poll Redis until it publishes the name."""
+        deadline = time.monotonic() + self.lock_seconds
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            value = self._redis_get(cell)
+            if value is not None:
+                self.coalesced += 1
+                return value
+        return None
+
+    # ═══ Public API ═══
+
+    def get_or_fetch(self, lat, lon, fetch):
+        """
+        Resolve (lat, lon) to a name, calling fetch(lat, lon) at most once
+        per cell across all waiting threads and workers.
+
+        fetch() should raise on upstream failure; failures are not cached.
+        """
+        cell = self.cell(lat, lon)
+
+        value = self._lru_get(cell)
+        if value is not None:
+            return value
+
+        # In-process single-flight: first thread becomes the leader
+        with self._lock:
+            waiter = self._inflight.get(cell)
+            if waiter is None:
+                leader_event = threading.Event()
+                self._inflight[cell] = leader_event
+        if waiter is not None:
+            waiter.wait(timeout=self.lock_seconds)
+            value = self._lru_get(cell)
+            if value is not None:
+                self.coalesced += 1
+                return value
+            return UNKNOWN_LOCATION
+
+        try:
+            value = self._redis_get(cell)
+            if value is not None:
+                return value
+
+            owns_lock = self._acquire_upstream(cell)
+            if not owns_lock:
+                value = self._wait_for_peer(cell)
+                if value is not None:
+                    return value
+                # Peer died or timed out: do the lookup ourselves
+
+            try:
+                self.upstream_calls += 1
+                value = fetch(cell[0], cell[1])
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"[GEOCODE] Upstream lookup failed for {cell}: {e}")
+                return UNKNOWN_LOCATION
+            finally:
+                if owns_lock:
+                    self._release_upstream(cell)
+
+            self._lru_put(cell, value, self._ttl_for(value))
+            self._redis_put(cell, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(cell, None)
+            leader_event.set()
+
+    def stats(self):
+        return {
+            'lru_size': len(self._lru),
+            'lru_hits': self.lru_hits,
+            'redis_hits': self.redis_hits,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+        }
+
+
+# Global cache instance (one LRU per worker process, Redis shared)
+geocode_cache = GeocodeCache()
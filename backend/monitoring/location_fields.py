@@ -4,11 +4,14 @@ Location-aware model fields and mixins for OwlEye.
 Provides structured location storage and validation for tracking-related models.
 """
 
+import json
+import math
 from django.db import models
+from django.db.models import ExpressionWrapper, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from django.core.exceptions import ValidationError
-from django.contrib.postgres.fields import JSONField
-import json
-from monitoring.locations import LocationSchema, LocationValidationError
+from monitoring.geo import EARTH_RADIUS_KM, bounding_box, geohash_cover
+from monitoring.locations import LocationSchema, LocationValidationError, ValidatedLocation
 
 
 class LocationDataField(models.JSONField):
@@ -17,16 +20,30 @@ class LocationDataField(models.JSONField):
     
     Automatically validates and normalizes location data on save.
     
+    ⚡ Rows read from the database were validated when they were written, so
+    from_db_value wraps them as trusted ValidatedLocation values instead of
+    re-running the schema per row; saving one back skips validation too.
+    
     Example usage:
         class MyModel(models.Model):
             location = LocationDataField()
     """
     
+    def from_db_value(self, value, expression, connection):
+        """Decode a stored value without re-validating it."""
+        value = super().from_db_value(value, expression, connection)
+        if isinstance(value, dict):
+            return LocationSchema.validate(value, trusted=True)
+        return value
+    
     def to_python(self, value):
         """Convert database value to Python dict and validate."""
         if value is None:
             return None
         
+        if isinstance(value, ValidatedLocation):
+            return value
+        
         if isinstance(value, str):
             value = json.loads(value)
         
@@ -45,10 +62,11 @@ class LocationDataField(models.JSONField):
             return None
         
         if isinstance(value, dict):
-            validated = self.to_python(value)
-            return json.dumps(validated, default=str)
+            # JSONField encodes the returned dict itself; returning a JSON string
+            # here would store it double-encoded
+            return dict(self.to_python(value))
         
-        return value
+        return super().get_prep_value(value)
 
 
 class LocationMixin(models.Model):
@@ -127,9 +145,44 @@ class LocationQueryMixin:
     
     def in_proximity(self, lat: float, lng: float, radius_km: float):
         """
-        Filter locations within radius (requires PostGIS or similar).
+        Filter rows within radius_km of (lat, lng), nearest first.
         
-        This is a placeholder for GeoDjango implementation.
+        No PostGIS needed:
+        1. Geohash prefix range scans (when the model has an indexed `geohash`)
+        2. Bounding box on the latitude/longitude columns
+        3. Exact haversine in SQL, exposed as the `distance_km` annotation
         """
-        # TODO: Implement with PostGIS / GeoDjango
-        raise NotImplementedError("Proximity queries require GeoDjango")
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        queryset = self.filter(
+            latitude__gte=min_lat, latitude__lte=max_lat,
+            longitude__gte=min_lng, longitude__lte=max_lng,
+        )
+        
+        if any(field.name == 'geohash' for field in self.model._meta.concrete_fields):
+            prefixes = geohash_cover(lat, lng, radius_km)
+            if prefixes:
+                cover = Q()
+                for prefix in prefixes:
+                    cover |= Q(geohash__startswith=prefix)
+                queryset = queryset.filter(cover)
+        
+        lat_rad = math.radians(float(lat))
+        lng_rad = math.radians(float(lng))
+        row_lat = Radians(Cast('latitude', FloatField()))
+        row_lng = Radians(Cast('longitude', FloatField()))
+        a = (
+            Power(Sin((row_lat - Value(lat_rad)) / 2), 2)
+            + Value(math.cos(lat_rad)) * Cos(row_lat) * Power(Sin((row_lng - Value(lng_rad)) / 2), 2)
+        )
+        distance = ExpressionWrapper(
+            Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a)),
+            output_field=FloatField()
+        )
+        return queryset.annotate(distance_km=distance).filter(
+            distance_km__lte=radius_km
+        ).order_by('distance_km')
+
+
+class LocationQuerySet(LocationQueryMixin, models.QuerySet):
+    """QuerySet with location-aware filters; use LocationQuerySet.as_manager()."""
+    pass
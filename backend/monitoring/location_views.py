@@ -7,8 +7,18 @@ Provides endpoints for:
 - Location querying and filtering
 """
 
+import codecs
+import json
+import re
+from collections.abc import Iterator
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
@@ -85,8 +95,9 @@ class LocationViewSet(viewsets.ViewSet, LocationValidationView):
     """
     Endpoints for location validation and conversion.
     
-    - POST /api/locations/validate/: Validate structured location data
-    - POST /api/locations/convert/: Convert legacy format to structured
+    - POST /api/monitoring/locations/validate/: Validate structured location data
+    - POST /api/monitoring/locations/convert/: Convert legacy format to structured
+    - POST /api/monitoring/locations/batch_validate/: Streamed bulk validation (JSON or NDJSON)
     """
     
     permission_classes = [IsAuthenticated]
@@ -139,49 +150,270 @@ class LocationViewSet(viewsets.ViewSet, LocationValidationView):
         """
         Validate multiple locations in one request.
         
-        Request body:
+        Request body, either JSON:
             {
                 "locations": [
                     { "country_code": "NP", ... },
                     { "country_code": "NP", ... }
                 ]
             }
+        (a bare JSON array also works) or NDJSON (Content-Type:
+        application/x-ndjson), one location object per line.
         
-        Response:
+        Response (streamed, same shape as the input format):
             {
                 "results": [
-                    { "valid": true, "location": { ... } },
-                    { "valid": false, "errors": { ... } }
-                ]
+                    { "index": 0, "valid": true, "location": { ... } },
+                    { "index": 1, "valid": false, "errors": { ... } }
+                ],
+                "summary": { "total": 2, "valid": 1, "invalid": 1, "truncated": false }
             }
+        
+        ⚡ Items are checked with the LocationSchema fast path in chunks of
+        LOCATION_BATCH_CHUNK_SIZE and written out as they are validated, so
+        migration jobs can push tens of thousands of legacy locations.
+        The body is read incrementally too: NDJSON line by line, JSON arrays
+        (bare or as the first "locations" key) element by element, so the
+        first results go out before the last line has been parsed. Under
+        ASGI the response is an async iterator, each chunk produced in a
+        worker thread, so daphne sends it right away instead of buffering
+        the whole response.
+        Limits: LOCATION_BATCH_MAX_ITEMS items (the rest is cut off and the
+        summary says "truncated": true), LOCATION_BATCH_MAX_BYTES body.
         """
-        locations = request.data.get('locations', [])
-        if not isinstance(locations, list):
+        max_bytes = getattr(settings, 'LOCATION_BATCH_MAX_BYTES', 50 * 1024 * 1024)
+        max_items = getattr(settings, 'LOCATION_BATCH_MAX_ITEMS', 50000)
+        
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_bytes:
             return Response(
-                {"error": "locations must be a list"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": f"Request body exceeds {max_bytes} bytes"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
             )
         
-        results = []
-        for location_data in locations:
-            serializer = LocationDataSerializer(data=location_data)
-            if serializer.is_valid():
-                results.append({
-                    "valid": True,
-                    "location": serializer.validated_data
-                })
-            else:
-                results.append({
-                    "valid": False,
-                    "errors": serializer.errors
-                })
+        content_type = (request.content_type or '').split(';')[0].strip()
+        ndjson = content_type in NDJSON_CONTENT_TYPES
+        stream = request.stream
+        
+        if stream is None:
+            items = iter(())
+        elif ndjson:
+            items = _iter_ndjson(stream)
+        elif content_type in ('', 'application/json'):
+            items = _iter_json_locations(stream)
+        else:
+            items = request.data
+        
+        if not isinstance(items, Iterator):
+            # Body that can't be read incrementally: parsed whole
+            data = items
+            locations = data if isinstance(data, list) else (
+                data.get('locations', []) if isinstance(data, dict) else None
+            )
+            if not isinstance(locations, list):
+                return Response(
+                    {"error": "locations must be a list"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if len(locations) > max_items:
+                return Response(
+                    {"error": f"At most {max_items} locations per request, got {len(locations)}"},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                )
+            items = iter(locations)
         
-        return Response(
-            {"results": results},
+        results = _stream_batch_results(items, max_items, ndjson)
+        if isinstance(request._request, ASGIRequest):
+            results = _iterate_in_thread(results)
+        
+        return StreamingHttpResponse(
+            results,
+            content_type='application/x-ndjson' if ndjson else 'application/json',
             status=status.HTTP_200_OK
         )
 
 
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def _iter_ndjson(stream):
+    """Yield one parsed object (or a _BadLine) per non-empty NDJSON line."""
+    for raw in stream:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield _BadLine(f"Invalid JSON: {e}")
+
+
+class _BadLine:
+    """Marker for an NDJSON line that could not be parsed."""
+    
+    def __init__(self, error):
+        self.error = error
+
+
+# Body read size for the incremental JSON parser
+JSON_READ_SIZE = 64 * 1024
+
+_JSON_ARRAY_START = re.compile(r'\s*(?:\{\s*"locations"\s*:\s*)?\[')
+_WHITESPACE = re.compile(r'\s*')
+
+
+def _iter_json_locations(stream):
+    """
+    Incremental reader for a JSON batch body.
+    
+    Returns a generator over the array elements when the body is a bare
+    array or an object whose first key is "locations"; otherwise the whole
+    body parsed at once (dict or list), like request.data would.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    
+    def read():
+        """Next piece of text, '' at the end of the body."""
+        while True:
+            raw = stream.read(JSON_READ_SIZE)
+            text = utf8.decode(raw, final=not raw)
+            if text or not raw:
+                return text
+    
+    head = read()
+    while head and len(head.lstrip()) < 32:
+        more = read()
+        if not more:
+            break
+        head += more
+    match = _JSON_ARRAY_START.match(head)
+    if match is None:
+        rest = [head]
+        while rest[-1]:
+            rest.append(read())
+        body = ''.join(rest)
+        try:
+            return json.loads(body) if body.strip() else {}
+        except ValueError as e:
+            raise ParseError(f'JSON parse error - {e}')
+    return _iter_json_array(read, head[match.end():])
+
+
+def _iter_json_array(read, buffer):
+    """Yield the elements of a JSON array whose '[' was already consumed (a _BadLine on bad JSON)."""
+    decoder = json.JSONDecoder()
+    pos = 0
+    eof = False
+    expect_value = True
+    first = True
+    
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                yield _BadLine("Invalid JSON: unexpected end of array")
+                return
+            more = read()
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        
+        if not expect_value or (first and buffer[pos] == ']'):
+            if buffer[pos] == ']':
+                return
+            if buffer[pos] != ',':
+                yield _BadLine(f"Invalid JSON: expected ',' or ']', got {buffer[pos]!r}")
+                return
+            expect_value = True
+            pos += 1
+            continue
+        
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except ValueError as e:
+            error = e
+            end = None
+        # A value running into the end of the buffer may continue in the next read
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                yield _BadLine(f"Invalid JSON: {error}")
+                return
+            more = read()
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        
+        yield item
+        buffer, pos = buffer[end:], 0
+        expect_value = first = False
+
+
+def _validate_batch_item(index, item):
+    if isinstance(item, _BadLine):
+        return {"index": index, "valid": False, "errors": {"non_field_errors": [item.error]}}
+    try:
+        return {"index": index, "valid": True, "location": LocationSchema.validate(item)}
+    except LocationValidationError as e:
+        return {"index": index, "valid": False, "errors": {"non_field_errors": [str(e)]}}
+
+
+def _stream_batch_results(items, max_items, ndjson):
+    """Validate `items` chunk by chunk and yield encoded output as it is ready."""
+    chunk_size = getattr(settings, 'LOCATION_BATCH_CHUNK_SIZE', 1000)
+    total = valid = 0
+    truncated = False
+    
+    if not ndjson:
+        yield '{"results": ['
+    
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        if total + len(chunk) > max_items:
+            chunk = chunk[:max_items - total]
+            truncated = True
+        
+        encoded = []
+        for offset, item in enumerate(chunk):
+            result = _validate_batch_item(total + offset, item)
+            valid += result["valid"]
+            encoded.append(json.dumps(result, default=str))
+        
+        if ndjson:
+            yield ''.join(line + '\n' for line in encoded)
+        else:
+            yield (',' if total else '') + ','.join(encoded)
+        
+        total += len(chunk)
+        if truncated:
+            break
+    
+    summary = {"total": total, "valid": valid, "invalid": total - valid, "truncated": truncated}
+    if ndjson:
+        yield json.dumps({"summary": summary}) + '\n'
+    else:
+        yield '], "summary": ' + json.dumps(summary) + '}'
+
+
+async def _iterate_in_thread(iterator):
+    """
+    Async wrapper for a blocking iterator, for StreamingHttpResponse under
+    ASGI: each item is computed in a worker thread and sent on its own
+    (a sync iterator would be collected with sync_to_async(list) first).
+    """
+    done = object()
+    step = sync_to_async(next)
+    while True:
+        item = await step(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
 # Mixin for model viewsets to add location endpoints
 class LocationEndpointMixin:
     """
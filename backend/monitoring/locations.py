@@ -217,6 +217,39 @@ class CountryValidator:
         }
 
 
+class ValidatedLocation(dict):
+    """
+    A location dict that has already passed LocationSchema.validate.
+    
+    Immutable, so it can be passed around (and stored, and read back) without
+    anyone needing to re-validate it. Serializes like a plain dict.
+    """
+    
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("ValidatedLocation is immutable; build a new location with LocationSchema.create()")
+    
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def __reduce__(self):
+        return (ValidatedLocation, (dict(self),))
+
+
+# Precomputed tables for the fast path
+_COUNTRY_NAMES = dict(ISO_COUNTRIES)
+_REQUIRED_FIELDS = ("country_code", "country_name", "location_id", "lat", "lng")
+_LOCATION_ID_MATCH = LOCATION_ID_PATTERN.match
+
+
 class LocationSchema:
     """
     Enforces the standard location format across the system.
@@ -225,7 +258,7 @@ class LocationSchema:
     """
     
     @staticmethod
-    def validate(location: Dict[str, Any]) -> Dict[str, Any]:
+    def validate(location: Dict[str, Any], trusted: bool = False) -> Dict[str, Any]:
         """
         Validate complete location object.
         
@@ -238,74 +271,93 @@ class LocationSchema:
         Optional fields:
         - display_name (UI only, can be localized)
         
+        ⚡ Single pass: each field is checked once against precomputed tables.
+        A ValidatedLocation is returned as-is, and trusted=True skips checks
+        for values that were validated before they were stored (DB reads).
+        
         Args:
             location: Location dictionary
+            trusted: Caller guarantees the value was validated earlier
             
         Returns:
-            Validated and normalized location dictionary
+            Validated and normalized location (ValidatedLocation)
             
         Raises:
             LocationValidationError: If validation fails
         """
+        if isinstance(location, ValidatedLocation):
+            return location
+        
         if not isinstance(location, dict):
             raise LocationValidationError(f"Location must be dict, got {type(location)}")
         
-        # Validate required fields
-        required = {"country_code", "country_name", "location_id", "lat", "lng"}
-        missing = required - set(location.keys())
-        if missing:
-            raise LocationValidationError(f"Missing required fields: {missing}")
-        
-        # Validate and normalize each field
-        validated = {}
+        if trusted:
+            return ValidatedLocation(location)
         
-        # Country
-        validated["country_code"] = CountryValidator.validate_code(
-            location["country_code"]
-        )
-        validated["country_name"] = CountryValidator.get_country_name(
-            validated["country_code"]
-        )
+        # Validate required fields
+        for field in _REQUIRED_FIELDS:
+            if field not in location:
+                missing = {f for f in _REQUIRED_FIELDS if f not in location}
+                raise LocationValidationError(f"Missing required fields: {missing}")
+        
+        # Country (one lookup: membership in the table implies 2 letters)
+        raw_code = location["country_code"]
+        if not isinstance(raw_code, str):
+            raise LocationValidationError(
+                f"country_code must be string, got {type(raw_code)}"
+            )
+        country_code = raw_code.upper().strip()
+        country_name = _COUNTRY_NAMES.get(country_code)
+        if country_name is None:
+            # Slow path only to produce the precise error message
+            CountryValidator.validate_code(country_code)
         
         # Verify country_code matches country_name
-        if validated["country_name"] != location.get("country_name"):
+        if country_name != location["country_name"]:
             raise LocationValidationError(
                 f"country_name mismatch: '{location.get('country_name')}' "
-                f"does not match code '{validated['country_code']}' "
-                f"which corresponds to '{validated['country_name']}'"
+                f"does not match code '{country_code}' "
+                f"which corresponds to '{country_name}'"
             )
         
-        # Location ID
-        validated["location_id"] = LocationIDValidator.validate(
-            location["location_id"]
-        )
-        
-        # Verify country code in location_id matches
-        id_country_code = LocationIDValidator.extract_country_code(
-            validated["location_id"]
-        )
-        if id_country_code != validated["country_code"]:
+        # Location ID (one regex pass; prefix is the country)
+        location_id = location["location_id"]
+        if not isinstance(location_id, str):
+            raise LocationValidationError(f"location_id must be string, got {type(location_id)}")
+        location_id = location_id.upper().strip()
+        if not location_id:
+            raise LocationValidationError("location_id cannot be empty")
+        if not _LOCATION_ID_MATCH(location_id):
             raise LocationValidationError(
-                f"location_id country '{id_country_code}' does not match "
-                f"country_code '{validated['country_code']}'"
+                f"location_id '{location_id}' does not match pattern CC-STATE-WARD. "
+                "Only uppercase letters, numbers, and hyphens allowed."
+            )
+        if location_id[:2] != country_code:
+            raise LocationValidationError(
+                f"location_id country '{location_id[:2]}' does not match "
+                f"country_code '{country_code}'"
             )
         
         # Coordinates
         lat, lng = CoordinateValidator.validate(location["lat"], location["lng"])
-        validated["lat"] = lat
-        validated["lng"] = lng
         
         # Display name (optional, UI only)
         if "display_name" in location:
             display_name = str(location["display_name"]).strip()
             if not display_name:
                 raise LocationValidationError("display_name cannot be empty")
-            validated["display_name"] = display_name
         else:
             # Generate default display name if not provided
-            validated["display_name"] = f"{validated['country_name']} ({validated['location_id']})"
+            display_name = f"{country_name} ({location_id})"
         
-        return validated
+        return ValidatedLocation(
+            country_code=country_code,
+            country_name=country_name,
+            location_id=location_id,
+            lat=lat,
+            lng=lng,
+            display_name=display_name,
+        )
     
     @staticmethod
     def create(
@@ -352,15 +404,18 @@ class LocationMigrationHelper:
         lat: float,
         lng: float,
         venue_address: Optional[str] = None,
-        country_code: str = "NP"
+        country_code: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Migrate event location from old format.
         
         Old: venue_address, lat, lng
         New: Full location schema
+        
+        country_code defaults to the country the coordinates fall in ("NP" if none).
         """
         location_id = LocationMigrationHelper._infer_location_id(lat, lng, country_code)
+        country_code = location_id[:2]
         
         return LocationSchema.create(
             country_code=country_code,
@@ -375,15 +430,18 @@ class LocationMigrationHelper:
         lat: float,
         lng: float,
         location_name: Optional[str] = None,
-        country_code: str = "NP"
+        country_code: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Migrate incident/SOS location from old format.
         
         Old: location_name, lat, lng
         New: Full location schema
+        
+        country_code defaults to the country the coordinates fall in ("NP" if none).
         """
         location_id = LocationMigrationHelper._infer_location_id(lat, lng, country_code)
+        country_code = location_id[:2]
         
         return LocationSchema.create(
             country_code=country_code,
@@ -394,13 +452,18 @@ class LocationMigrationHelper:
         )
     
     @staticmethod
-    def _infer_location_id(lat: float, lng: float, country_code: str) -> str:
+    def _infer_location_id(lat: float, lng: float, country_code: Optional[str] = None) -> str:
         """
         Infer location_id from coordinates and country.
         
-        This is a temporary mapping for migration. In production,
-        should use proper geocoding or geographic zone database.
+        The country comes from the shared boundary index (monitoring.countries)
+        when not given. City/ward mapping is a temporary table for migration.
         """
+        if not country_code:
+            from monitoring.countries import infer_country
+            country_code = infer_country(lat, lng) or "NP"
+        lat, lng = float(lat), float(lng)
+        
         # Simple mappings for Nepal (example)
         if country_code == "NP":
             if 27.7 <= lat <= 27.72 and 85.3 <= lng <= 85.35:
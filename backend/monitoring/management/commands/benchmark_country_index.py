@@ -0,0 +1,73 @@
+"""
+🌍 Micro-benchmark: country boundary index lookups
+
+Usage:
+    python manage.py benchmark_country_index
+    python manage.py benchmark_country_index --points 1000000 --linear-sample 20000
+"""
+
+import random
+import time
+from django.core.management.base import BaseCommand
+from monitoring.countries import get_country_index
+from monitoring.gazetteer import polygon_contains
+
+
+class Command(BaseCommand):
+    help = 'Time infer_country_code-style lookups over random points (grid index vs linear polygon scan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=1000000)
+        parser.add_argument('--linear-sample', type=int, default=20000,
+                            help='Points used for the (slow) no-index baseline')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        n = options['points']
+
+        started = time.perf_counter()
+        country_index = get_country_index()
+        load_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"Index: {len(country_index.codes)} countries, "
+                          f"{len(country_index.index.cells)} grid cells, ready in {load_ms:.1f} ms")
+
+        # Half uniform over the globe, half clustered on supported countries' boxes
+        boxes = [bbox for bbox, _, _, _ in country_index.index.areas]
+        points = []
+        for i in range(n):
+            if i % 2 == 0 or not boxes:
+                points.append((rng.uniform(-90, 90), rng.uniform(-180, 180)))
+            else:
+                min_x, min_y, max_x, max_y = rng.choice(boxes)
+                points.append((rng.uniform(min_y, max_y), rng.uniform(min_x, max_x)))
+
+        lookup = country_index.lookup
+        hits = 0
+        started = time.perf_counter()
+        for lat, lng in points:
+            if lookup(lat, lng) is not None:
+                hits += 1
+        indexed_s = time.perf_counter() - started
+
+        # Baseline: every polygon of every country, no prefilter
+        sample = points[:options['linear_sample']]
+        areas = sorted(country_index.index.areas, key=lambda a: a[2])
+        mismatches = 0
+        started = time.perf_counter()
+        for lat, lng in sample:
+            found = None
+            for _, polygons, _, code in areas:
+                if any(polygon_contains(polygon, lng, lat) for polygon in polygons):
+                    found = code
+                    break
+            if found != lookup(lat, lng):
+                mismatches += 1
+        linear_s = time.perf_counter() - started
+
+        indexed_us = indexed_s / n * 1e6
+        linear_us = linear_s / max(len(sample), 1) * 1e6
+        self.stdout.write(f"{'indexed':>10}: {n:>9} points {indexed_s:8.2f} s  {indexed_us:7.2f} us/lookup  ({hits} in a supported country)")
+        self.stdout.write(f"{'linear':>10}: {len(sample):>9} points {linear_s:8.2f} s  {linear_us:7.2f} us/lookup (includes indexed re-check)")
+        if mismatches:
+            self.stderr.write(self.style.WARNING(f"{mismatches} indexed/linear mismatches"))
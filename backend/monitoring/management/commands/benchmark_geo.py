@@ -0,0 +1,73 @@
+"""
+📐 Micro-benchmark: per-row haversine loop vs vectorized geo engine
+
+Usage:
+    python manage.py benchmark_geo
+    python manage.py benchmark_geo --responders 100 500 5000 --k 10 --repeat 50
+"""
+
+import math
+import random
+import time
+from django.core.management.base import BaseCommand
+from monitoring.geo import haversine_many, k_nearest
+
+
+def _loop_haversine(lat1, lon1, lat2, lon2):
+    # Verbatim copy of the old per-call implementation (imports included)
+    from math import radians, cos, sin, asin, sqrt
+
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    return 2 * asin(sqrt(a)) * 6371
+
+
+class Command(BaseCommand):
+    help = 'Compare the scalar per-row haversine loop with the NumPy haversine_many + k_nearest engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--responders', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--radius', type=float, default=2.0)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        k = options['k']
+        radius = options['radius']
+        repeat = options['repeat']
+
+        # Kathmandu valley sized spread around a venue
+        origin_lat, origin_lng = 27.7172, 85.3240
+
+        self.stdout.write(f"{'N':>8} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8}")
+        for n in options['responders']:
+            lats = [origin_lat + rng.uniform(-0.1, 0.1) for _ in range(n)]
+            lngs = [origin_lng + rng.uniform(-0.1, 0.1) for _ in range(n)]
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                scored = [
+                    (i, _loop_haversine(origin_lat, origin_lng, lats[i], lngs[i]))
+                    for i in range(n)
+                ]
+                nearby = sorted((s for s in scored if s[1] <= radius), key=lambda s: s[1])[:k]
+            loop_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                distances = haversine_many(origin_lat, origin_lng, lats, lngs)
+                nearest = k_nearest(distances, k, max_distance=radius)
+            numpy_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            # Sanity check: both paths must pick the same responders
+            if [i for i, _ in nearby] != list(nearest):
+                self.stderr.write(self.style.WARNING(f"Result mismatch at N={n}"))
+            if not math.isclose(sum(d for _, d in nearby), float(distances[nearest].sum()), rel_tol=1e-9):
+                self.stderr.write(self.style.WARNING(f"Distance mismatch at N={n}"))
+
+            speedup = loop_ms / numpy_ms if numpy_ms else float('inf')
+            self.stdout.write(f"{n:>8} {loop_ms:>10.3f} {numpy_ms:>10.3f} {speedup:>7.1f}x")
@@ -0,0 +1,31 @@
+"""
+📊 Fold the legacy unbounded SOS sample lists into the aggregate metrics
+
+Safe to run from several hosts at once and to re-run after an interruption.
+
+Usage:
+    python manage.py migrate_sos_metrics
+"""
+
+import redis
+from django.core.management.base import BaseCommand, CommandError
+from monitoring.metrics import sos_metrics
+
+
+class Command(BaseCommand):
+    help = 'Move sos:distances / sos:times / sos:completion_times lists into the sos:stats aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            folded = sos_metrics.migrate_legacy_lists(chunk_size=options['chunk_size'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        except redis.RedisError as e:
+            # Unfolded samples stay in the claimed key: re-running picks them up
+            raise CommandError(f"Redis error, re-run to resume: {e}")
+        for series, count in folded.items():
+            self.stdout.write(f"{series:>18}: {count} samples folded")
+        self.stdout.write(self.style.SUCCESS("Legacy SOS metric lists migrated"))
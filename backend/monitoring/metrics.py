@@ -10,12 +10,19 @@ Tracks real-time metrics for:
 - Distance of accepting volunteers
 - Fallback frequency
 - 409 conflict rates
+
+📊 Samples are folded into running aggregates (count/sum/min/max) plus a
+fixed-size reservoir for percentiles, so memory stays bounded and a health
+check costs O(1) no matter how much history exists.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from collections import defaultdict
 import json
 import logging
+import math
+import random
+import uuid
 import redis
 from django.conf import settings
 
@@ -32,11 +39,77 @@ class SOSMetrics:
     - sos:conflicts - Counter
     - sos:timeouts - Counter
     - sos:fallback - Counter
-    - sos:distances - List
-    - sos:times - List
+    - sos:stats:{series} - Hash {count, sum, min, max} (distances / times / completion_times)
+    - sos:reservoir:{series} - List, at most METRICS_RESERVOIR_SIZE samples
+    - sos:bucket:{m|h}:{event_id|all}:{bucket_start} - Hash of per-minute / per-hour
+      counters and latency histograms (expire automatically)
+    """
+    
+    SERIES = ('distances', 'times', 'completion_times')
+    
+    # KEYS: 1 stats hash, 2 reservoir list
+    # ARGV: 1 value, 2 random in [0, 1), 3 reservoir size, 4 ttl seconds (0 = none)
+    OBSERVE_LUA = """
+    local v = tonumber(ARGV[1])
+    local n = redis.call('HINCRBY', KEYS[1], 'count', 1)
+    redis.call('HINCRBYFLOAT', KEYS[1], 'sum', ARGV[1])
+    local mn = tonumber(redis.call('HGET', KEYS[1], 'min'))
+    if (not mn) or v < mn then redis.call('HSET', KEYS[1], 'min', ARGV[1]) end
+    local mx = tonumber(redis.call('HGET', KEYS[1], 'max'))
+    if (not mx) or v > mx then redis.call('HSET', KEYS[1], 'max', ARGV[1]) end
+
+    -- Reservoir sampling (Algorithm R): uniform sample of every value seen
+    local size = tonumber(ARGV[3])
+    if size > 0 then
+        local len = redis.call('LLEN', KEYS[2])
+        if len < size then
+            redis.call('RPUSH', KEYS[2], ARGV[1])
+        else
+            local j = math.floor(tonumber(ARGV[2]) * n)
+            if j < size then redis.call('LSET', KEYS[2], j, ARGV[1]) end
+        end
+    end
+
+    local ttl = tonumber(ARGV[4])
+    if ttl > 0 then
+        redis.call('EXPIRE', KEYS[1], ttl)
+        redis.call('EXPIRE', KEYS[2], ttl)
+    end
+    return n
     """
     
+    COUNTERS = ('created', 'accepted', 'conflicts', 'timeouts', 'fallback')
+    
+    # Histogram bin upper bounds per series (last bin is "above the highest bound")
+    HISTOGRAM_BOUNDS = {
+        'times': (10, 30, 60, 120, 300, 600),                  # seconds to acceptance
+        'completion_times': (60, 180, 300, 600, 1800, 3600),   # seconds to completion
+        'distances': (0.25, 0.5, 1, 2, 5),                     # km to accepting volunteer
+    }
+    
+    # Rolling windows: name -> (bucket granularity, number of buckets)
+    WINDOWS = {
+        '5m': ('m', 5),
+        '1h': ('m', 60),
+        '24h': ('h', 24),
+    }
+    BUCKET_SECONDS = {'m': 60, 'h': 3600}
+    BUCKET_TTL = {'m': 2 * 3600, 'h': 8 * 86400}
+    
     def __init__(self):
+        self.reservoir_size = getattr(settings, 'METRICS_RESERVOIR_SIZE', 512)
+        
+        # Fallback in-memory storage if Redis unavailable
+        self._fallback_metrics = {
+            'sos_created': 0,
+            'sos_accepted': 0,
+            'sos_conflicts': 0,
+            'sos_timeouts': 0,
+            'fallback_triggered': 0,
+        }
+        self._fallback_stats = {}
+        self._fallback_buckets = {}
+        
         # Connect to Redis
         try:
             self.redis_client = redis.Redis(
@@ -47,21 +120,11 @@ class SOSMetrics:
             )
             # Test connection
             self.redis_client.ping()
+            self._observe_script = self.redis_client.register_script(self.OBSERVE_LUA)
             logger.info("✅ Redis metrics store connected")
         except Exception as e:
             logger.warning(f"⚠️ Redis connection failed: {e}. Falling back to in-memory.")
             self.redis_client = None
-        
-        # Fallback in-memory storage if Redis unavailable
-        self._fallback_metrics = {
-            'sos_created': 0,
-            'sos_accepted': 0,
-            'sos_conflicts': 0,
-            'sos_timeouts': 0,
-            'fallback_triggered': 0,
-            'distances': [],
-            'times': []
-        }
     
     def _get(self, key, default=0):
         """Get value from Redis or fallback"""
@@ -83,30 +146,336 @@ class SOSMetrics:
         self._fallback_metrics[key] = self._fallback_metrics.get(key, 0) + 1
         return self._fallback_metrics[key]
     
-    def _list_push(self, key, value):
-        """Push to list in Redis or fallback"""
+    def _observe(self, series, value):
+        """Fold one sample into the running aggregates + reservoir for `series`"""
+        value = float(value)
         if self.redis_client:
             try:
-                return self.redis_client.rpush(key, float(value))
+                return self._observe_script(
+                    keys=[f'sos:stats:{series}', f'sos:reservoir:{series}'],
+                    args=[value, random.random(), self.reservoir_size, 0]
+                )
             except:
                 pass
-        if key not in self._fallback_metrics:
-            self._fallback_metrics[key] = []
-        self._fallback_metrics[key].append(float(value))
+        
+        stats = self._fallback_stats.setdefault(series, {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'reservoir': []})
+        stats['count'] += 1
+        stats['sum'] += value
+        stats['min'] = value if stats['min'] is None else min(stats['min'], value)
+        stats['max'] = value if stats['max'] is None else max(stats['max'], value)
+        if len(stats['reservoir']) < self.reservoir_size:
+            stats['reservoir'].append(value)
+        else:
+            j = int(random.random() * stats['count'])
+            if j < self.reservoir_size:
+                stats['reservoir'][j] = value
+        return stats['count']
+    
+    def _series_stats(self, series):
+        """
+        Aggregates for `series`: {count, sum, min, max, avg, p50, p90, p95}.
+        Reads one small hash and a bounded list, independent of history length.
+        """
+        raw = None
+        samples = []
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline()
+                pipe.hgetall(f'sos:stats:{series}')
+                pipe.lrange(f'sos:reservoir:{series}', 0, -1)
+                raw, samples = pipe.execute()
+                samples = [float(v) for v in samples]
+            except:
+                raw = None
+        if raw is None:
+            raw = self._fallback_stats.get(series, {})
+            samples = list(raw.get('reservoir', []))
+        
+        count = int(raw.get('count') or 0)
+        total = float(raw.get('sum') or 0)
+        samples.sort()
+        return {
+            'count': count,
+            'sum': total,
+            'min': float(raw['min']) if count and raw.get('min') is not None else 0,
+            'max': float(raw['max']) if count and raw.get('max') is not None else 0,
+            'avg': total / count if count else 0,
+            'p50': self._percentile(samples, 50),
+            'p90': self._percentile(samples, 90),
+            'p95': self._percentile(samples, 95),
+        }
+    
+    @staticmethod
+    def _percentile(sorted_samples, pct):
+        """Nearest-rank percentile of an already sorted list"""
+        if not sorted_samples:
+            return 0
+        rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+        return sorted_samples[rank - 1]
+    
+    def migrate_legacy_lists(self, chunk_size=1000):
+        """
+        One-time fold of the old unbounded sos:distances / sos:times /
+        sos:completion_times lists into the aggregate hashes.
+        
+        Run via `manage.py migrate_sos_metrics`, not at import:
+        - Each list is claimed with RENAME to a private key first, so two
+          processes can never fold the same samples
+        - Samples are read in chunks (LRANGE) and folded in one MULTI per
+          chunk that also LTRIMs them off the claimed key, so a failed write
+          leaves the chunk in place; the next run picks it up
+        - The claimed key is WATCHed, so two runs sweeping the same leftover
+          claim never fold a chunk twice
+        
+        Returns:
+            {series: samples folded}
+        """
+        if not self.redis_client:
+            raise RuntimeError("Redis metrics store unavailable")
+        
+        folded = {}
+        for series in self.SERIES:
+            legacy_key = f'sos:{series}'
+            claimed = list(self.redis_client.scan_iter(match=f'{legacy_key}:migrating:*'))
+            if self.redis_client.type(legacy_key) == 'list':
+                claim_key = f'{legacy_key}:migrating:{uuid.uuid4().hex}'
+                try:
+                    self.redis_client.rename(legacy_key, claim_key)
+                    claimed.append(claim_key)
+                except redis.ResponseError:
+                    pass  # Another process claimed it first
+            
+            folded[series] = 0
+            for claim_key in claimed:
+                while True:
+                    count = self._fold_legacy_chunk(series, claim_key, chunk_size)
+                    if not count:
+                        break
+                    folded[series] += count
+            if folded[series]:
+                logger.info(f"✅ Folded {folded[series]} legacy samples from {legacy_key} into aggregates")
+        return folded
+    
+    def _fold_legacy_chunk(self, series, claim_key, chunk_size):
+        """Fold and trim the head of claim_key in one MULTI. Returns samples folded (0 when empty)."""
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(claim_key)
+                    values = pipe.lrange(claim_key, 0, chunk_size - 1)
+                    if not values:
+                        return 0
+                    pipe.multi()
+                    for value in values:
+                        self._observe_script(
+                            keys=[f'sos:stats:{series}', f'sos:reservoir:{series}'],
+                            args=[float(value), random.random(), self.reservoir_size, 0],
+                            client=pipe,
+                        )
+                    pipe.ltrim(claim_key, len(values), -1)
+                    pipe.execute()
+                    return len(values)
+                except redis.WatchError:
+                    continue  # Another run trimmed this chunk first: re-read the head
+    
+    # ═══════════════════════════════════════════════════════════════════
+    # TIME BUCKETS: per-minute / per-hour counters for rolling windows
+    # ═══════════════════════════════════════════════════════════════════
+    
+    def _bucket_key(self, granularity, scope, bucket_start):
+        return f'sos:bucket:{granularity}:{scope}:{bucket_start}'
+    
+    def _bucket_start(self, granularity, ts):
+        size = self.BUCKET_SECONDS[granularity]
+        return int(ts // size) * size
+    
+    def _histogram_bin(self, series, value):
+        bounds = self.HISTOGRAM_BOUNDS[series]
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                return i
+        return len(bounds)
     
-    def _list_get_all(self, key):
-        """Get all list items from Redis or fallback"""
+    def _bucket_record(self, event_id=None, counter=None, samples=None):
+        """
+        Add one event to the current minute and hour buckets of both the
+        event scope and the global 'all' scope (single pipelined round-trip).
+        
+        Args:
+            counter: Name from COUNTERS to increment
+            samples: {series: value} latency / distance observations
+        """
+        now = datetime.now().timestamp()
+        increments = {}
+        if counter:
+            increments[counter] = 1
+        for series, value in (samples or {}).items():
+            value = float(value)
+            increments[f'{series}:count'] = 1
+            increments[f'{series}:sum'] = value
+            increments[f'{series}:bin:{self._histogram_bin(series, value)}'] = 1
+        if not increments:
+            return
+        
+        scopes = ['all'] if event_id in (None, '', 'all') else ['all', str(event_id)]
+        targets = [
+            (self._bucket_key(g, scope, self._bucket_start(g, now)), self.BUCKET_TTL[g])
+            for g in self.BUCKET_SECONDS
+            for scope in scopes
+        ]
+        
         if self.redis_client:
             try:
-                vals = self.redis_client.lrange(key, 0, -1)
-                return [float(v) for v in vals]
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, ttl in targets:
+                    for field, amount in increments.items():
+                        if isinstance(amount, float):
+                            pipe.hincrbyfloat(key, field, amount)
+                        else:
+                            pipe.hincrby(key, field, amount)
+                    pipe.expire(key, ttl)
+                pipe.execute()
+                return
             except:
                 pass
-        return self._fallback_metrics.get(key, [])
+        
+        for key, ttl in targets:
+            expires_at, fields = self._fallback_buckets.get(key, (now + ttl, {}))
+            for field, amount in increments.items():
+                fields[field] = fields.get(field, 0) + amount
+            self._fallback_buckets[key] = (expires_at, fields)
+        
+        # Keep the in-memory fallback bounded
+        if len(self._fallback_buckets) > 2000:
+            self._fallback_buckets = {
+                k: v for k, v in self._fallback_buckets.items() if v[0] > now
+            }
+    
+    def _bucket_read(self, granularity, count, event_id=None):
+        """Last `count` buckets (oldest first) as [(bucket_start, {field: number}), ...]"""
+        scope = 'all' if event_id in (None, '', 'all') else str(event_id)
+        size = self.BUCKET_SECONDS[granularity]
+        newest = self._bucket_start(granularity, datetime.now().timestamp())
+        starts = [newest - size * i for i in range(count - 1, -1, -1)]
+        keys = [self._bucket_key(granularity, scope, start) for start in starts]
+        
+        raw = None
+        if self.redis_client:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.hgetall(key)
+                raw = pipe.execute()
+            except:
+                raw = None
+        if raw is None:
+            now = datetime.now().timestamp()
+            raw = []
+            for key in keys:
+                expires_at, fields = self._fallback_buckets.get(key, (0, {}))
+                raw.append(fields if expires_at > now else {})
+        
+        return [
+            (start, {field: float(value) for field, value in fields.items()})
+            for start, fields in zip(starts, raw)
+        ]
+    
+    def _histogram_percentile(self, series, totals, pct):
+        """Upper bound of the histogram bin holding the pct-th percentile"""
+        count = totals.get(f'{series}:count', 0)
+        if not count:
+            return 0
+        bounds = self.HISTOGRAM_BOUNDS[series]
+        rank = math.ceil(pct / 100 * count)
+        seen = 0
+        for i in range(len(bounds) + 1):
+            seen += totals.get(f'{series}:bin:{i}', 0)
+            if seen >= rank:
+                return bounds[i] if i < len(bounds) else bounds[-1]
+        return bounds[-1]
+    
+    def _summarize(self, totals):
+        """Turn summed bucket fields into the same shape as get_metrics()"""
+        created = int(totals.get('created', 0))
+        accepted = int(totals.get('accepted', 0))
+        conflicts = int(totals.get('conflicts', 0))
+        timeouts = int(totals.get('timeouts', 0))
+        fallback = int(totals.get('fallback', 0))
+        
+        def rate(n):
+            # Acceptances in a window can belong to SOS created before it
+            return f"{min(100.0, (n / created) * 100) if created > 0 else 0:.1f}%"
+        
+        def avg(series):
+            count = totals.get(f'{series}:count', 0)
+            return round(totals.get(f'{series}:sum', 0) / count, 1) if count else 0
+        
+        times_p90 = self._histogram_percentile('times', totals, 90)
+        return {
+            "sos_created": created,
+            "sos_accepted": accepted,
+            "sos_conflicts": conflicts,
+            "sos_timeouts": timeouts,
+            "fallback_triggered": fallback,
+            
+            "acceptance_rate": rate(accepted),
+            "conflict_rate": rate(conflicts),
+            "fallback_rate": rate(fallback),
+            "timeout_rate": rate(timeouts),
+            
+            "avg_distance_km": round(avg('distances'), 2),
+            "avg_acceptance_time_seconds": avg('times'),
+            "avg_completion_time_seconds": avg('completion_times'),
+            
+            # Histogram estimate: "p90 <= N seconds"
+            "p90_acceptance_time_le": times_p90,
+            "acceptance_histogram": {
+                (f"le_{bound}" if i < len(self.HISTOGRAM_BOUNDS['times']) else f"gt_{self.HISTOGRAM_BOUNDS['times'][-1]}"):
+                    int(totals.get(f'times:bin:{i}', 0))
+                for i, bound in enumerate(self.HISTOGRAM_BOUNDS['times'] + (None,))
+            },
+        }
+    
+    def get_window_metrics(self, window='1h', event_id=None):
+        """
+        Rolling-window metrics ('5m', '1h' or '24h'), optionally for one event.
+        Recent performance only: last month's incidents don't dilute today's.
+        """
+        if window not in self.WINDOWS:
+            raise ValueError(f"Unknown window '{window}'. Use one of: {', '.join(self.WINDOWS)}")
+        granularity, count = self.WINDOWS[window]
+        
+        totals = defaultdict(float)
+        for _, fields in self._bucket_read(granularity, count, event_id):
+            for field, value in fields.items():
+                totals[field] += value
+        
+        summary = self._summarize(totals)
+        summary["window"] = window
+        summary["event_id"] = event_id
+        return summary
+    
+    def get_hourly_metrics(self, event_id=None, hours=24):
+        """Per-hour breakdown for the last `hours` hours (oldest first)"""
+        hours = max(1, min(int(hours), self.BUCKET_TTL['h'] // 3600))
+        breakdown = []
+        for start, fields in self._bucket_read('h', hours, event_id):
+            summary = self._summarize(fields)
+            breakdown.append({
+                "hour": datetime.fromtimestamp(start, tz=dt_timezone.utc).isoformat(),
+                "sos_created": summary["sos_created"],
+                "sos_accepted": summary["sos_accepted"],
+                "sos_timeouts": summary["sos_timeouts"],
+                "acceptance_rate": summary["acceptance_rate"],
+                "timeout_rate": summary["timeout_rate"],
+                "avg_acceptance_time_seconds": summary["avg_acceptance_time_seconds"],
+            })
+        return breakdown
     
     def log_sos_created(self, sos_id, event_id, nearby_count, fallback):
         """Log when SOS is created"""
         self._incr('sos:created')
+        self._bucket_record(event_id, counter='created')
         
         logger.info(
             f"[SOS_CREATED] id={sos_id} event={event_id} "
@@ -115,22 +484,28 @@ class SOSMetrics:
         
         if fallback:
             self._incr('sos:fallback')
+            self._bucket_record(event_id, counter='fallback')
             logger.warning(f"[SOS_FALLBACK] SOS {sos_id} triggered fallback (no nearby volunteers)")
     
-    def log_sos_accepted(self, sos_id, volunteer_name, distance_km, acceptance_seconds):
+    def log_sos_accepted(self, sos_id, volunteer_name, distance_km, acceptance_seconds, event_id=None):
         """Log when volunteer accepts SOS"""
         self._incr('sos:accepted')
-        self._list_push('sos:distances', distance_km)
-        self._list_push('sos:times', acceptance_seconds)
+        self._observe('distances', distance_km)
+        self._observe('times', acceptance_seconds)
+        self._bucket_record(event_id, counter='accepted', samples={
+            'distances': distance_km,
+            'times': acceptance_seconds,
+        })
         
         logger.info(
             f"[SOS_ACCEPTED] id={sos_id} volunteer={volunteer_name} "
             f"distance={distance_km:.2f}km response_time={acceptance_seconds:.1f}s"
         )
     
-    def log_sos_conflict(self, sos_id, first_volunteer, second_volunteer):
+    def log_sos_conflict(self, sos_id, first_volunteer, second_volunteer, event_id=None):
         """Log when volunteer tries to accept already-accepted SOS (409)"""
         self._incr('sos:conflicts')
+        self._bucket_record(event_id, counter='conflicts')
         
         logger.warning(
             f"[SOS_409_CONFLICT] id={sos_id} "
@@ -138,20 +513,16 @@ class SOSMetrics:
             f"rejected_volunteer={second_volunteer}"
         )
     
-    def log_sos_timeout(self, sos_id, minutes=5):
+    def log_sos_timeout(self, sos_id, minutes=5, event_id=None):
         """Log when SOS not accepted within timeout window"""
         self._incr('sos:timeouts')
+        self._bucket_record(event_id, counter='timeouts')
         logger.warning(f"[SOS_TIMEOUT] id={sos_id} not_accepted_within_{minutes}_min")
     
-    def log_sos_completed(self, sos_id, completion_seconds):
+    def log_sos_completed(self, sos_id, completion_seconds, event_id=None):
         """Log when SOS is fully resolved (from creation to completion)"""
-        self._list_push('sos:completion_times', completion_seconds)
-        logger.info(f"[SOS_COMPLETED] id={sos_id} total_duration={completion_seconds:.1f}s")
-
-    
-    def log_sos_completed(self, sos_id, completion_seconds):
-        """Log when SOS is fully resolved (from creation to completion)"""
-        self._list_push('sos:completion_times', completion_seconds)
+        self._observe('completion_times', completion_seconds)
+        self._bucket_record(event_id, samples={'completion_times': completion_seconds})
         logger.info(f"[SOS_COMPLETED] id={sos_id} total_duration={completion_seconds:.1f}s")
 
     
@@ -167,18 +538,18 @@ class SOSMetrics:
         sos_timeouts = self._get('sos:timeouts')
         fallback_triggered = self._get('sos:fallback')
         
-        # Calculate averages
-        distances = self._list_get_all('sos:distances')
-        avg_distance = sum(distances) / len(distances) if distances else 0
+        # Running aggregates (O(1) regardless of history)
+        distances = self._series_stats('distances')
+        avg_distance = distances['avg']
         
-        times = self._list_get_all('sos:times')
-        avg_acceptance_time = sum(times) / len(times) if times else 0
-        min_time = min(times) if times else 0
-        max_time = max(times) if times else 0
+        times = self._series_stats('times')
+        avg_acceptance_time = times['avg']
+        min_time = times['min']
+        max_time = times['max']
         
         # NEW: Completion time metrics
-        completion_times = self._list_get_all('sos:completion_times')
-        avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else 0
+        completion_times = self._series_stats('completion_times')
+        avg_completion_time = completion_times['avg']
         
         # Calculate rates
         acceptance_rate = (sos_accepted / sos_created) * 100 if sos_created > 0 else 0
@@ -204,15 +575,25 @@ class SOSMetrics:
             
             "min_acceptance_time": round(min_time, 1),
             "max_acceptance_time": round(max_time, 1),
+            
+            # Percentiles from a bounded reservoir sample
+            "p50_acceptance_time": round(times['p50'], 1),
+            "p90_acceptance_time": round(times['p90'], 1),
+            "p95_acceptance_time": round(times['p95'], 1),
+            "p95_completion_time": round(completion_times['p95'], 1),
         }
     
-    def check_thresholds(self):
+    def check_thresholds(self, window=None, event_id=None):
         """
         🚨 PRODUCTION ALERT: Check if metrics fall below target thresholds
         
+        Judged on a rolling window (METRICS_ALERT_WINDOW, default '1h') so
+        alerts reflect current performance, not lifetime history.
+        
         Returns list of alert strings if thresholds violated
         """
-        metrics = self.get_metrics()
+        window = window or getattr(settings, 'METRICS_ALERT_WINDOW', '1h')
+        metrics = self.get_window_metrics(window, event_id)
         alerts = []
         
         if metrics.get('sos_created', 0) == 0:
@@ -244,6 +625,9 @@ class SOSMetrics:
                 alerts.append(f"🔴 CRITICAL: Avg completion {completion_time:.1f}s (target: <300s)")
             elif completion_time > 180:
                 alerts.append(f"⚠️  WARNING: Avg completion {completion_time:.1f}s (target: <180s)")
+            
+            if alerts:
+                alerts = [f"{alert} [last {window}]" for alert in alerts]
                 
         except:
             pass
@@ -287,7 +671,7 @@ class SOSMetrics:
                 
                 # Auto-log timeout in metrics
                 if not any(t['sos_id'] == sos_id for t in getattr(self, 'logged_timeouts', [])):
-                    self.log_sos_timeout(sos_id, minutes=timeout_minutes)
+                    self.log_sos_timeout(sos_id, minutes=timeout_minutes, event_id=event_id)
             
             return result
         except Exception as e:
@@ -362,8 +746,10 @@ class SOSMetrics:
         """Reset all metrics (for testing)"""
         if self.redis_client:
             try:
-                keys = ['sos:created', 'sos:accepted', 'sos:conflicts', 'sos:timeouts', 
-                        'sos:fallback', 'sos:distances', 'sos:times']
+                keys = ['sos:created', 'sos:accepted', 'sos:conflicts', 'sos:timeouts', 'sos:fallback']
+                for series in self.SERIES:
+                    keys += [f'sos:stats:{series}', f'sos:reservoir:{series}']
+                keys += list(self.redis_client.scan_iter(match='sos:bucket:*', count=500))
                 for key in keys:
                     self.redis_client.delete(key)
                 logger.info("✅ Metrics reset in Redis")
@@ -376,9 +762,9 @@ class SOSMetrics:
                 'sos_conflicts': 0,
                 'sos_timeouts': 0,
                 'fallback_triggered': 0,
-                'distances': [],
-                'times': []
             }
+            self._fallback_stats = {}
+            self._fallback_buckets = {}
 
 
 # Global metrics instance  
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:30
+
+from django.db import migrations, models
+from monitoring.geo import geohash_encode
+
+
+def backfill_geohash(apps, schema_editor):
+    """Fill geohash for existing rows in batches (save() maintains it from now on)."""
+    for model_name in ('CrowdLocation', 'Incident', 'SOSAlert'):
+        model = apps.get_model('monitoring', model_name)
+        pending = model.objects.filter(
+            geohash__isnull=True, latitude__isnull=False, longitude__isnull=False
+        ).only('id', 'latitude', 'longitude').order_by('id')
+        last_id = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:2000])
+            if not batch:
+                break
+            for row in batch:
+                row.geohash = geohash_encode(row.latitude, row.longitude)
+            model.objects.bulk_update(batch, ['geohash'])
+            last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_sosalert_is_read'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crowdlocation',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='sosalert',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('monitoring', '0005_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrowdDensityCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('bucket_start', models.DateTimeField()),
+                ('geohash', models.CharField(max_length=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('lat_sum', models.FloatField(default=0)),
+                ('lng_sum', models.FloatField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crowd_density_cells', to='events.event')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='crowddensitycell',
+            constraint=models.UniqueConstraint(fields=('event', 'precision', 'bucket_start', 'geohash'), name='unique_crowd_density_cell'),
+        ),
+    ]
@@ -1,6 +1,16 @@
 from django.db import models
 from events.models import Event
 from django.conf import settings
+from .geo import geohash_encode
+from .location_fields import LocationQuerySet
+
+
+def compute_geohash(latitude, longitude):
+    """Indexed geohash for radius queries (None when coordinates are missing)."""
+    if latitude is None or longitude is None:
+        return None
+    return geohash_encode(latitude, longitude)
+
 
 class CrowdLocation(models.Model):
     SOURCE_CHOICES = (
@@ -13,6 +23,9 @@ class CrowdLocation(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
+
+    objects = LocationQuerySet.as_manager()
 
     class Meta:
         indexes = [
@@ -20,9 +33,40 @@ class CrowdLocation(models.Model):
             models.Index(fields=['latitude', 'longitude']),
         ]
 
+    def save(self, *args, **kwargs):
+        """Keep geohash in sync with the coordinates."""
+        self.geohash = compute_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Location at {self.latitude}, {self.longitude} for {self.event.name}"
 
+
+class CrowdDensityCell(models.Model):
+    """
+    Pre-aggregated crowd density: CrowdLocation points rolled up per
+    (event, time bucket, geohash cell) at a few geohash precisions (zoom levels).
+    Maintained incrementally by monitoring.density as points arrive.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='crowd_density_cells')
+    precision = models.PositiveSmallIntegerField()
+    bucket_start = models.DateTimeField()
+    geohash = models.CharField(max_length=12)
+    count = models.PositiveIntegerField(default=0)
+    lat_sum = models.FloatField(default=0)
+    lng_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'precision', 'bucket_start', 'geohash'],
+                name='unique_crowd_density_cell'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.geohash} @ {self.bucket_start}: {self.count} for event {self.event_id}"
+
 class Incident(models.Model):
     CATEGORY_CHOICES = (
         ('fire', 'Fire'),
@@ -90,6 +134,7 @@ class Incident(models.Model):
         null=True,
         help_text="DEPRECATED: Use location_data.display_name instead"
     )
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     confidence_score = models.IntegerField(default=1)
@@ -101,6 +146,8 @@ class Incident(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = LocationQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['event', 'status']),
@@ -115,6 +162,7 @@ class Incident(models.Model):
             self.latitude = self.location_data.get('lat')
             self.longitude = self.location_data.get('lng')
             self.location_name = self.location_data.get('display_name', '')
+        self.geohash = compute_geohash(self.latitude, self.longitude)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -174,6 +222,7 @@ class SOSAlert(models.Model):
         null=True,
         help_text="DEPRECATED: Use location_data.display_name instead"
     )
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
     sos_type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='panic')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='reported')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='critical')
@@ -184,6 +233,8 @@ class SOSAlert(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)  # NEW: Track completion time
     resolved_at = models.DateTimeField(null=True, blank=True)  # Legacy field
 
+    objects = LocationQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['event', 'status']),
@@ -196,6 +247,7 @@ class SOSAlert(models.Model):
             self.latitude = self.location_data.get('lat')
             self.longitude = self.location_data.get('lng')
             self.location_name = self.location_data.get('display_name', '')
+        self.geohash = compute_geohash(self.latitude, self.longitude)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -4,10 +4,14 @@ Monitoring Views for SOS Dispatch System
 Provides real-time metrics and health status endpoints
 """
 
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
 from .metrics import sos_metrics
+from .writebehind import crowd_writer
+from .dispatch import sos_dispatcher
+from .geocoding import geocode_cache
 
 
 class SOSMetricsView(APIView):
@@ -19,18 +23,38 @@ class SOSMetricsView(APIView):
     - Acceptance rates and times
     - Distance of accepting volunteers
     - Fallback frequency
+    - Rolling 5m / 1h / 24h windows and a per-hour breakdown
+    
+    Query params:
+    - window: only return this rolling window (5m, 1h, 24h)
+    - event_id: scope windows and breakdown to one event
+    - hours: length of the hourly breakdown (default 24)
     """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
         """Return current SOS metrics"""
-        metrics = sos_metrics.get_metrics()
+        window = request.query_params.get('window')
+        event_id = request.query_params.get('event_id') or None
+        
+        if window and window not in sos_metrics.WINDOWS:
+            return Response(
+                {"error": f"window must be one of: {', '.join(sos_metrics.WINDOWS)}"},
+                status=400
+            )
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except (TypeError, ValueError):
+            return Response({"error": "hours must be an integer"}, status=400)
+        
+        windows = [window] if window else list(sos_metrics.WINDOWS)
         
         return Response({
             "status": "ok",
             "timestamp": str(__import__('datetime').datetime.now()),
-            "metrics": metrics,
-            "hourly_breakdown": sos_metrics.get_hourly_metrics()
+            "metrics": sos_metrics.get_metrics(),  # Lifetime totals
+            "windows": {w: sos_metrics.get_window_metrics(w, event_id) for w in windows},
+            "hourly_breakdown": sos_metrics.get_hourly_metrics(event_id=event_id, hours=hours)
         })
 
 
@@ -42,13 +66,22 @@ class SystemHealthView(APIView):
     - Dispatch system operational status
     - Alert thresholds (acceptance rate, timeout rate, conflicts)
     - Coverage insights
+    - Telemetry write-behind backpressure and SOS dispatch pipeline
+    
+    Alerts are computed on a rolling window (?window=, default
+    METRICS_ALERT_WINDOW) and can be scoped with ?event_id=.
     """
     permission_classes = [permissions.AllowAny]  # Public health check endpoint
     
     def get(self, request):
         """Return system health status with alerts"""
+        window = request.query_params.get('window')
+        if window not in sos_metrics.WINDOWS:
+            window = None
+        event_id = request.query_params.get('event_id') or None
+        
         metrics = sos_metrics.get_metrics()
-        alerts = sos_metrics.check_thresholds()  # 🚨 NEW: Get threshold-based alerts
+        alerts = sos_metrics.check_thresholds(window=window, event_id=event_id)  # 🚨 Recent performance only
         
         # Determine health based on metrics + alerts
         if metrics.get("sos_created", 0) == 0:
@@ -76,6 +109,14 @@ class SystemHealthView(APIView):
                 "timeout_rate": metrics.get("timeout_rate"),  # NEW: Timeout tracking
                 "avg_response_time_seconds": metrics.get("avg_acceptance_time_seconds")
             },
+            "recent": sos_metrics.get_window_metrics(
+                window or getattr(settings, 'METRICS_ALERT_WINDOW', '1h'), event_id
+            ),  # ⏱️ The window the alerts were judged on
             "alerts": alerts,  # 🚨 NEW: Threshold-based alerts
-            "insights": sos_metrics.get_coverage_analysis().get("insights", [])  # NEW: Actionable insights
+            "insights": sos_metrics.get_coverage_analysis().get("insights", []),  # NEW: Actionable insights
+            "telemetry": {
+                "crowd_writer": crowd_writer.stats(),  # 💾 Write-behind queue depth / drops
+                "sos_dispatch": sos_dispatcher.stats(),  # 🚨 Background dispatch pipeline
+                "geocode_cache": geocode_cache.stats()  # 🗺️ LRU / Redis hit rates, upstream calls
+            }
         })
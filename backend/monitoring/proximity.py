@@ -0,0 +1,128 @@
+"""
+Redis-Native Volunteer Proximity Search
+
+🎯 O(log N + K) candidate lookup for SOS dispatch.
+
+The consumer keeps every volunteer's live position in the
+`event:{id}:volunteers` GEO set. Dispatch asks Redis for the K closest members
+with GEOSEARCH ... BYRADIUS ... ASC COUNT, drops the busy ones using the
+`volunteers:busy` set, and only then touches the database for the K survivors.
+
+Busy Volunteer Set:
+- volunteers:busy - user ids assigned to an open incident or SOS
+- volunteers:busy:ready - sentinel; when missing the set is rebuilt from the DB
+- Kept current by the Incident / SOSAlert signals in monitoring/signals.py
+"""
+
+from django.conf import settings
+from django.db.models import Q
+from .redis_clients import redis_client
+
+BUSY_KEY = 'volunteers:busy'
+BUSY_READY_KEY = 'volunteers:busy:ready'
+
+# Statuses that keep a volunteer engaged (mirrors the dispatch exclusion rules)
+BUSY_INCIDENT_STATUSES = ['pending', 'verified', 'responding']
+BUSY_SOS_STATUSES = ['assigned', 'in_progress']
+
+# Half the earth's circumference: "anywhere" for fallback searches
+EARTH_HALF_CIRCUMFERENCE_KM = 20037
+
+
+def volunteers_key(event_id):
+    return f"event:{event_id}:volunteers"
+
+
+def busy_volunteer_filter(prefix=''):
+    """Q object matching users that are currently handling an incident or SOS."""
+    return (
+        Q(**{f'{prefix}assigned_incidents__status__in': BUSY_INCIDENT_STATUSES}) |
+        Q(**{f'{prefix}assigned_sos__status__in': BUSY_SOS_STATUSES})
+    )
+
+
+def _busy_user_ids(user_ids=None):
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    qs = User.objects.filter(busy_volunteer_filter())
+    if user_ids is not None:
+        qs = qs.filter(id__in=user_ids)
+    return set(qs.values_list('id', flat=True).distinct())
+
+
+def rebuild_busy_set():
+    """Recompute volunteers:busy from the database (self-healing after Redis restarts)."""
+    busy = _busy_user_ids()
+    ttl = getattr(settings, 'BUSY_VOLUNTEER_REBUILD_SECONDS', 300)
+
+    pipe = redis_client.pipeline()
+    pipe.delete(BUSY_KEY)
+    if busy:
+        pipe.sadd(BUSY_KEY, *busy)
+    pipe.set(BUSY_READY_KEY, 1, ex=ttl)
+    pipe.execute()
+    return busy
+
+
+def ensure_busy_set():
+    if not redis_client.exists(BUSY_READY_KEY):
+        rebuild_busy_set()
+
+
+def refresh_busy(user_ids):
+    """Re-evaluate busy status for specific volunteers after an assignment change."""
+    user_ids = {int(uid) for uid in user_ids if uid}
+    if not user_ids:
+        return
+
+    busy = _busy_user_ids(user_ids)
+    pipe = redis_client.pipeline()
+    for uid in user_ids:
+        if uid in busy:
+            pipe.sadd(BUSY_KEY, uid)
+        else:
+            pipe.srem(BUSY_KEY, uid)
+    pipe.execute()
+
+
+def remove_volunteer(event_id, user_id):
+    """Drop a volunteer from an event's GEO set (unassigned / deleted responder)."""
+    redis_client.zrem(volunteers_key(event_id), str(user_id))
+
+
+def search_free_volunteers(latitude, longitude, event_id, radius_km, count):
+    """
+    Closest free volunteers within radius_km, nearest first.
+
+    Returns:
+        List of (user_id, distance_km) for at most `count` members that are
+        not in the busy set. Eligibility against the DB is left to the caller.
+    """
+    ensure_busy_set()
+
+    # Over-fetch so busy / stale members don't crowd out free ones
+    results = redis_client.geosearch(
+        volunteers_key(event_id),
+        longitude=longitude,
+        latitude=latitude,
+        radius=radius_km,
+        unit='km',
+        sort='ASC',
+        count=count * 2,
+        withdist=True,
+    )
+    if not results:
+        return []
+
+    members = [member for member, _ in results]
+    busy_flags = redis_client.smismember(BUSY_KEY, members)
+
+    free = []
+    for (member, distance_km), is_busy in zip(results, busy_flags):
+        if is_busy or not str(member).isdigit():
+            continue
+        free.append((int(member), float(distance_km)))
+        if len(free) >= count:
+            break
+    return free
@@ -0,0 +1,24 @@
+"""
+Shared Redis clients for the monitoring app.
+
+One connection pool per process instead of one connection per call site:
+- redis_client: synchronous client for views, metrics and management commands
+- async_redis_client: redis.asyncio client for the websocket consumers, so
+  telemetry never blocks the daphne event loop
+"""
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+REDIS_HOST = getattr(settings, 'REDIS_HOST', '127.0.0.1')
+REDIS_PORT = getattr(settings, 'REDIS_PORT', 6379)
+REDIS_DB = getattr(settings, 'REDIS_DB', 0)
+
+redis_client = redis.StrictRedis(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True
+)
+
+async_redis_client = aioredis.StrictRedis(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True
+)
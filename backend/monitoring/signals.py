@@ -0,0 +1,73 @@
+"""
+Model signals that keep Redis dispatch indexes in sync with the database.
+
+- Incident / SOSAlert assignment changes refresh the volunteers:busy set
+- Deleting a ResponderLocation removes the volunteer from the event GEO set
+- Individually saved CrowdLocation rows queue their point for the
+  write-behind flush, which upserts the density cells for the whole batch
+- Ticket / Incident / SOSAlert writes drop the cached dashboard stats
+"""
+
+import redis
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Incident, SOSAlert, ResponderLocation, CrowdLocation
+from . import proximity
+from .stats import invalidate_event_stats
+from .writebehind import crowd_writer
+from tickets.models import Ticket
+
+
+@receiver(pre_save, sender=Incident)
+@receiver(pre_save, sender=SOSAlert)
+def remember_previous_volunteer(sender, instance, **kwargs):
+    """Remember who was assigned before this save, so un-assignment frees them."""
+    instance._previous_volunteer_id = None
+    if instance.pk:
+        instance._previous_volunteer_id = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('assigned_volunteer_id', flat=True).first()
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=SOSAlert)
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=SOSAlert)
+def refresh_volunteer_busy_state(sender, instance, **kwargs):
+    affected = {
+        instance.assigned_volunteer_id,
+        getattr(instance, '_previous_volunteer_id', None),
+    }
+    try:
+        proximity.refresh_busy(affected)
+    except redis.RedisError as e:
+        print(f"[DISPATCH] Busy volunteer refresh failed: {e}")
+
+
+@receiver(post_delete, sender=ResponderLocation)
+def drop_volunteer_from_geo_index(sender, instance, **kwargs):
+    try:
+        proximity.remove_volunteer(instance.event_id, instance.user_id)
+    except redis.RedisError as e:
+        print(f"[DISPATCH] Volunteer GEO cleanup failed: {e}")
+
+
+@receiver(post_save, sender=CrowdLocation)
+def aggregate_crowd_density(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # Folded in by the write-behind flush, after this row has committed
+    point = (instance.event_id, instance.latitude, instance.longitude, instance.timestamp)
+    transaction.on_commit(lambda: crowd_writer.enqueue_density(*point))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=SOSAlert)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=SOSAlert)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    event_id = instance.event_id
+    transaction.on_commit(lambda: invalidate_event_stats(event_id))
@@ -0,0 +1,136 @@
+"""
+Live Telemetry Write Path
+
+⚡ One Redis round-trip per location ping.
+
+The anti-jitter compare, distance accumulation, GEOADD and DB-save throttle
+all run inside a single Lua script, so the consumer awaits one EVALSHA on the
+async client instead of issuing hget / GEOADD / expire / get / set one by one.
+
+Redis Keys:
+- event:{id}:locations - Hash of the last accepted record per user
+- event:{id}:users - GEO set of every tracked user
+- event:{id}:volunteers - GEO set of volunteers (SOS proximity search)
+- user:{id}:last_save - Timestamp of the last CrowdLocation snapshot
+"""
+
+import json
+from django.conf import settings
+from .redis_clients import async_redis_client
+
+# KEYS: 1 locations hash, 2 users GEO set, 3 volunteers GEO set, 4 last_save key
+# ARGV: 1 member, 2 lat, 3 lng, 4 now_ts, 5 now_str, 6 record json,
+#       7 jitter km, 8 GEO ttl, 9 save interval, 10 '1' if volunteer
+# Returns {0} when the ping is jitter, else {1, stored record json, save_due}
+RECORD_LOCATION_LUA = """
+local member = ARGV[1]
+local lat = tonumber(ARGV[2])
+local lng = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local record = cjson.decode(ARGV[6])
+
+local distance = 0.0
+local first_seen = ARGV[5]
+local first_seen_ts = now
+
+local prev_raw = redis.call('HGET', KEYS[1], member)
+if prev_raw then
+    local prev = cjson.decode(prev_raw)
+    local prev_lat = tonumber(prev['lat'])
+    local prev_lng = tonumber(prev['lng'])
+    if prev_lat and prev_lng then
+        local rad = math.pi / 180
+        local dlat = (lat - prev_lat) * rad
+        local dlng = (lng - prev_lng) * rad
+        local a = math.sin(dlat / 2) ^ 2
+            + math.cos(prev_lat * rad) * math.cos(lat * rad) * math.sin(dlng / 2) ^ 2
+        local moved = 2 * 6371 * math.asin(math.sqrt(a))
+        if moved < tonumber(ARGV[7]) then
+            return {0}
+        end
+        distance = (tonumber(prev['distance']) or 0) + moved
+    end
+    if type(prev['first_seen']) == 'string' then
+        first_seen = prev['first_seen']
+    end
+    first_seen_ts = tonumber(prev['first_seen_ts']) or now
+end
+
+local active = now - first_seen_ts
+local hours = math.floor(active / 3600)
+local minutes = math.floor((active % 3600) / 60)
+
+record['distance'] = math.floor(distance * 100 + 0.5) / 100
+record['first_seen'] = first_seen
+record['first_seen_ts'] = first_seen_ts
+if hours > 0 then
+    record['active_time'] = hours .. 'h ' .. minutes .. 'm'
+else
+    record['active_time'] = minutes .. 'm'
+end
+
+local encoded = cjson.encode(record)
+redis.call('HSET', KEYS[1], member, encoded)
+redis.call('GEOADD', KEYS[2], lng, lat, member)
+redis.call('EXPIRE', KEYS[2], ARGV[8])
+if ARGV[10] == '1' then
+    redis.call('GEOADD', KEYS[3], lng, lat, member)
+    redis.call('EXPIRE', KEYS[3], ARGV[8])
+end
+
+local save_due = 0
+local last_save = tonumber(redis.call('GET', KEYS[4]))
+if (not last_save) or (now - last_save) > tonumber(ARGV[9]) then
+    redis.call('SET', KEYS[4], ARGV[4])
+    save_due = 1
+end
+
+return {1, encoded, save_due}
+"""
+
+_record_location_script = async_redis_client.register_script(RECORD_LOCATION_LUA)
+
+
+async def record_location(event_id, user_id, lat, lng, now_ts, now_str, record, is_volunteer=False):
+    """
+    Atomically apply one location ping to the live telemetry state.
+
+    Args:
+        event_id: Event the socket is tracking
+        user_id: Tracked user (hash / GEO member)
+        lat, lng: New coordinates
+        now_ts: Server timestamp of the ping
+        now_str: Display time used as first_seen for new users
+        record: Static part of the broadcast record (name, role, pic, ...)
+        is_volunteer: Also index the user in the volunteers GEO set
+
+    Returns:
+        (accepted, record, save_due)
+        - accepted: False when the ping moved less than the jitter threshold
+        - record: Full stored record (distance, first_seen, active_time filled in)
+        - save_due: True when a CrowdLocation snapshot should be persisted
+    """
+    keys = [
+        f"event:{event_id}:locations",
+        f"event:{event_id}:users",
+        f"event:{event_id}:volunteers",
+        f"user:{user_id}:last_save",
+    ]
+    args = [
+        str(user_id),
+        lat,
+        lng,
+        now_ts,
+        now_str,
+        json.dumps(record),
+        getattr(settings, 'TELEMETRY_JITTER_KM', 0.003),
+        getattr(settings, 'TELEMETRY_GEO_TTL_SECONDS', 60),
+        getattr(settings, 'TELEMETRY_SAVE_INTERVAL_SECONDS', 60),
+        '1' if is_volunteer else '0',
+    ]
+
+    result = await _record_location_script(keys=keys, args=args)
+    if not result or int(result[0]) == 0:
+        return False, None, False
+
+    return True, json.loads(result[1]), bool(int(result[2]))
@@ -0,0 +1,355 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import force_authenticate
+from events.models import Event
+from .countries import infer_country
+from .density import density_tiles, record_points
+from .flow import parse_minutes
+from .gazetteer import Gazetteer
+from .location_views import LocationViewSet
+from .geocoding import UNKNOWN_LOCATION
+from .locations import ISO_COUNTRIES
+from .models import CrowdDensityCell, CrowdLocation
+from .utils import _nominatim_lookup, generate_location_id, reverse_geocode
+from .writebehind import crowd_writer
+
+
+def _square(min_lng, min_lat, max_lng, max_lat):
+    return [[[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]]
+
+
+FIXTURE = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"name": "Ward 5", "city": "Kathmandu", "country": "Nepal"},
+            "geometry": {"type": "Polygon", "coordinates": _square(85.30, 27.70, 85.32, 27.72)},
+        },
+        {
+            # Nested inside Ward 5: the smaller polygon must win
+            "type": "Feature",
+            "properties": {"name": "Thamel", "city": "Kathmandu", "country": "Nepal"},
+            "geometry": {"type": "Polygon", "coordinates": _square(85.305, 27.705, 85.31, 27.71)},
+        },
+        {
+            "type": "Feature",
+            "properties": {"name": "Kirtipur", "country": "Nepal"},
+            "geometry": {"type": "Point", "coordinates": [85.2775, 27.6787]},
+        },
+    ],
+}
+
+
+class GazetteerTests(SimpleTestCase):
+    """📍 Offline reverse geocoding against a small in-memory fixture."""
+
+    def setUp(self):
+        self.gazetteer = Gazetteer.from_geojson(FIXTURE, max_distance_km=1.0)
+
+    def test_polygon_hit(self):
+        self.assertEqual(self.gazetteer.lookup(27.715, 85.315)['name'], 'Ward 5')
+        self.assertEqual(self.gazetteer.display_name(27.715, 85.315), 'Ward 5, Kathmandu, Nepal')
+
+    def test_smallest_polygon_wins(self):
+        self.assertEqual(self.gazetteer.lookup(27.707, 85.307)['name'], 'Thamel')
+
+    def test_nearest_point_hit(self):
+        # ~300 m from the Kirtipur point, outside every polygon
+        self.assertEqual(self.gazetteer.display_name(27.681, 85.279), 'Kirtipur, Kirtipur, Nepal')
+
+    def test_miss(self):
+        self.assertIsNone(self.gazetteer.lookup(27.60, 85.20))
+        self.assertIsNone(self.gazetteer.display_name(27.60, 85.20))
+
+    def test_display_name_feeds_location_id(self):
+        name = self.gazetteer.display_name(27.715, 85.315)
+        self.assertEqual(generate_location_id('NP', name), 'NP-KAT-05')
+
+
+class ReverseGeocodeTests(SimpleTestCase):
+    """🌐 The gazetteer answers before any network call."""
+
+    def setUp(self):
+        patcher = mock.patch('monitoring.utils.get_gazetteer', return_value=Gazetteer.from_geojson(FIXTURE))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(GEOCODE_HTTP_FALLBACK=True)
+    def test_gazetteer_hit_skips_http(self):
+        with mock.patch('monitoring.utils.requests.get') as http_get:
+            self.assertEqual(reverse_geocode(27.707, 85.307), 'Thamel, Kathmandu, Nepal')
+        http_get.assert_not_called()
+
+    @override_settings(GEOCODE_HTTP_FALLBACK=False)
+    def test_miss_without_fallback_skips_http(self):
+        with mock.patch('monitoring.utils.requests.get') as http_get:
+            self.assertEqual(reverse_geocode(27.60, 85.20), UNKNOWN_LOCATION)
+        http_get.assert_not_called()
+
+
+class NominatimLookupTests(SimpleTestCase):
+    """🌐 The Nominatim fallback names places in the gazetteer's layout."""
+
+    def lookup(self, address):
+        with mock.patch('monitoring.utils.requests.get') as http_get:
+            http_get.return_value.json.return_value = {'address': address}
+            return _nominatim_lookup(27.715, 85.315)
+
+    def test_ward_city_country(self):
+        name = self.lookup({'suburb': 'Ward 5', 'city': 'Kathmandu', 'country': 'Nepal'})
+        self.assertEqual(name, 'Ward 5, Kathmandu, Nepal')
+        self.assertEqual(generate_location_id('NP', name), 'NP-KAT-05')
+
+    def test_city_falls_back_to_ward(self):
+        self.assertEqual(self.lookup({'suburb': 'Thamel', 'country': 'Nepal'}), 'Thamel, Thamel, Nepal')
+
+    def test_ward_falls_back_to_city(self):
+        self.assertEqual(self.lookup({'town': 'Kirtipur', 'country': 'Nepal'}), 'Kirtipur, Kirtipur, Nepal')
+
+
+# Nepali towns within a few km of the border, and their neighbours across it
+NEPAL_BORDER_TOWNS = {
+    'Mahendranagar': (28.9636, 80.1778),
+    'Dhangadhi': (28.6940, 80.5930),
+    'Tikapur': (28.5253, 81.1230),
+    'Gulariya': (28.2310, 81.3450),
+    'Nepalgunj': (28.0500, 81.6200),
+    'Krishnanagar': (27.5640, 83.0300),
+    'Bhairahawa': (27.5047, 83.4506),
+    'Birgunj': (27.0123, 84.8773),
+    'Kalaiya': (27.0330, 85.0000),
+    'Gaur': (26.7700, 85.2700),
+    'Malangwa': (26.8566, 85.5582),
+    'Jaleshwar': (26.6486, 85.8004),
+    'Janakpur': (26.7288, 85.9263),
+    'Siraha': (26.6540, 86.2110),
+    'Rajbiraj': (26.5397, 86.7460),
+    'Biratnagar': (26.4525, 87.2718),
+    'Bhadrapur': (26.5446, 88.0944),
+    'Kakarbhitta': (26.6500, 88.1500),
+    'Darchula': (29.8460, 80.5430),
+    'Simikot': (29.9694, 81.8311),
+    'Lo Manthang': (29.1833, 83.9600),
+}
+
+ACROSS_THE_BORDER = {
+    'Lucknow': ((26.8467, 80.9462), 'IN'),
+    'Bahraich': ((27.5743, 81.5960), 'IN'),
+    'Gorakhpur': ((26.7606, 83.3732), 'IN'),
+    'Sitamarhi': ((26.5952, 85.4808), 'IN'),
+    'Siliguri': ((26.7271, 88.3953), 'IN'),
+    'Darjeeling': ((27.0410, 88.2663), 'IN'),
+    'Pithoragarh': ((29.5829, 80.2182), 'IN'),
+    'Shigatse': ((29.2670, 88.8800), 'CN'),
+}
+
+
+# Major, coastal, island and border cities of every supported country
+MAJOR_CITIES = {
+    'NP': {'Kathmandu': (27.7172, 85.3240), 'Pokhara': (28.2096, 83.9856)},
+    'IN': {
+        'Delhi': (28.6139, 77.2090), 'Mumbai': (19.0760, 72.8777), 'Kolkata': (22.5726, 88.3639),
+        'Chennai': (13.0827, 80.2707), 'Kochi': (9.9312, 76.2673), 'Amritsar': (31.6340, 74.8723),
+        'Srinagar': (34.0837, 74.7973), 'Agartala': (23.8315, 91.2868), 'Gangtok': (27.3314, 88.6138),
+        'Port Blair': (11.6234, 92.7265), 'Kanyakumari': (8.0883, 77.5385),
+    },
+    'BD': {
+        'Dhaka': (23.8103, 90.4125), 'Chittagong': (22.3569, 91.7832), 'Sylhet': (24.8949, 91.8687),
+        'Rajshahi': (24.3745, 88.6042), 'Rangpur': (25.7439, 89.2752), "Cox's Bazar": (21.4272, 92.0058),
+    },
+    'PK': {
+        'Karachi': (24.8607, 67.0011), 'Lahore': (31.5204, 74.3587), 'Islamabad': (33.6844, 73.0479),
+        'Sialkot': (32.4945, 74.5229), 'Gilgit': (35.9208, 74.3089), 'Gwadar': (25.1216, 62.3254),
+    },
+    'CN': {
+        'Beijing': (39.9042, 116.4074), 'Shanghai': (31.2304, 121.4737), 'Shenzhen': (22.5431, 114.0579),
+        'Lhasa': (29.6520, 91.1721), 'Kashgar': (39.4704, 75.9898), 'Dalian': (38.9140, 121.6147),
+        'Haikou': (20.0440, 110.1999), 'Sanya': (18.2528, 109.5119),
+    },
+    'US': {
+        'New York': (40.7128, -74.0060), 'Los Angeles': (34.0522, -118.2437), 'Miami': (25.7617, -80.1918),
+        'Key West': (24.5551, -81.7800), 'El Paso': (31.7619, -106.4850), 'San Diego': (32.7157, -117.1611),
+        'Brownsville': (25.9017, -97.4975), 'Detroit': (42.3314, -83.0458), 'Atlantic City': (39.3643, -74.4229),
+        'Anchorage': (61.2181, -149.9003), 'Nome': (64.5011, -165.4064), 'Honolulu': (21.3069, -157.8583),
+    },
+    'CA': {
+        'Toronto': (43.6532, -79.3832), 'Montreal': (45.5017, -73.5673), 'Vancouver': (49.2827, -123.1207),
+        'Victoria': (48.4284, -123.3656), 'Windsor': (42.2800, -83.0000), 'Halifax': (44.6488, -63.5752),
+        'Sydney NS': (46.1368, -60.1942), "St. John's": (47.5615, -52.7126), 'Prince Rupert': (54.3150, -130.3208),
+        'Iqaluit': (63.7467, -68.5170),
+    },
+    'GB': {
+        'London': (51.5074, -0.1278), 'Brighton': (50.8225, -0.1372), 'Dover': (51.1279, 1.3134),
+        'Penzance': (50.1188, -5.5371), 'Edinburgh': (55.9533, -3.1883), 'Belfast': (54.5973, -5.9301),
+        'Derry': (54.9966, -7.3086), 'Kirkwall': (58.9810, -2.9600), 'Stornoway': (58.2090, -6.3880),
+        'Lerwick': (60.1550, -1.1450),
+    },
+    'FR': {
+        'Paris': (48.8566, 2.3522), 'Marseille': (43.2965, 5.3698), 'Strasbourg': (48.5734, 7.7521),
+        'Lille': (50.6292, 3.0573), 'Calais': (50.9513, 1.8587), 'Le Havre': (49.4944, 0.1079),
+        'Cherbourg': (49.6337, -1.6222), 'Brest': (48.3904, -4.4861), 'Ajaccio': (41.9192, 8.7386),
+    },
+    'DE': {
+        'Berlin': (52.5200, 13.4050), 'Munich': (48.1351, 11.5820), 'Hamburg': (53.5511, 9.9937),
+        'Saarbrucken': (49.2402, 6.9969), 'Freiburg': (47.9990, 7.8421), 'Aachen': (50.7753, 6.0839),
+        'Passau': (48.5665, 13.4312), 'Gorlitz': (51.1525, 14.9873), 'Flensburg': (54.7937, 9.4470),
+        'Sylt (Westerland)': (54.9079, 8.3075), 'Rugen (Bergen)': (54.4170, 13.4330),
+    },
+    'JP': {
+        'Tokyo': (35.6762, 139.6503), 'Osaka': (34.6937, 135.5023), 'Sapporo': (43.0618, 141.3545),
+        'Fukuoka': (33.5902, 130.4017), 'Nagasaki': (32.7503, 129.8779), 'Naha': (26.2124, 127.6792),
+        'Ishigaki': (24.3448, 124.1572),
+    },
+    'AU': {
+        'Sydney': (-33.8688, 151.2093), 'Melbourne': (-37.8136, 144.9631), 'Brisbane': (-27.4698, 153.0251),
+        'Perth': (-31.9505, 115.8605), 'Darwin': (-12.4634, 130.8456), 'Hobart': (-42.8821, 147.3272),
+        'Newcastle': (-32.9283, 151.7817), 'Mackay': (-21.1411, 149.1861), 'Cairns': (-16.9186, 145.7781),
+    },
+    'BR': {
+        'Sao Paulo': (-23.5505, -46.6333), 'Rio de Janeiro': (-22.9068, -43.1729), 'Salvador': (-12.9777, -38.5016),
+        'Recife': (-8.0476, -34.8770), 'Natal': (-5.7945, -35.2110), 'Florianopolis': (-27.5954, -48.5480),
+        'Manaus': (-3.1190, -60.0217), 'Foz do Iguacu': (-25.5163, -54.5854), 'Corumba': (-19.0089, -57.6531),
+    },
+    'ZA': {
+        'Johannesburg': (-26.2041, 28.0473), 'Cape Town': (-33.9249, 18.4241), 'Durban': (-29.8587, 31.0218),
+        'East London': (-33.0153, 27.9116), 'Richards Bay': (-28.7830, 32.0377), 'Mossel Bay': (-34.1831, 22.1460),
+        'Cape Agulhas': (-34.8300, 20.0100), 'Nelspruit': (-25.4658, 30.9853),
+    },
+}
+
+# Cities next to a supported country that must not be claimed by it
+OUTSIDE_SUPPORTED_COUNTRIES = {
+    'Tijuana': (32.5149, -117.0382), 'Mexicali': (32.6245, -115.4523), 'Ciudad Juarez': (31.6904, -106.4245),
+    'Matamoros': (25.8690, -97.5027), 'Dublin': (53.3498, -6.2603), 'Isle of Man': (54.1523, -4.4861),
+    'Jersey': (49.2144, -2.1312), 'Basel': (47.5596, 7.5886), 'Luxembourg': (49.6116, 6.1319),
+    'Salzburg': (47.8095, 13.0550), 'Szczecin': (53.4285, 14.5528), 'Thimphu': (27.4728, 89.6390),
+    'Colombo': (6.9271, 79.8612), 'Kabul': (34.5553, 69.2075), 'Hong Kong': (22.3193, 114.1694),
+    'Taipei': (25.0330, 121.5654), 'Busan': (35.1796, 129.0756), 'Mbabane': (-26.3054, 31.1367),
+    'Maseru': (-29.3151, 27.4869), 'Maputo': (-25.9692, 32.5732), 'Ciudad del Este': (-25.5100, -54.6400),
+    'Montevideo': (-34.9011, -56.1645), 'Havana': (23.1136, -82.3666), 'Saint-Pierre': (46.7811, -56.1764),
+}
+
+
+class CountryBoundaryTests(SimpleTestCase):
+    """🌍 The shipped boundaries put cities, coasts and border towns in the right country."""
+
+    def test_major_cities(self):
+        self.assertEqual(set(MAJOR_CITIES), set(ISO_COUNTRIES))
+        for code, cities in MAJOR_CITIES.items():
+            for city, (lat, lng) in cities.items():
+                with self.subTest(city=city):
+                    self.assertEqual(infer_country(lat, lng), code)
+
+    def test_cities_outside_supported_countries(self):
+        for city, (lat, lng) in OUTSIDE_SUPPORTED_COUNTRIES.items():
+            with self.subTest(city=city):
+                self.assertIsNone(infer_country(lat, lng))
+
+    def test_nepal_border_towns(self):
+        for town, (lat, lng) in NEPAL_BORDER_TOWNS.items():
+            with self.subTest(town=town):
+                self.assertEqual(infer_country(lat, lng), 'NP')
+
+    def test_neighbouring_towns(self):
+        for town, ((lat, lng), code) in ACROSS_THE_BORDER.items():
+            with self.subTest(town=town):
+                self.assertEqual(infer_country(lat, lng), code)
+
+
+class ParseMinutesTests(SimpleTestCase):
+    """🌊 Crowd flow windows: minutes or hours, nothing that can overflow."""
+
+    def test_valid(self):
+        self.assertEqual(parse_minutes(None, 15), 15)
+        self.assertEqual(parse_minutes('20', 15), 20)
+        self.assertEqual(parse_minutes('20m', 15), 20)
+        self.assertEqual(parse_minutes('1.5h', 15), 90)
+
+    def test_rejected(self):
+        for value in ('inf', 'nan', '1e400', '9' * 400, '-5', '5d', 'h'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_minutes(value, 15)
+
+
+LOCATION = {
+    "country_code": "NP", "country_name": "Nepal", "location_id": "NP-KTM-05",
+    "display_name": "Ward 5, Kathmandu", "lat": 27.7172, "lng": 85.3240,
+}
+
+
+@override_settings(LOCATION_BATCH_CHUNK_SIZE=100)
+class BatchValidateStreamingTests(SimpleTestCase):
+    """⚡ Under ASGI, batch results go out while the request body is still being read."""
+
+    async def _stream(self, body, content_type):
+        body_file = io.BytesIO(body)
+        request = ASGIRequest({
+            'type': 'http', 'method': 'POST', 'path': '/api/monitoring/locations/batch_validate/',
+            'query_string': b'', 'server': ('testserver', 80),
+            'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())],
+        }, body_file)
+        force_authenticate(request, user=get_user_model()(email='bulk@example.com'))
+        response = LocationViewSet.as_view({'post': 'batch_validate'})(request)
+        self.assertTrue(response.is_async)
+
+        chunks = []
+        read_at_first_chunk = None
+        async for chunk in response.streaming_content:
+            if read_at_first_chunk is None:
+                read_at_first_chunk = body_file.tell()
+            chunks.append(chunk)
+        self.assertLess(read_at_first_chunk, len(body) // 2)
+        return b''.join(chunks).decode()
+
+    async def test_ndjson(self):
+        body = ''.join(json.dumps(LOCATION) + '\n' for _ in range(2000)).encode()
+        lines = (await self._stream(body, 'application/x-ndjson')).splitlines()
+        self.assertEqual(json.loads(lines[-1])['summary']['total'], 2000)
+
+    async def test_json_array(self):
+        body = json.dumps({"locations": [LOCATION] * 2000}).encode()
+        result = json.loads(await self._stream(body, 'application/json'))
+        self.assertEqual(result['summary']['total'], 2000)
+        self.assertEqual(len(result['results']), 2000)
+
+
+class CrowdDensityTests(TestCase):
+    """🔥 Density cells are upserted per flush, adding to what is already there."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        organizer = get_user_model().objects.create_user(email='organizer@example.com', password='x', full_name='Organizer')
+        cls.event = Event.objects.create(
+            name='Derby', latitude=27.7, longitude=85.3, venue_address='Dasharath Stadium',
+            start_datetime=now, end_datetime=now + timedelta(hours=3), capacity=100, organizer=organizer,
+        )
+
+    def test_record_points_adds_to_existing_cells(self):
+        now = timezone.now()
+        points = [(self.event.id, 27.7 + i * 0.001, 85.3 + i * 0.001, now) for i in range(200)]
+        record_points(points)
+        with CaptureQueriesContext(connection) as queries:
+            cells = record_points(points)
+        self.assertLessEqual(len(queries), 3)  # savepoint + one INSERT + release
+        self.assertEqual(CrowdDensityCell.objects.filter(event=self.event).count(), cells)
+        for precision in (5, 6, 7):
+            _, tiles = density_tiles(self.event.id, precision=precision)
+            self.assertEqual(sum(tile['count'] for tile in tiles), 400)
+
+    def test_single_save_is_aggregated_by_the_writer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CrowdLocation.objects.create(event=self.event, latitude=27.7, longitude=85.3)
+        self.assertFalse(CrowdDensityCell.objects.filter(event=self.event).exists())
+        crowd_writer.flush()
+        self.assertEqual(CrowdDensityCell.objects.filter(event=self.event, precision=7).get().count, 1)
@@ -3,9 +3,10 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     IncidentViewSet, SOSAlertViewSet, SafetyAlertViewSet, ResponderLocationViewSet, EventOverviewView,
     IncidentLogViewSet, SOSLogViewSet, CurrentLocationsView, DashboardStatsView, HeatmapView,
-    ReverseGeocodeView, CrowdMovementPatternsView, NotificationViewSet
+    ReverseGeocodeView, CrowdMovementPatternsView, CrowdDensityTilesView, NotificationViewSet
 )
 from .monitoring_views import SOSMetricsView, SystemHealthView
+from .location_views import LocationViewSet
 
 router = DefaultRouter()
 router.register(r'incidents', IncidentViewSet)
@@ -15,6 +16,7 @@ router.register(r'responders', ResponderLocationViewSet)
 router.register(r'incident-logs', IncidentLogViewSet)
 router.register(r'sos-logs', SOSLogViewSet)
 router.register(r'notifications', NotificationViewSet)
+router.register(r'locations', LocationViewSet, basename='locations')
 
 urlpatterns = [
     path('overview/<int:event_id>/', EventOverviewView.as_view(), name='event-overview'),
@@ -22,6 +24,7 @@ urlpatterns = [
     path('stats/<int:event_id>/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('heatmap/<int:event_id>/', HeatmapView.as_view(), name='heatmap-data'),
     path('movement-patterns/<int:event_id>/', CrowdMovementPatternsView.as_view(), name='movement-patterns'),
+    path('heatmap-tiles/<int:event_id>/', CrowdDensityTilesView.as_view(), name='heatmap-tiles'),
     path('reverse-geocode/', ReverseGeocodeView.as_view(), name='reverse-geocode'),
     path('metrics/sos/', SOSMetricsView.as_view(), name='sos-metrics'),
     path('health/', SystemHealthView.as_view(), name='system-health'),
@@ -1,7 +1,11 @@
 import requests
+from django.conf import settings
 from django.utils import timezone
 from .models import IncidentLog, SOSLog
 from monitoring.locations import LocationSchema, CoordinateValidator, CountryValidator, LocationIDValidator
+from .geocoding import geocode_cache, UNKNOWN_LOCATION
+from .gazetteer import get_gazetteer
+from .countries import get_country_index, infer_country
 
 def log_incident_action(incident, action_type, performed_by=None, previous_status=None, new_status=None, notes=None):
     return IncidentLog.objects.create(
@@ -23,82 +27,87 @@ def log_sos_action(sos_alert, action_type, performed_by=None, previous_status=No
         notes=notes
     )
 
-# In-memory cache for geocoding to prevent hitting rate limits
-GEOCACHE = {}  # Clear cache on every restart
-
 def reverse_geocode(lat, lon):
     """
     Converts GPS coordinates (lat, lon) into a human-readable location name
     using OpenStreetMap (Nominatim).
-    Returns format: "City-Ward, Country" in English
+    Returns format: "Ward, City, Country" in English (the city is the ward
+    itself when the place has none)
+    
+    📍 The offline gazetteer (see gazetteer.py) answers first, so venues with
+    bad connectivity never wait on the network. On a miss, and only if
+    GEOCODE_HTTP_FALLBACK is on, Nominatim is asked through the shared
+    two-tier geocode cache (see geocoding.py).
     """
     if lat is None or lon is None:
-        return "Unknown Location"
-        
-    # Round to 4 decimal places (~11m precision) for cache hits
-    cache_key = (round(float(lat), 4), round(float(lon), 4))
-    if cache_key in GEOCACHE:
-        cached = GEOCACHE[cache_key]
-        print(f"[GEOCODE] Cache hit for ({lat}, {lon}): {cached}")
-        return cached
-        
+        return UNKNOWN_LOCATION
+    
     try:
-        url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=18&addressdetails=1&accept-language=en"
-        headers = {
-            'User-Agent': 'OwlEyeApp/1.0 (support@owleye.com)'
-        }
-        response = requests.get(url, headers=headers, timeout=5)
-        data = response.json()
-        
-        print(f"[GEOCODE] API response address: {data.get('address', {})}")
-        
-        if 'address' in data:
-            addr = data.get('address', {})
-            
-            country = addr.get('country', 'Nepal')
-            print(f"[GEOCODE] Country: {country}")
-            
-            # Try to extract English names (Nominatim with accept-language=en)
-            # Look for ward/suburb/neighbourhood first (most specific)
-            ward = addr.get('suburb') or addr.get('neighbourhood') or addr.get('city_district')
-            
-            # Then city/town/village
-            city = addr.get('city') or addr.get('town') or addr.get('village')
-            
-            print(f"[GEOCODE] Ward: {ward}, City: {city}")
-            
-            # Pick the best location name
-            location_part = ward or city or "Unknown"
-            
-            # Strip everything after and including the country name (in case it's included)
-            # This handles cases where Nominatim returns "Ward, Nepal" or "City, Nepal"
-            location_clean = location_part
-            
-            for pattern in [f", {country}", f",{country}"]:
-                if location_clean.endswith(pattern):
-                    location_clean = location_clean[:-len(pattern)].strip()
-                    break
-            
-            # Also remove any trailing commas
-            location_clean = location_clean.rstrip(',').strip()
-            
-            result = f"{location_clean}, {country}"
-            
-            print(f"[GEOCODE] Final result: {result}")
-            GEOCACHE[cache_key] = result
-            return result
-            
-        return "Unknown Location"
-    except Exception as e:
+        offline_name = get_gazetteer().display_name(lat, lon)
+        if offline_name:
+            return offline_name
+        if not getattr(settings, 'GEOCODE_HTTP_FALLBACK', True):
+            return UNKNOWN_LOCATION
+        return geocode_cache.get_or_fetch(lat, lon, _nominatim_lookup)
+    except (TypeError, ValueError) as e:
         print(f"[GEOCODE] Error: {e}")
-        return "Unknown Location"
+        return UNKNOWN_LOCATION
+
+
+def _nominatim_lookup(lat, lon):
+    """Single upstream Nominatim call. Raises on network / HTTP errors so they aren't cached."""
+    url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=18&addressdetails=1&accept-language=en"
+    headers = {
+        'User-Agent': 'OwlEyeApp/1.0 (support@owleye.com)'
+    }
+    response = requests.get(url, headers=headers, timeout=5)
+    response.raise_for_status()
+    data = response.json()
+    
+    print(f"[GEOCODE] API response address: {data.get('address', {})}")
+    
+    if 'address' not in data:
+        return UNKNOWN_LOCATION
+    
+    addr = data.get('address', {})
+    
+    country = addr.get('country', 'Nepal')
+    
+    # Try to extract English names (Nominatim with accept-language=en)
+    # Look for ward/suburb/neighbourhood first (most specific)
+    ward = addr.get('suburb') or addr.get('neighbourhood') or addr.get('city_district')
+    
+    # Then city/town/village
+    city = addr.get('city') or addr.get('town') or addr.get('village')
+    
+    # Same "Ward, City, Country" layout as the gazetteer, so generate_location_id()
+    # reads the city from the same slot whichever source answered
+    ward = _clean_place_name(ward or city, country) or "Unknown"
+    city = _clean_place_name(city, country) or ward
+    
+    result = f"{ward}, {city}, {country}"
+    
+    print(f"[GEOCODE] Final result: {result}")
+    return result
+
+
+def _clean_place_name(name, country):
+    """Strip a trailing ", Country" (Nominatim sometimes includes it) and stray commas."""
+    if not name:
+        return None
+    for pattern in [f", {country}", f",{country}"]:
+        if name.endswith(pattern):
+            name = name[:-len(pattern)].strip()
+            break
+    return name.rstrip(',').strip() or None
 
 
 def infer_country_code(lat, lng):
     """
     Infer country code from coordinates.
     
-    Currently supports Nepal (26.0 to 30.5 lat, 80.0 to 88.2 lng).
+    🌍 Point-in-polygon against the shared country boundary index
+    (see countries.py), covering every country in ISO_COUNTRIES.
     Falls back to None if country cannot be determined.
     
     Args:
@@ -108,33 +117,27 @@ def infer_country_code(lat, lng):
     Returns:
         Country code (e.g., "NP") or None
     """
-    lat = float(lat)
-    lng = float(lng)
-    
-    # Nepal bounds: 26.0°N to 30.5°N latitude, 80.0°E to 88.2°E longitude
-    if 26.0 <= lat <= 30.5 and 80.0 <= lng <= 88.2:
-        return "NP"
-    
-    # Add more countries as needed
-    # if ...: return "IN"
-    # if ...: return "BD"
-    
-    return None
+    return infer_country(lat, lng)
 
 
-def generate_location_id(country_code, display_name):
+def generate_location_id(country_code, display_name, lat=None, lng=None):
     """
     Generate hierarchical location_id from country code and display name.
     
     Format: CC-STATE-WARD (e.g., NP-KTM-05)
     
     Args:
-        country_code: ISO country code (e.g., "NP")
+        country_code: ISO country code (e.g., "NP"); inferred from lat/lng
+            via the country index when missing
         display_name: Human-readable location (e.g., "Tinkune, Kathmandu")
+        lat, lng: Optional coordinates
         
     Returns:
         location_id string
     """
+    if not country_code and lat is not None and lng is not None:
+        country_code = infer_country(lat, lng)
+    
     if not country_code or not display_name:
         return country_code or "XX"
     
@@ -204,7 +207,7 @@ def enrich_location(lat, lng, gps_accuracy=None):
     if not country_code:
         raise Exception(
             f"Location ({lat}, {lng}) is outside supported regions. "
-            "Currently only Nepal (NP) is supported."
+            f"Supported countries: {', '.join(sorted(get_country_index().codes))}."
         )
     
     # 3. Get country name
@@ -217,7 +220,7 @@ def enrich_location(lat, lng, gps_accuracy=None):
     display_name = reverse_geocode(lat, lng)
     
     # 5. Generate hierarchical location_id
-    location_id = generate_location_id(country_code, display_name)
+    location_id = generate_location_id(country_code, display_name, lat, lng)
     
     # 6. Validate location_id format
     try:
@@ -268,21 +271,7 @@ def send_notification(user, title, message, notification_type, event=None, prior
             group = f"user_{user.id}"
             
             # ✅ CRITICAL FIX: Include full metadata (user_name, sender info, etc.)
-            broadcast_payload = {
-                'type': 'entity_broadcast',
-                'entity_type': 'notification',
-                'id': notif.id,
-                'title': notif.title,
-                'message': notif.message,
-                'notification_type': notif.notification_type,
-                'priority': notif.priority,
-                'src_type': notif.entity_type,
-                'src_id': notif.entity_id,
-                'created_at': notif.created_at.strftime("%I:%M %p"),
-                'is_read': notif.is_read,
-                'user_id': user.id,
-                'user_name': user.full_name or user.username,  # ✅ Include sender name
-            }
+            broadcast_payload = _notification_payload(notif, user)
             
             async_to_sync(channel_layer.group_send)(group, broadcast_payload)
             
@@ -294,6 +283,123 @@ def send_notification(user, title, message, notification_type, event=None, prior
 
     return notif
 
+
+def _notification_payload(notif, user):
+    return {
+        'type': 'entity_broadcast',
+        'entity_type': 'notification',
+        'id': notif.id,
+        'title': notif.title,
+        'message': notif.message,
+        'notification_type': notif.notification_type,
+        'priority': notif.priority,
+        'src_type': notif.entity_type,
+        'src_id': notif.entity_id,
+        'created_at': notif.created_at.strftime("%I:%M %p"),
+        'is_read': notif.is_read,
+        'user_id': user.id,
+        'user_name': user.full_name or user.username,
+    }
+
+
+def send_notifications_bulk(users, title, message, notification_type, event=None, priority='normal', entity_type=None, entity_id=None, role_groups=None):
+    """
+    Fan the same notification out to many users with a constant number of round-trips.
+
+    - One bulk_create for all Notification rows
+    - One publish per role group in `role_groups` (e.g. ['role_organizer', 'role_admin'])
+      carrying every recipient's payload; each socket picks out its own entry.
+      Recipients whose role group isn't listed get per-user sends, pipelined in one batch.
+    - One UPDATE stamping delivered_at
+
+    Args:
+        users: Iterable of recipients
+        message: A string, or a callable(user) -> str for per-recipient text
+        role_groups: Role groups that together cover the recipients (optional)
+
+    Returns:
+        List of created Notification objects
+    """
+    from .models import Notification
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+    from django.db import connection
+    import asyncio
+
+    users = list(users)
+    if not users:
+        return []
+
+    # 1. Create all DB records at once
+    started = timezone.now()
+    notifs = Notification.objects.bulk_create([
+        Notification(
+            user=user,
+            event=event,
+            title=title,
+            message=message(user) if callable(message) else message,
+            notification_type=notification_type,
+            priority=priority,
+            entity_type=entity_type,
+            entity_id=entity_id
+        )
+        for user in users
+    ])
+
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # MySQL doesn't hand back primary keys from bulk inserts: re-read them in one query
+        latest = {}
+        for notif in Notification.objects.filter(
+            user__in=users,
+            title=title,
+            notification_type=notification_type,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            created_at__gte=started,
+            delivered_at__isnull=True
+        ).order_by('id'):
+            latest[notif.user_id] = notif
+        notifs = [latest[user.id] for user in users if user.id in latest]
+
+    users_by_id = {user.id: user for user in users}
+
+    # 2. Broadcast: one publish per role group + pipelined per-user sends for the rest
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer:
+            role_groups = set(role_groups or [])
+            by_group = {}
+            direct = []
+            for notif in notifs:
+                user = users_by_id[notif.user_id]
+                payload = _notification_payload(notif, user)
+                group = f"role_{getattr(user, 'role', None)}"
+                if group in role_groups:
+                    by_group.setdefault(group, {})[str(user.id)] = payload
+                else:
+                    direct.append((f"user_{user.id}", payload))
+
+            async def publish():
+                await asyncio.gather(
+                    *[
+                        channel_layer.group_send(group, {
+                            'type': 'notification_batch',
+                            'notifications': payloads,
+                        })
+                        for group, payloads in by_group.items()
+                    ],
+                    *[channel_layer.group_send(group, payload) for group, payload in direct]
+                )
+
+            async_to_sync(publish)()
+
+            # Reliable messaging delivery stamp
+            Notification.objects.filter(id__in=[n.id for n in notifs]).update(delivered_at=timezone.now())
+    except Exception as e:
+        print(f"WS Bulk broadcast failed for notifications: {e}")
+
+    return notifs
+
 def push_group_notification(group_name, title, message, notification_type='broadcast', priority='normal'):
     """
     Rapid-fires an alert into an entire Websocket Group (e.g., 'event_12' or 'role_organizer')
@@ -3,7 +3,10 @@ import json
 import logging
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
 from rest_framework import viewsets, permissions, views
 from rest_framework.response import Response
 from .models import Incident, SOSAlert, SafetyAlert, ResponderLocation, IncidentLog, SOSLog, Notification
@@ -12,8 +15,11 @@ from .serializers import (
     ResponderLocationSerializer, IncidentLogSerializer, SOSLogSerializer,
     NotificationSerializer
 )
-from .utils import log_incident_action, log_sos_action, reverse_geocode, send_notification
+from .utils import log_incident_action, log_sos_action, reverse_geocode, send_notification, send_notifications_bulk
 from .metrics import sos_metrics
+from .stats import get_event_stats, live_user_count
+from .geo import haversine, haversine_many, k_nearest
+from .dispatch import sos_dispatcher
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from tickets.models import Ticket
@@ -23,6 +29,9 @@ from events.models import Event
 # Configure logging for SOS dispatch
 logger = logging.getLogger('owl_eye.dispatch')
 
+# Websocket groups every organizer/admin socket joins (bulk staff notifications)
+STAFF_ROLE_GROUPS = ['role_organizer', 'role_admin']
+
 class ReverseGeocodeView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -36,110 +45,158 @@ class ReverseGeocodeView(views.APIView):
         return Response({"location_name": name})
 
 class EventOverviewView(views.APIView):
+    """Event headline numbers; cached per event (see stats.py)."""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, event_id):
-        scanned_tickets = Ticket.objects.filter(event_id=event_id, status='scanned').count()
-        total_tickets = Ticket.objects.filter(event_id=event_id).count()
-        
-        unique_attendees = Ticket.objects.filter(event_id=event_id).values_list('user_id', flat=True).distinct().count()
-        
-        active_volunteers = ResponderLocation.objects.filter(
-            event_id=event_id,
-            is_active=True,
-            user__role='volunteer'
-        ).count()
-        
-        active_incidents = Incident.objects.filter(
-            event_id=event_id
-        ).exclude(status__in=['resolved', 'cancelled']).count()
-        
-        active_sos = SOSAlert.objects.filter(
-            event_id=event_id, 
-            status__in=['reported', 'assigned', 'in_progress']
-        ).count()
-        
-        online_responders = ResponderLocation.objects.filter(
-            event_id=event_id, 
-            is_active=True
-        ).count()
-        
+        stats = get_event_stats(event_id)
         return Response({
-            'scanned_tickets': scanned_tickets,
-            'total_tickets': total_tickets,
-            'unique_attendees': unique_attendees,
-            'active_volunteers': active_volunteers,
-            'active_incidents': active_incidents,
-            'active_sos': active_sos,
-            'online_responders': online_responders,
+            'scanned_tickets': stats['scanned_tickets'],
+            'total_tickets': stats['total_tickets'],
+            'unique_attendees': stats['unique_attendees'],
+            'active_volunteers': stats['active_volunteers'],
+            'active_incidents': stats['open_incidents'],
+            'active_sos': stats['active_sos'],
+            'online_responders': stats['online_responders'],
         })
 
+def _parse_bbox(value):
+    """'min_lat,min_lng,max_lat,max_lng' -> tuple of floats (None if absent, ValueError if malformed)."""
+    if not value:
+        return None
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox needs 4 numbers")
+    return tuple(parts)
+
+
 class CurrentLocationsView(views.APIView):
+    """
+    Everyone on the event map: live positions from Redis plus last known
+    positions of the event's offline attendees/responders.
+    
+    ⚡ Redis is the source of truth for live users; stale hash entries are
+    pruned with one batched id lookup and one HDEL. Offline users come from a
+    single projected query scoped to the event (ticket holders, responders).
+    
+    Query params:
+    - responders_only=true: volunteers only
+    - bbox=min_lat,min_lng,max_lat,max_lng: only the visible viewport
+    - limit / offset: page through the results ({count, next_offset, results})
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, event_id):
-        redis_client = redis.StrictRedis(host='127.0.0.1', port=6379, db=0, decode_responses=True)
+        from .redis_clients import redis_client
+
+        responders_only = request.query_params.get('responders_only', 'false').lower() == 'true'
+        try:
+            bbox = _parse_bbox(request.query_params.get('bbox'))
+            limit = request.query_params.get('limit')
+            limit = max(int(limit), 0) if limit is not None else None
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"error": "Invalid bbox, limit or offset"}, status=400)
+
+        def in_view(lat, lng):
+            return bbox is None or (bbox[0] <= lat <= bbox[2] and bbox[1] <= lng <= bbox[3])
+
         # We check both the specific event bucket and potentially global users
         locations_key = f"event:{event_id}:locations"
-        active_locations = redis_client.hgetall(locations_key)
-        
-        responders_only = request.query_params.get('responders_only', 'false').lower() == 'true'
-        
+        try:
+            active_locations = redis_client.hgetall(locations_key)
+        except redis.RedisError as e:
+            logger.warning(f"Live locations unavailable for event {event_id}: {e}")
+            active_locations = {}
+
         # Prepare a map of active users from Redis
         active_user_map = {}
         for user_id_str, data_str in active_locations.items():
             try:
-                user_id = int(user_id_str)
-                loc_data = json.loads(data_str)
-                active_user_map[user_id] = loc_data
+                active_user_map[int(user_id_str)] = json.loads(data_str)
             except (ValueError, TypeError, json.JSONDecodeError):
                 continue
-                
-        # Fetch all users from the database who have coordinates
-        db_users = User.objects.filter(latitude__isnull=False, longitude__isnull=False)
-        if responders_only:
-            db_users = db_users.filter(role='volunteer')
-            
+
+        # One query for all of them; drop entries of deleted accounts in one HDEL
+        if active_user_map:
+            existing = set(User.objects.filter(id__in=active_user_map).values_list('id', flat=True))
+            stale = [str(user_id) for user_id in active_user_map if user_id not in existing]
+            if stale:
+                try:
+                    redis_client.hdel(locations_key, *stale)
+                except redis.RedisError:
+                    pass
+            active_user_map = {uid: loc for uid, loc in active_user_map.items() if uid in existing}
+
         results = []
-        added_user_ids = set()
-        
-        # 1. Add people actively in Redis (with real-time updates)
+
+        # 1. People actively in Redis (with real-time updates)
         for user_id, loc_data in active_user_map.items():
-            if not User.objects.filter(id=user_id).exists():
-                redis_client.hdel(locations_key, str(user_id))
-                continue
-            
             if responders_only and loc_data.get('role') != 'volunteer':
                 continue
-                
+            if bbox is not None:
+                try:
+                    if not in_view(float(loc_data.get('lat')), float(loc_data.get('lng'))):
+                        continue
+                except (TypeError, ValueError):
+                    continue
             results.append(loc_data)
-            added_user_ids.add(user_id)
-            
-        # 2. Add remaining users from DB who aren't currently active in Redis
-        for user in db_users:
-            if user.id in added_user_ids:
-                continue
-                
-            pic_url = None
-            if user.profile_image:
-                pic_url = request.build_absolute_uri(user.profile_image.url)
-                
+
+        # 2. Last known position of the event's other participants
+        participants = Q(id__in=Ticket.objects.filter(event_id=event_id).values('user_id')) | Q(
+            id__in=ResponderLocation.objects.filter(event_id=event_id).values('user_id')
+        )
+        db_users = User.objects.filter(
+            participants, latitude__isnull=False, longitude__isnull=False
+        ).exclude(id__in=list(active_user_map))
+        if responders_only:
+            db_users = db_users.filter(role='volunteer')
+        if bbox is not None:
+            db_users = db_users.filter(
+                latitude__gte=bbox[0], latitude__lte=bbox[2],
+                longitude__gte=bbox[1], longitude__lte=bbox[3],
+            )
+
+        total = len(results) + db_users.count() if limit is not None else None
+        if limit is not None:
+            # Live users first, then the offline page remainder
+            live_page = results[offset:offset + limit]
+            db_offset = max(offset - len(results), 0)
+            db_limit = limit - len(live_page)
+            results = live_page
+            db_users = db_users.order_by('id')[db_offset:db_offset + db_limit] if db_limit > 0 else db_users.none()
+
+        host = request.build_absolute_uri('/')[:-1]
+        media_url = settings.MEDIA_URL if settings.MEDIA_URL.startswith('http') else host + settings.MEDIA_URL
+        rows = db_users.values_list(
+            'id', 'full_name', 'username', 'role', 'latitude', 'longitude', 'phone_number', 'profile_image'
+        )
+        for user_id, full_name, username, role, lat, lng, phone, image in rows:
+            lat = float(lat)
+            lng = float(lng)
             results.append({
-                'user_id': user.id,
-                'name': user.full_name or user.username,
-                'role': user.role,
-                'lat': float(user.latitude),
-                'latitude': float(user.latitude),
-                'lng': float(user.longitude),
-                'longitude': float(user.longitude),
+                'user_id': user_id,
+                'name': full_name or username,
+                'role': role,
+                'lat': lat,
+                'latitude': lat,
+                'lng': lng,
+                'longitude': lng,
                 'status': 'offline', # Mark users purely from DB as offline
-                'phone': getattr(user, 'phone_number', 'N/A'),
-                'pic': pic_url,
+                'phone': phone,
+                'pic': media_url + filepath_to_uri(image) if image else None,
                 'last_seen': 'Offline',
                 'distance': None
             })
-            
-        return Response(results)
+
+        if limit is None:
+            return Response(results)
+        next_offset = offset + len(results)
+        return Response({
+            'count': total,
+            'next_offset': next_offset if next_offset < total else None,
+            'results': results,
+        })
 
 import html
 from django.utils import timezone
@@ -227,18 +284,7 @@ def calculate_haversine_distance(lat1, lon1, lat2, lon2):
     Returns:
         Distance in kilometers
     """
-    from math import radians, cos, sin, asin, sqrt
-    
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    
-    # Haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 6371  # Radius of earth in kilometers
-    
-    return c * r
+    return haversine(lat1, lon1, lat2, lon2)
 
 
 def find_nearby_volunteers(latitude, longitude, event_id, radius_km=None):
@@ -253,10 +299,16 @@ def find_nearby_volunteers(latitude, longitude, event_id, radius_km=None):
     - Not currently handling another active incident/SOS ⚠️ NEW
     - Within proximity radius (default from settings)
     
+    ⚡ Candidates come from the live `event:{id}:volunteers` GEO set
+    (GEOSEARCH BYRADIUS ASC COUNT) minus the `volunteers:busy` set, so only
+    the K closest free volunteers are ever loaded from the database.
+    Falls back to a full database scan if Redis is unavailable.
+    
     ⚠️ PRODUCTION NOTES:
     This function is designed for real-time dispatch systems and respects:
     - LOCATION_RECENCY_MINUTES: Configurable window (default 5 min)
     - SOS_PROXIMITY_RADIUS_KM: Geographic radius for targeting (default 2 km)
+    - SOS_PROXIMITY_MAX_VOLUNTEERS: Max volunteers inside the radius (default 50)
     - FALLBACK_VOLUNTEER_LIMIT: Max volunteers when no nearby (default 10)
     
     Fallback: If no one within radius, returns closest N volunteers
@@ -271,63 +323,103 @@ def find_nearby_volunteers(latitude, longitude, event_id, radius_km=None):
         List of tuples: [(user_object, distance_km), ...]
         If no nearby responders, returns up to FALLBACK_VOLUNTEER_LIMIT closest volunteers
     """
-    from django.utils import timezone
-    from django.conf import settings
+    # Use configurable proximity radius from settings (default 2 km)
+    if radius_km is None:
+        radius_km = getattr(settings, 'SOS_PROXIMITY_RADIUS_KM', 2.0)
     
+    try:
+        return _find_nearby_volunteers_geo(latitude, longitude, event_id, radius_km)
+    except redis.RedisError as e:
+        logger.warning(f"[SOS_PROXIMITY] Redis GEO search unavailable ({e}); scanning responders in DB")
+        return _find_nearby_volunteers_db(latitude, longitude, event_id, radius_km)
+
+
+def _eligible_responders(event_id):
+    """Dispatch-eligible ResponderLocations for an event (active, in event window, recent)."""
     now = timezone.now()
     
     # Use configurable recency window from settings (default 5 min)
     recency_minutes = getattr(settings, 'LOCATION_RECENCY_MINUTES', 5)
     recency_cutoff = now - timedelta(minutes=recency_minutes)
     
-    # Use configurable proximity radius from settings (default 2 km)
-    if radius_km is None:
-        radius_km = getattr(settings, 'SOS_PROXIMITY_RADIUS_KM', 2.0)
-    
-    eligible_responders = ResponderLocation.objects.filter(
+    return ResponderLocation.objects.filter(
         event_id=event_id,
         is_active=True,
         event__start_datetime__lte=now,
         event__end_datetime__gt=now,
         last_updated__gte=recency_cutoff
-    ).select_related('user', 'event')
+    )
+
+
+def _find_nearby_volunteers_geo(latitude, longitude, event_id, radius_km):
+    from .proximity import search_free_volunteers, EARTH_HALF_CIRCUMFERENCE_KM
+    
+    def resolve(candidates):
+        # One indexed query for the K candidates instead of every responder
+        if not candidates:
+            return []
+        users = {
+            responder.user_id: responder.user
+            for responder in _eligible_responders(event_id).filter(
+                user_id__in=[user_id for user_id, _ in candidates]
+            ).select_related('user')
+        }
+        return [(users[user_id], distance_km) for user_id, distance_km in candidates if user_id in users]
+    
+    max_nearby = getattr(settings, 'SOS_PROXIMITY_MAX_VOLUNTEERS', 50)
+    nearby_volunteers = resolve(
+        search_free_volunteers(latitude, longitude, event_id, radius_km, max_nearby)
+    )
+    
+    # Fallback: If no one nearby, return closest N volunteers
+    # ⚠️ PRODUCTION FIX: Limit fallback to prevent broadcast storm
+    if not nearby_volunteers:
+        fallback_limit = getattr(settings, 'FALLBACK_VOLUNTEER_LIMIT', 10)
+        nearby_volunteers = resolve(
+            search_free_volunteers(latitude, longitude, event_id, EARTH_HALF_CIRCUMFERENCE_KM, fallback_limit)
+        )
+        if nearby_volunteers:
+            print(f"[SOS_FALLBACK] No nearby volunteers. Broadcasting to {len(nearby_volunteers)} closest.")
+    
+    return nearby_volunteers
+
+
+def _find_nearby_volunteers_db(latitude, longitude, event_id, radius_km):
+    """Full-scan path used only when Redis is down."""
+    eligible_responders = _eligible_responders(event_id).select_related('user', 'event')
     
     # ⚠️ PRODUCTION FIX: Filter out volunteers already handling active incidents
     # This prevents sending SOS to a volunteer who's already engaged
     eligible_responders = eligible_responders.exclude(
         user__assigned_incidents__status__in=['pending', 'verified', 'responding']
     ).exclude(
-        user__sosalert__status__in=['assigned', 'in_progress']
+        user__assigned_sos__status__in=['assigned', 'in_progress']
     ).distinct()
     
-    nearby_volunteers = []
-    all_distances = []  # Keep track of all for fallback
+    responders = [
+        responder for responder in eligible_responders
+        if responder.latitude is not None and responder.longitude is not None
+    ]
+    if not responders:
+        return []
     
-    for responder in eligible_responders:
-        if responder.latitude is None or responder.longitude is None:
-            continue
-            
-        distance_km = calculate_haversine_distance(
-            latitude, longitude,
-            float(responder.latitude), float(responder.longitude)
-        )
-        
-        all_distances.append((responder.user, distance_km))
-        
-        # Filter by radius for primary list
-        if distance_km <= radius_km:
-            nearby_volunteers.append((responder.user, distance_km))
+    # 📐 Score every responder in one vectorized pass
+    distances = haversine_many(
+        latitude, longitude,
+        [responder.latitude for responder in responders],
+        [responder.longitude for responder in responders]
+    )
     
-    # Sort by distance (closest first)
-    nearby_volunteers.sort(key=lambda x: x[1])
-    all_distances.sort(key=lambda x: x[1])
+    max_nearby = getattr(settings, 'SOS_PROXIMITY_MAX_VOLUNTEERS', 50)
+    nearest = k_nearest(distances, max_nearby, max_distance=radius_km)
     
     # Fallback: If no one nearby, return closest N volunteers
-    # ⚠️ PRODUCTION FIX: Limit fallback to prevent broadcast storm
-    if not nearby_volunteers and all_distances:
+    if nearest.size == 0:
         fallback_limit = getattr(settings, 'FALLBACK_VOLUNTEER_LIMIT', 10)
-        nearby_volunteers = all_distances[:fallback_limit]
-        print(f"[SOS_FALLBACK] No nearby volunteers. Broadcasting to {len(nearby_volunteers)} closest.")
+        nearest = k_nearest(distances, fallback_limit)
+        print(f"[SOS_FALLBACK] No nearby volunteers. Broadcasting to {len(nearest)} closest.")
+    
+    nearby_volunteers = [(responders[i].user, float(distances[i])) for i in nearest]
     
     return nearby_volunteers
 
@@ -443,8 +535,10 @@ class IncidentViewSet(viewsets.ModelViewSet):
         send_notification(reporter, "Incident Reported", f"Your incident '{incident.title}' has been reported and is being reviewed.", 'incident', incident.event)
         
         staff = User.objects.filter(role__in=['organizer', 'admin'])
-        for s in staff:
-            send_notification(s, f"New Incident: {incident.title}", f"Reported at {incident.location_name}.", 'incident', incident.event)
+        send_notifications_bulk(
+            staff, f"New Incident: {incident.title}", f"Reported at {incident.location_name}.", 'incident', incident.event,
+            role_groups=STAFF_ROLE_GROUPS
+        )
 
         log_incident_action(incident, 'reported', reporter, new_status=incident.status)
         self.broadcast_incident(incident, 'new_incident')
@@ -586,14 +680,14 @@ class IncidentViewSet(viewsets.ModelViewSet):
             # Notify organizers if a volunteer resolved it
             if user.role == 'volunteer':
                 organizers = User.objects.filter(role__in=['organizer', 'admin'])
-                for org in organizers:
-                    send_notification(
-                        org,
-                        "Incident Protocol Update",
-                        f"Volunteer {user.full_name} has marked '{incident.title}' as {incident.get_status_display()}.",
-                        'incident',
-                        incident.event
-                    )
+                send_notifications_bulk(
+                    organizers,
+                    "Incident Protocol Update",
+                    f"Volunteer {user.full_name} has marked '{incident.title}' as {incident.get_status_display()}.",
+                    'incident',
+                    incident.event,
+                    role_groups=STAFF_ROLE_GROUPS
+                )
 
         # Notification for assignment changes
         if old_instance.assigned_volunteer != incident.assigned_volunteer and incident.assigned_volunteer:
@@ -684,7 +778,8 @@ class SOSAlertViewSet(viewsets.ModelViewSet):
             sos_metrics.log_sos_conflict(
                 sos_id=sos.id,
                 first_volunteer=sos.assigned_volunteer.full_name,
-                second_volunteer=user.full_name
+                second_volunteer=user.full_name,
+                event_id=sos.event_id
             )
             
             return Response({
@@ -742,7 +837,8 @@ class SOSAlertViewSet(viewsets.ModelViewSet):
                 sos_id=sos.id,
                 volunteer_name=user.full_name,
                 distance_km=distance_km or 0,
-                acceptance_seconds=acceptance_time
+                acceptance_seconds=acceptance_time,
+                event_id=sos.event_id
             )
         except Exception as e:
             logger.error(f"[METRICS_ERROR] Failed to log SOS acceptance metrics: {e}")
@@ -801,7 +897,8 @@ class SOSAlertViewSet(viewsets.ModelViewSet):
         completion_seconds = (timezone.now() - sos.created_at).total_seconds()
         sos_metrics.log_sos_completed(
             sos_id=sos.id,
-            completion_seconds=completion_seconds
+            completion_seconds=completion_seconds,
+            event_id=sos.event_id
         )
 
         send_notification(
@@ -958,110 +1055,128 @@ class SOSAlertViewSet(viewsets.ModelViewSet):
             
             # Save SOS without auto-assignment (will be assigned when volunteer accepts)
             sos = serializer.save(user=user, location_name=location_name)
-            
-            # 🎯 STEP 5.3: Find nearby volunteers (don't auto-assign yet)
-            nearby_volunteers = []
-            if lat and lon and event_id:
-                try:
-                    nearby_volunteers = find_nearby_volunteers(
-                        float(lat), float(lon), int(event_id), radius_km=2
-                    )
-                except Exception as e:
-                    print(f"[WARN] find_nearby_volunteers failed: {e}")
-                    nearby_volunteers = []
+        except Exception as e:
+            print(f"[ERROR] perform_create failed: {e}")
+            import traceback
+            traceback.print_exc()
+            raise
+        
+        # 🚨 Everything else (proximity search, notifications, logs, broadcasts)
+        # runs on the dispatch pool once the INSERT is committed
+        transaction.on_commit(lambda: sos_dispatcher.submit(
+            self.dispatch_new_sos, sos.id, lat, lon, event_id, location_name
+        ))
 
-            # Log SOS metrics safely
+    def dispatch_new_sos(self, sos_id, lat, lon, event_id, location_name):
+        """
+        Background side effects of a new SOS (runs on monitoring.dispatch.sos_dispatcher).
+        """
+        sos = SOSAlert.objects.select_related('user', 'event').get(pk=sos_id)
+        user = sos.user
+        
+        # 🎯 STEP 5.3: Find nearby volunteers (don't auto-assign yet)
+        nearby_volunteers = []
+        if lat and lon and event_id:
             try:
-                eligible_responders = ResponderLocation.objects.filter(
-                    event_id=event_id,
-                    is_active=True,
-                    event__start_datetime__lte=timezone.now(),
-                    event__end_datetime__gt=timezone.now()
-                ).count()
-                
-                fallback_triggered = len(nearby_volunteers) == 0 and eligible_responders > 0
-                sos_metrics.log_sos_created(
-                    sos_id=sos.id,
-                    event_id=event_id,
-                    nearby_count=len(nearby_volunteers),
-                    fallback=fallback_triggered
+                nearby_volunteers = find_nearby_volunteers(
+                    float(lat), float(lon), int(event_id), radius_km=2
                 )
             except Exception as e:
-                print(f"[WARN] log_sos_created failed: {e}")
+                print(f"[WARN] find_nearby_volunteers failed: {e}")
+                nearby_volunteers = []
 
-            # ✅ NEW: Notify attendee their SOS was sent
-            try:
-                if nearby_volunteers:
-                    nearest_v = nearby_volunteers[0][0]
-                    msg = f"{user.full_name} is sending sos alert to {nearest_v.full_name}"
-                else:
-                    msg = f"{user.full_name} is sending sos alert to volunteers"
-                
-                send_notification(user, "SOS Sent", msg, 'sos', sos.event)
-            except Exception as e:
-                print(f"[WARN] Attendee SOS notification failed: {e}")
-
-            # Notify staff about the SOS
-            try:
-                from django.contrib.auth import get_user_model
-                UserModel = get_user_model()
-                staff = UserModel.objects.filter(role__in=['organizer', 'admin'])
-                for s in staff:
-                    send_notification(s, f"URGENT: SOS Alert from {user.full_name}", f"Location: {location_name}.", 'sos', sos.event)
-            except Exception as e:
-                print(f"[WARN] Staff notification failed: {e}")
+        # Log SOS metrics safely
+        try:
+            eligible_responders = ResponderLocation.objects.filter(
+                event_id=event_id,
+                is_active=True,
+                event__start_datetime__lte=timezone.now(),
+                event__end_datetime__gt=timezone.now()
+            ).count()
+            
+            fallback_triggered = len(nearby_volunteers) == 0 and eligible_responders > 0
+            sos_metrics.log_sos_created(
+                sos_id=sos.id,
+                event_id=event_id,
+                nearby_count=len(nearby_volunteers),
+                fallback=fallback_triggered
+            )
+        except Exception as e:
+            print(f"[WARN] log_sos_created failed: {e}")
 
-            # Notify nearby volunteers (don't assign, just alert them to accept)
+        # ✅ NEW: Notify attendee their SOS was sent
+        try:
             if nearby_volunteers:
-                try:
-                    # ✅ ASSIGN TO NEAREST VOLUNTEER
-                    nearest_volunteer, nearest_distance = nearby_volunteers[0]
-                    
-                    # Update SOS with assignment
-                    sos.assigned_volunteer = nearest_volunteer
-                    sos.save(update_fields=['assigned_volunteer'])
-                    
-                    distance_text = f"{nearest_distance:.2f}km away" if nearest_distance else "in your area"
-                    
-                    for volunteer, distance in nearby_volunteers:
-                        distance_text_vol = f"{distance:.2f}km away" if distance else "in your area"
-                        
-                        # ✅ FIX: Include full metadata so UI doesn't show "unknown"
-                        send_notification(
-                            volunteer,
-                            f"SOS Alert: {user.full_name}",  # Include attendee name!
-                            f"SOS from {user.full_name} at {location_name} ({distance_text_vol}). Tap to respond.",
-                            'assignment',
-                            sos.event,
-                            entity_type='sos_assignment',
-                            entity_id=sos.id
-                        )
-                except Exception as e:
-                    print(f"[WARN] Volunteer notification failed: {e}")
+                nearest_v = nearby_volunteers[0][0]
+                msg = f"{user.full_name} is sending sos alert to {nearest_v.full_name}"
+            else:
+                msg = f"{user.full_name} is sending sos alert to volunteers"
+            
+            send_notification(user, "SOS Sent", msg, 'sos', sos.event)
+        except Exception as e:
+            print(f"[WARN] Attendee SOS notification failed: {e}")
 
-            # Log action
+        # Notify staff about the SOS
+        try:
+            from django.contrib.auth import get_user_model
+            UserModel = get_user_model()
+            staff = UserModel.objects.filter(role__in=['organizer', 'admin'])
+            send_notifications_bulk(
+                staff, f"URGENT: SOS Alert from {user.full_name}", f"Location: {location_name}.", 'sos', sos.event,
+                role_groups=STAFF_ROLE_GROUPS
+            )
+        except Exception as e:
+            print(f"[WARN] Staff notification failed: {e}")
+
+        # Notify nearby volunteers (don't assign, just alert them to accept)
+        if nearby_volunteers:
             try:
-                log_sos_action(
-                    sos_alert=sos,
-                    action_type='reported',
-                    performed_by=self.request.user,
-                    new_status=sos.status,
-                    notes=f"Emergency SOS signal triggered at {location_name}. Broadcast to {len(nearby_volunteers)} nearby volunteers."
+                # ✅ ASSIGN TO NEAREST VOLUNTEER
+                nearest_volunteer, nearest_distance = nearby_volunteers[0]
+                
+                # Update SOS with assignment
+                sos.assigned_volunteer = nearest_volunteer
+                sos.save(update_fields=['assigned_volunteer'])
+                
+                distance_text = f"{nearest_distance:.2f}km away" if nearest_distance else "in your area"
+                
+                distances = {volunteer.id: distance for volunteer, distance in nearby_volunteers}
+                
+                def volunteer_message(volunteer):
+                    distance = distances.get(volunteer.id)
+                    distance_text_vol = f"{distance:.2f}km away" if distance else "in your area"
+                    return f"SOS from {user.full_name} at {location_name} ({distance_text_vol}). Tap to respond."
+                
+                # ✅ FIX: Include full metadata so UI doesn't show "unknown"
+                send_notifications_bulk(
+                    [volunteer for volunteer, _ in nearby_volunteers],
+                    f"SOS Alert: {user.full_name}",  # Include attendee name!
+                    volunteer_message,
+                    'assignment',
+                    sos.event,
+                    entity_type='sos_assignment',
+                    entity_id=sos.id
                 )
             except Exception as e:
-                print(f"[WARN] log_sos_action failed: {e}")
-            
-            # Broadcast to nearby volunteers
-            try:
-                self.broadcast_sos_to_nearby_volunteers(sos, nearby_volunteers)
-            except Exception as e:
-                print(f"[WARN] SOS Targeted Broadcast failed: {e}")
-                
+                print(f"[WARN] Volunteer notification failed: {e}")
+
+        # Log action
+        try:
+            log_sos_action(
+                sos_alert=sos,
+                action_type='reported',
+                performed_by=user,
+                new_status=sos.status,
+                notes=f"Emergency SOS signal triggered at {location_name}. Broadcast to {len(nearby_volunteers)} nearby volunteers."
+            )
         except Exception as e:
-            print(f"[ERROR] perform_create failed: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+            print(f"[WARN] log_sos_action failed: {e}")
+        
+        # Broadcast to nearby volunteers
+        try:
+            self.broadcast_sos_to_nearby_volunteers(sos, nearby_volunteers)
+        except Exception as e:
+            print(f"[WARN] SOS Targeted Broadcast failed: {e}")
         
         # Also broadcast to organizers/admins for awareness
         try:
@@ -1247,7 +1362,8 @@ class SOSAlertViewSet(viewsets.ModelViewSet):
                     completion_seconds = (timezone.now() - sos.created_at).total_seconds()
                     sos_metrics.log_sos_completed(
                         sos_id=sos.id,
-                        completion_seconds=completion_seconds
+                        completion_seconds=completion_seconds,
+                        event_id=sos.event_id
                     )
                 except Exception as e:
                     logger.error(f"SOS metrics logging failed: {e}")
@@ -1658,37 +1774,15 @@ class DashboardStatsView(views.APIView):
         if not event_id:
             return Response({"error": "Event ID required"}, status=400)
         
-        locations_key = f"event:{event_id}:locations"    
-        try:
-            from .consumers import redis_client
-            active_users_data = redis_client.hgetall(locations_key)
-            active_users_count = len(active_users_data)
-        except:
-            active_users_count = 0
-            
-        active_incidents = Incident.objects.filter(event_id=event_id, status__in=['pending', 'verified']).count()
-        
-        # GAP 1 FIX: Only count volunteers in active events
-        # GAP 2 FIX: Only count volunteers with recent location data (within 5 min)
-        now = timezone.now()
-        five_minutes_ago = now - timedelta(minutes=5)
-        active_volunteers = ResponderLocation.objects.filter(
-            event_id=event_id, 
-            is_active=True,
-            event__start_datetime__lte=now,
-            event__end_datetime__gt=now,
-            last_updated__gte=five_minutes_ago
-        ).count()
-        
-        active_sos = SOSAlert.objects.filter(event_id=event_id, status='active').count()
+        stats = get_event_stats(event_id)
 
         unread_notifications = Notification.objects.filter(user=request.user, is_read=False).count()
 
         return Response({
-            "active_users": active_users_count,
-            "active_incidents": active_incidents,
-            "active_volunteers": active_volunteers,
-            "active_sos": active_sos,
+            "active_users": live_user_count(event_id),
+            "active_incidents": stats['pending_incidents'],
+            "active_volunteers": stats['recent_volunteers'],
+            "active_sos": stats['active_sos'],
             "unread_count": unread_notifications,
             "server_time": datetime.now().strftime("%I:%M %p")
         })
@@ -1742,26 +1836,95 @@ class HeatmapView(views.APIView):
 
 
 from .models import CrowdLocation
+from .density import density_tiles
+from .flow import cached_flow, parse_minutes
 
 class CrowdMovementPatternsView(views.APIView):
+    """
+    Recent crowd positions as a flat list of points.
+    
+    ?mode=cells returns the same list format built from the pre-aggregated
+    density cells (one point per cell, intensity = relative density).
+    
+    ?window=15m&step=5m returns 🌊 flow vectors instead: per-cell mean
+    velocity and density change versus the previous window (see flow.py).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, event_id=None):
         if not event_id:
             return Response({"error": "Event ID required"}, status=400)
 
+        if 'window' in request.query_params or 'step' in request.query_params:
+            try:
+                window = parse_minutes(request.query_params.get('window'), 15)
+                step = parse_minutes(request.query_params.get('step'), 5)
+            except ValueError:
+                return Response({"error": "window and step are minutes, e.g. 15, 15m or 1h"}, status=400)
+            if not (1 <= window <= 24 * 60 and 1 <= step <= window):
+                return Response({"error": "Need 1 <= step <= window <= 1440 minutes"}, status=400)
+            return Response(cached_flow(event_id, window, step))
+
+        if request.query_params.get('mode') == 'cells':
+            _, cells = density_tiles(event_id, zoom=16)
+            return Response([
+                {"lat": c["lat"], "lng": c["lng"], "intensity": c["intensity"], "count": c["count"]}
+                for c in cells
+            ])
+
         # Fetch the most recent 2000 location snapshots to build a "real" movement profile
+        # (plain tuples: no model instances for 2000 rows)
         recent_locations = CrowdLocation.objects.filter(
             event_id=event_id
-        ).order_by('-timestamp')[:2000]
+        ).order_by('-timestamp').values_list('latitude', 'longitude', 'timestamp')[:2000]
 
-        results = []
-        for loc in recent_locations:
-            results.append({
-                "lat": float(loc.latitude),
-                "lng": float(loc.longitude),
+        results = [
+            {
+                "lat": float(lat),
+                "lng": float(lng),
                 "intensity": 1.0, # All real users count equally for patterns
-                "timestamp": loc.timestamp
-            })
+                "timestamp": timestamp
+            }
+            for lat, lng, timestamp in recent_locations
+        ]
 
         return Response(results)
+
+
+class CrowdDensityTilesView(views.APIView):
+    """
+    🔥 GET /api/monitoring/heatmap-tiles/<event_id>/
+    
+    Pre-aggregated crowd density cells; size is bounded by the number of
+    cells, not the number of recorded points.
+    
+    Query params:
+    - zoom: map zoom level (picks the geohash precision), default 16
+    - precision: explicit geohash length (overrides zoom)
+    - minutes: look-back window, default 60
+    - bbox: min_lat,min_lng,max_lat,max_lng viewport filter
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, event_id=None):
+        try:
+            zoom = int(request.query_params.get('zoom', 16))
+            minutes = int(request.query_params.get('minutes', 60))
+            precision = request.query_params.get('precision')
+            precision = int(precision) if precision else None
+            bbox = request.query_params.get('bbox')
+            bbox = tuple(float(v) for v in bbox.split(',')) if bbox else None
+        except ValueError:
+            return Response({"error": "zoom, precision and minutes must be integers; bbox is 4 comma-separated numbers"}, status=400)
+        if bbox is not None and len(bbox) != 4:
+            return Response({"error": "bbox must be min_lat,min_lng,max_lat,max_lng"}, status=400)
+        if precision is not None and precision not in getattr(settings, 'CROWD_DENSITY_PRECISIONS', (5, 6, 7)):
+            return Response({"error": f"precision must be one of {list(getattr(settings, 'CROWD_DENSITY_PRECISIONS', (5, 6, 7)))}"}, status=400)
+
+        precision, cells = density_tiles(event_id, zoom=zoom, precision=precision, minutes=max(1, minutes), bbox=bbox)
+        return Response({
+            "event_id": event_id,
+            "precision": precision,
+            "minutes": minutes,
+            "cells": cells,
+        })
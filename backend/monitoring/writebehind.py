@@ -0,0 +1,247 @@
+"""
+Write-Behind Persistence for CrowdLocation Telemetry
+
+💾 Crowd snapshots are queued in memory and flushed with bulk_create.
+
+Live tracking used to open one tiny transaction per user per minute
+(Event.get + User.filter + CrowdLocation.create) on the consumer threadpool.
+The writer batches those rows and inserts them every
+CROWD_WRITE_FLUSH_SECONDS or as soon as CROWD_WRITE_BATCH_SIZE rows are queued.
+
+Backpressure:
+- The queue is bounded by CROWD_WRITE_MAX_QUEUE; when full the OLDEST
+  snapshot is dropped (newer positions are worth more) and counted
+- stats() exposes queued / flushed / dropped / failed counts and the last
+  flush duration for the health endpoint
+- Remaining rows are flushed synchronously on interpreter shutdown
+
+🔥 Each flush also folds its points into the heatmap density cells with one
+upsert. CrowdLocation rows saved one at a time elsewhere only queue their
+point (enqueue_density) so they share that upsert instead of running their own.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+
+class CrowdLocationWriter:
+    """Thread-safe, bounded write-behind queue for CrowdLocation rows."""
+
+    def __init__(self, flush_seconds=None, batch_size=None, max_queue=None):
+        self.flush_seconds = flush_seconds or getattr(settings, 'CROWD_WRITE_FLUSH_SECONDS', 5)
+        self.batch_size = batch_size or getattr(settings, 'CROWD_WRITE_BATCH_SIZE', 500)
+        self.max_queue = max_queue or getattr(settings, 'CROWD_WRITE_MAX_QUEUE', 50000)
+
+        self._queue = deque()
+        self._density = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        # Backpressure metrics
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+        self.last_flush_at = None
+
+    def enqueue(self, event_id, user_id, lat, lng, source_type='live_tracking'):
+        """Queue one snapshot. Never touches the database on the caller's thread."""
+        # Event ids come straight from the websocket URL: a bad one must not
+        # reach bulk_create and fail everyone else's rows in the batch
+        try:
+            event_id = int(event_id)
+        except (TypeError, ValueError):
+            with self._lock:
+                self.failed += 1
+            return
+        row = (event_id, user_id, lat, lng, source_type)
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(row)
+            self.enqueued += 1
+            queued = len(self._queue)
+
+        self._ensure_started()
+        if queued >= self.batch_size:
+            self._wakeup.set()
+
+    def enqueue_density(self, event_id, lat, lng, timestamp):
+        """Queue an already saved point for the next density aggregation only."""
+        with self._lock:
+            if len(self._density) >= self.max_queue:
+                self._density.popleft()
+                self.dropped += 1
+            self._density.append((event_id, lat, lng, timestamp))
+        self._ensure_started()
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._queue)
+            density_queued = len(self._density)
+        return {
+            'queued': queued,
+            'density_queued': density_queued,
+            'max_queue': self.max_queue,
+            'enqueued': self.enqueued,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'last_flush_at': self.last_flush_at,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='owl-eye-crowd-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _take_density(self):
+        with self._lock:
+            points = list(self._density)
+            self._density.clear()
+            return points
+
+    def flush(self):
+        """Drain the queue into the database in batch_size chunks."""
+        from .density import record_points
+
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                points = self._take_density()
+                if not batch and not points:
+                    return
+                started = time.perf_counter()
+                rows = []
+                try:
+                    rows = self._write(batch) if batch else []
+                    self.flushed += len(rows)
+                except Exception as e:
+                    self.failed += len(batch)
+                    print(f"Error persisting crowd locations ({len(batch)} rows): {e}")
+
+                # 🔥 Roll the flushed points into the heatmap density cells
+                points.extend((row.event_id, row.latitude, row.longitude, row.timestamp) for row in rows)
+                try:
+                    record_points(points)
+                except Exception as e:
+                    print(f"Error aggregating crowd density ({len(points)} points): {e}")
+                self.last_flush_ms = (time.perf_counter() - started) * 1000
+                self.last_flush_at = time.time()
+
+    def _write(self, batch):
+        """Insert a batch; returns the rows that were written."""
+        from .models import CrowdLocation, compute_geohash
+
+        # bulk_create skips save(), so the geohash is filled in here
+        rows = []
+        for event_id, user_id, lat, lng, source_type in batch:
+            try:
+                geohash = compute_geohash(lat, lng)
+            except (TypeError, ValueError):
+                self.failed += 1
+                continue
+            rows.append(CrowdLocation(
+                event_id=event_id,
+                user_id=user_id,
+                latitude=lat,
+                longitude=lng,
+                source_type=source_type,
+                geohash=geohash,
+            ))
+        if not rows:
+            return []
+
+        try:
+            CrowdLocation.objects.bulk_create(rows, batch_size=self.batch_size)
+        except IntegrityError:
+            # A user or event vanished between the ping and the flush:
+            # drop rows for deleted events, detach deleted users, retry once
+            rows = self._repair(rows)
+            CrowdLocation.objects.bulk_create(rows, batch_size=self.batch_size)
+        except Exception as e:
+            # Some row can't be written at all: isolate it instead of losing the batch
+            print(f"Bulk insert of {len(rows)} crowd locations failed ({e}), retrying row by row")
+            rows = self._write_rows(rows)
+        return rows
+
+    def _write_rows(self, rows):
+        """Insert rows one at a time; returns the ones that made it."""
+        from .models import CrowdLocation
+
+        written = []
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    CrowdLocation.objects.bulk_create([row])
+                written.append(row)
+            except Exception as e:
+                self.failed += 1
+                print(f"Dropping crowd location (event {row.event_id}, user {row.user_id}): {e}")
+        return written
+
+    def _repair(self, rows):
+        from django.contrib.auth import get_user_model
+        from events.models import Event
+
+        event_ids = {str(pk) for pk in Event.objects.filter(
+            id__in={r.event_id for r in rows}
+        ).values_list('id', flat=True)}
+        user_ids = set(get_user_model().objects.filter(
+            id__in={r.user_id for r in rows if r.user_id}
+        ).values_list('id', flat=True))
+
+        repaired = []
+        for row in rows:
+            if str(row.event_id) not in event_ids:
+                self.failed += 1
+                continue
+            if row.user_id not in user_ids:
+                row.user_id = None
+            repaired.append(row)
+        return repaired
+
+    def close(self, timeout=10):
+        """Stop the worker and flush everything still queued (used at shutdown)."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+# Global writer instance (one per worker process)
+crowd_writer = CrowdLocationWriter()
+atexit.register(crowd_writer.close)
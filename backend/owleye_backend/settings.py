@@ -190,11 +190,16 @@ AUTHENTICATION_BACKENDS = [
 # ASGI & Channels
 ASGI_APPLICATION = 'owleye_backend.asgi.application'
 
+# Redis (channel layer + live telemetry state)
+REDIS_HOST = os.getenv('REDIS_HOST', '127.0.0.1')
+REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
+REDIS_DB = int(os.getenv('REDIS_DB', '0'))
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
@@ -256,4 +261,131 @@ SOS_PROXIMITY_RADIUS_KM = float(os.getenv('SOS_PROXIMITY_RADIUS_KM', '2.0'))
 # Typical event: 1-2 concurrent, stress test: 50+
 MAX_ACTIVE_SOS = int(os.getenv('MAX_ACTIVE_SOS', '50'))
 
+# Max Volunteers Inside Radius
+# GEOSEARCH COUNT for the primary proximity search (closest first)
+SOS_PROXIMITY_MAX_VOLUNTEERS = int(os.getenv('SOS_PROXIMITY_MAX_VOLUNTEERS', '50'))
+
+# Busy Volunteer Set Rebuild Interval (seconds)
+# volunteers:busy is recomputed from the DB at least this often
+BUSY_VOLUNTEER_REBUILD_SECONDS = int(os.getenv('BUSY_VOLUNTEER_REBUILD_SECONDS', '300'))
+
+# SOS Dispatch Workers
+# Background threads that run SOS side effects after the alert is saved
+# (proximity search, notifications, logs, broadcasts)
+SOS_DISPATCH_WORKERS = int(os.getenv('SOS_DISPATCH_WORKERS', '4'))
+
+# Metrics Reservoir Size
+# Samples kept per latency/distance series for percentiles (p50/p90/p95)
+# Memory stays bounded no matter how many SOS have been handled
+METRICS_RESERVOIR_SIZE = int(os.getenv('METRICS_RESERVOIR_SIZE', '512'))
+
+# Metrics Alert Window
+# Rolling window (5m, 1h or 24h) that check_thresholds judges
+# Per-minute buckets expire after 2h, per-hour buckets after 8 days
+METRICS_ALERT_WINDOW = os.getenv('METRICS_ALERT_WINDOW', '1h')
+
+# ⚡ LIVE TELEMETRY SETTINGS
+
+# Anti-Jitter Threshold (kilometers)
+# Location pings that moved less than this since the last accepted ping are dropped
+# 0.003 km (3 m) filters GPS noise from stationary phones
+TELEMETRY_JITTER_KM = float(os.getenv('TELEMETRY_JITTER_KM', '0.003'))
+
+# GEO Set TTL (seconds)
+# event:{id}:users / event:{id}:volunteers expire when nobody moves for this long
+TELEMETRY_GEO_TTL_SECONDS = int(os.getenv('TELEMETRY_GEO_TTL_SECONDS', '60'))
+
+# Crowd Snapshot Interval (seconds)
+# At most one CrowdLocation row per user per interval
+TELEMETRY_SAVE_INTERVAL_SECONDS = int(os.getenv('TELEMETRY_SAVE_INTERVAL_SECONDS', '60'))
+
+# Event Lifecycle Cache TTL (seconds)
+# Each socket re-reads its event's status at most this often
+# Cancel/delete broadcasts invalidate the cache immediately
+EVENT_CACHE_TTL_SECONDS = int(os.getenv('EVENT_CACHE_TTL_SECONDS', '30'))
+
+# Location Fan-Out Tick (milliseconds)
+# Position updates are coalesced per group and published once per tick
+# 250-1000 ms keeps maps smooth while cutting channel-layer publishes
+LOCATION_FANOUT_INTERVAL_MS = int(os.getenv('LOCATION_FANOUT_INTERVAL_MS', '500'))
+
+# Max entities per batched channel-layer message
+LOCATION_FANOUT_MAX_BATCH = int(os.getenv('LOCATION_FANOUT_MAX_BATCH', '500'))
+
+# 🗺️ REVERSE GEOCODING CACHE SETTINGS
+
+# In-process LRU size (cells of ~11m, per worker)
+GEOCODE_LRU_SIZE = int(os.getenv('GEOCODE_LRU_SIZE', '2048'))
+
+# Shared Redis tier TTL for resolved location names (default 30 days)
+GEOCODE_CACHE_TTL_SECONDS = int(os.getenv('GEOCODE_CACHE_TTL_SECONDS', str(30 * 86400)))
+
+# "Unknown Location" answers (LRU and Redis) expire much sooner, so a transient miss is retried
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.getenv('GEOCODE_NEGATIVE_TTL_SECONDS', '600'))
+
+# Single-flight lock: one worker owns an upstream Nominatim lookup this long
+GEOCODE_LOCK_SECONDS = int(os.getenv('GEOCODE_LOCK_SECONDS', '10'))
+
+# Offline gazetteer (GeoJSON or CSV) answering reverse geocodes without network
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', str(BASE_DIR / 'monitoring' / 'data' / 'gazetteer_kathmandu.geojson'))
+
+# Nearest named place radius when no gazetteer polygon contains the point
+GAZETTEER_MAX_DISTANCE_KM = float(os.getenv('GAZETTEER_MAX_DISTANCE_KM', '1.0'))
+
+# Ask Nominatim when the gazetteer has no answer (False = fully offline)
+GEOCODE_HTTP_FALLBACK = os.getenv('GEOCODE_HTTP_FALLBACK', 'True').lower() == 'true'
+
+# Simplified country boundary polygons (GeoJSON, properties.iso_a2) for infer_country_code
+COUNTRY_BOUNDARIES_PATH = os.getenv('COUNTRY_BOUNDARIES_PATH', str(BASE_DIR / 'monitoring' / 'data' / 'countries_simplified.geojson'))
+
+# 📦 BULK LOCATION VALIDATION SETTINGS
+
+# Max locations per batch_validate request (JSON array or NDJSON lines)
+LOCATION_BATCH_MAX_ITEMS = int(os.getenv('LOCATION_BATCH_MAX_ITEMS', '50000'))
+
+# Max request body size for batch_validate (default 50 MB)
+LOCATION_BATCH_MAX_BYTES = int(os.getenv('LOCATION_BATCH_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Locations validated and flushed to the response per chunk
+LOCATION_BATCH_CHUNK_SIZE = int(os.getenv('LOCATION_BATCH_CHUNK_SIZE', '1000'))
+
+# 📊 DASHBOARD STATS CACHE SETTINGS
+
+# Seconds EventOverviewView / DashboardStatsView counters are cached per event
+# (ticket, incident and SOS writes invalidate them immediately)
+EVENT_STATS_CACHE_SECONDS = int(os.getenv('EVENT_STATS_CACHE_SECONDS', '10'))
+
+# 🎟️ TICKET SALES SETTINGS
+
+# Minutes a pending Stripe checkout holds its seats (= Stripe session expiry,
+# clamped to 31..1439 since Stripe requires 30 to 1440). Expired holds are released
+# by `manage.py release_expired_holds` and whenever an event looks sold out
+TICKET_HOLD_MINUTES = int(os.getenv('TICKET_HOLD_MINUTES', '30'))
+
+# Most scans accepted by one POST /tickets/scan/batch/ request
+TICKET_SCAN_MAX_BATCH = int(os.getenv('TICKET_SCAN_MAX_BATCH', '500'))
+
+# 💾 CROWD WRITE-BEHIND SETTINGS
+
+# CrowdLocation snapshots are queued and flushed with bulk_create
+# every CROWD_WRITE_FLUSH_SECONDS or once CROWD_WRITE_BATCH_SIZE rows are waiting
+CROWD_WRITE_FLUSH_SECONDS = float(os.getenv('CROWD_WRITE_FLUSH_SECONDS', '5'))
+CROWD_WRITE_BATCH_SIZE = int(os.getenv('CROWD_WRITE_BATCH_SIZE', '500'))
+
+# Backpressure: max queued rows before the oldest snapshots are dropped
+CROWD_WRITE_MAX_QUEUE = int(os.getenv('CROWD_WRITE_MAX_QUEUE', '50000'))
+
+# 🔥 Heatmap density cells: time bucket size (seconds)
+CROWD_DENSITY_BUCKET_SECONDS = int(os.getenv('CROWD_DENSITY_BUCKET_SECONDS', '300'))
+
+# Geohash lengths aggregated, coarse to fine (5 ≈ 4.9km, 6 ≈ 1.2km, 7 ≈ 150m)
+CROWD_DENSITY_PRECISIONS = tuple(int(p) for p in os.getenv('CROWD_DENSITY_PRECISIONS', '5,6,7').split(','))
+
+# 🌊 Crowd flow vectors (movement-patterns?window=&step=)
+# Grid cell size, newest snapshots considered, and the max gap between two
+# samples of one user that still counts as a single movement
+CROWD_FLOW_CELL_METERS = float(os.getenv('CROWD_FLOW_CELL_METERS', '50'))
+CROWD_FLOW_MAX_POINTS = int(os.getenv('CROWD_FLOW_MAX_POINTS', '200000'))
+CROWD_FLOW_MAX_GAP_SECONDS = int(os.getenv('CROWD_FLOW_MAX_GAP_SECONDS', '600'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -1,6 +1,6 @@
-import uuid
 import stripe
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -8,8 +8,14 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from tickets.models import Ticket, TicketOrder
-from events.models import Event, TicketPackage
+from tickets.models import TicketOrder
+from events.models import Event
+from events.counters import SoldOut, reserve_seats
+from monitoring.stats import invalidate_event_stats
+from tickets.utils import (
+    InvalidOrderItem, confirm_payment, hold_deadline, issue_tickets, release_expired_holds, release_order,
+    resolve_order_items, stripe_session_expiry
+)
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
@@ -41,77 +47,63 @@ class CreateCheckoutSessionView(APIView):
             return Response({"error": "Event not found or inactive."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        total_quantity = sum(item.get('quantity', 0) for item in items)
-        current_tickets = Ticket.objects.filter(
-            event=event, status__in=['issued', 'scanned']
-        ).count()
-        if current_tickets + total_quantity > event.capacity:
-            return Response({"error": "Not enough capacity for this event."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
         line_items = []
-        total_amount = 0
-        order_items_to_create = []
 
-        for item in items:
-            try:
-                pkg = TicketPackage.objects.get(
-                    id=item.get('package_id'), event=event
-                )
-                qty = item.get('quantity', 0)
-                if qty <= 0:
-                    continue
-
-                total_amount += pkg.price * qty
-                order_items_to_create.append((pkg, qty))
-
-                line_items.append({
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': f"{event.name} — {pkg.name}",
-                            'description': pkg.description or f"{pkg.seating_type} ticket",
-                        },
-                        'unit_amount': int(float(pkg.price) * 100),
+        try:
+            order_items_to_create, total_amount = resolve_order_items(event, items)
+        except InvalidOrderItem as e:
+            return Response({"error": str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        for pkg, qty in order_items_to_create:
+            line_items.append({
+                'price_data': {
+                    'currency': 'usd',
+                    'product_data': {
+                        'name': f"{event.name} — {pkg.name}",
+                        'description': pkg.description or f"{pkg.seating_type} ticket",
                     },
-                    'quantity': qty,
-                })
-            except (TicketPackage.DoesNotExist, ValueError, TypeError, Exception):
-                return Response(
-                    {"error": f"Invalid ticket package ID: {item.get('package_id')}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                    'unit_amount': int(float(pkg.price) * 100),
+                },
+                'quantity': qty,
+            })
 
         if not line_items:
             return Response({"error": "No valid tickets selected."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
-            order = TicketOrder.objects.create(
-                user=request.user,
-                event=event,
-                first_name=billing_info.get('first_name', ''),
-                last_name=billing_info.get('last_name', ''),
-                email=billing_info.get('email', ''),
-                total_amount=total_amount,
-                status='pending',
-            )
+        total_quantity = sum(qty for _, qty in order_items_to_create)
+        hold_expires_at = hold_deadline()
 
-
-            for pkg, qty in order_items_to_create:
-                for _ in range(qty):
-                    Ticket.objects.create(
-                        event=event,
+        # Seats are held until the Stripe session expires; second attempt only
+        # if expired holds of other buyers gave seats back
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    reserve_seats(event, total_quantity)
+                    order = TicketOrder.objects.create(
                         user=request.user,
-                        order=order,
-                        package=pkg,
-                        price_at_purchase=pkg.price,
-                        qr_token=str(uuid.uuid4()),
-                        status='issued',
+                        event=event,
+                        first_name=billing_info.get('first_name', ''),
+                        last_name=billing_info.get('last_name', ''),
+                        email=billing_info.get('email', ''),
+                        total_amount=total_amount,
+                        status='pending',
+                        hold_expires_at=hold_expires_at,
+                        line_items=[{'package_id': pkg.id, 'quantity': qty} for pkg, qty in order_items_to_create],
                     )
+                    issue_tickets(order, order_items_to_create)
+                    # bulk_create skips post_save, so the dashboard stats are dropped here
+                    transaction.on_commit(lambda: invalidate_event_stats(event.id))
+                break
+            except SoldOut:
+                if attempt or not release_expired_holds(event.id):
+                    return Response({"error": "Not enough capacity for this event."},
+                                    status=status.HTTP_400_BAD_REQUEST)
 
         # ── Create Stripe Checkout Session ────────────────────────────
         frontend_url = settings.FRONTEND_URL
+        session_expires_at = stripe_session_expiry(order.hold_expires_at)
         try:
             checkout_session = stripe.checkout.Session.create(
                 payment_method_types=['card'],
@@ -125,17 +117,19 @@ class CreateCheckoutSessionView(APIView):
                     'user_id': str(request.user.id),
                 },
                 customer_email=billing_info.get('email', request.user.email),
+                expires_at=int(session_expires_at.timestamp()),
             )
         except Exception as e:
-            # Rollback: delete the order and tickets if Stripe fails
-            order.tickets.all().delete()
+            # Rollback: free the seats and delete the order if Stripe fails
+            release_order(order.id)
             order.delete()
             return Response({"error": str(e)},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Save session ID on the order
+        # Save session ID on the order; the hold lasts as long as the session
         order.stripe_session_id = checkout_session.id
-        order.save()
+        order.hold_expires_at = session_expires_at
+        order.save(update_fields=['stripe_session_id', 'hold_expires_at', 'updated_at'])
 
         return Response({
             'checkout_url': checkout_session.url,
@@ -176,11 +170,22 @@ class StripeWebhookView(APIView):
 
             if order_id:
                 try:
-                    order = TicketOrder.objects.get(id=order_id)
-                    order.status = 'paid'
-                    order.stripe_payment_intent = session.get('payment_intent', '')
-                    order.save()
-                except (TicketOrder.DoesNotExist, Exception):
+                    # Locks the order: a completion racing a release re-issues or flags a refund
+                    confirm_payment(order_id, session.get('payment_intent', ''))
+                except (ValueError, ValidationError):
+                    pass
+                except Exception as e:
+                    # The money was taken: let Stripe retry the event
+                    print(f"[PAYMENTS] Could not confirm order {order_id}: {e}")
+                    return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        elif event.get('type') == 'checkout.session.expired':
+            # Buyer never paid: give the held seats back right away
+            order_id = event['data']['object'].get('metadata', {}).get('order_id')
+            if order_id:
+                try:
+                    release_order(order_id)
+                except Exception:
                     pass
 
         return Response({'status': 'ok'}, status=status.HTTP_200_OK)
@@ -205,13 +210,12 @@ class VerifyPaymentView(APIView):
                 order = TicketOrder.objects.get(id=order_id, user=request.user)
 
             # Double-check with Stripe if still pending
-            if order.status == 'pending' and order.stripe_session_id:
+            if order.status in ('pending', 'cancelled') and order.stripe_session_id:
                 try:
                     session = stripe.checkout.Session.retrieve(order.stripe_session_id)
                     if session.payment_status == 'paid':
-                        order.status = 'paid'
-                        order.stripe_payment_intent = session.payment_intent or ''
-                        order.save()
+                        confirm_payment(order.id, session.payment_intent or '')
+                        order.refresh_from_db()
                 except Exception:
                     pass
 
@@ -240,13 +244,35 @@ class CancelOrderView(APIView):
 
         try:
             order = TicketOrder.objects.get(id=order_id, user=request.user)
-            if order.status == 'pending':
-                order.tickets.all().delete()
-                order.status = 'cancelled'
-                order.save()
-                return Response({"message": "Order cancelled."})
-            return Response({"error": "Only pending orders can be cancelled."},
-                            status=status.HTTP_400_BAD_REQUEST)
         except (TicketOrder.DoesNotExist, Exception):
             return Response({"error": "Order not found."},
                             status=status.HTTP_404_NOT_FOUND)
+
+        if order.status != 'pending':
+            return Response({"error": "Only pending orders can be cancelled."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Close the Stripe session first, or the buyer could still pay for
+        # seats that were already given back
+        if order.stripe_session_id:
+            try:
+                stripe.checkout.Session.expire(order.stripe_session_id)
+            except stripe.error.InvalidRequestError:
+                # Only open sessions can be expired: find out how this one ended
+                try:
+                    session = stripe.checkout.Session.retrieve(order.stripe_session_id)
+                except stripe.error.StripeError as e:
+                    return Response({"error": f"Could not cancel the payment: {e}"},
+                                    status=status.HTTP_502_BAD_GATEWAY)
+                if session.status == 'complete':
+                    confirm_payment(order.id, session.payment_intent or '')
+                    return Response({"error": "This order has already been paid and cannot be cancelled."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            except stripe.error.StripeError as e:
+                return Response({"error": f"Could not cancel the payment: {e}"},
+                                status=status.HTTP_502_BAD_GATEWAY)
+
+        if release_order(order.id):
+            return Response({"message": "Order cancelled."})
+        return Response({"error": "Only pending orders can be cancelled."},
+                        status=status.HTTP_400_BAD_REQUEST)
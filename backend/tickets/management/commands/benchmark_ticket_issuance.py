@@ -0,0 +1,76 @@
+"""
+🎟️ Micro-benchmark: per-ticket INSERT loop vs bulk issuance
+
+Everything runs inside a transaction that is rolled back, so no tickets are kept.
+
+Usage:
+    python manage.py benchmark_ticket_issuance
+    python manage.py benchmark_ticket_issuance --tickets 1000 --repeat 5
+"""
+
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from events.models import Event
+from tickets.models import Ticket, TicketOrder
+from tickets.utils import issue_tickets, resolve_order_items
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time issuing one order of N tickets with the old create() loop and with bulk issuance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(ticket_packages__isnull=False).first()
+        user = get_user_model().objects.first()
+        if event is None or user is None:
+            raise CommandError("Need at least one user and one event with a ticket package")
+        package = event.ticket_packages.first()
+        items = [{'package_id': package.id, 'quantity': options['tickets']}]
+
+        def loop_issue(order):
+            # Previous implementation: one package lookup per line, one INSERT per ticket
+            for item in items:
+                pkg = event.ticket_packages.get(id=item['package_id'])
+                for _ in range(item['quantity']):
+                    Ticket.objects.create(
+                        event=event, user=user, order=order, package=pkg,
+                        price_at_purchase=pkg.price, qr_token=str(uuid.uuid4()), status='issued',
+                    )
+
+        def bulk_issue(order):
+            order_items, _ = resolve_order_items(event, items)
+            issue_tickets(order, order_items)
+
+        for label, issue in (('loop', loop_issue), ('bulk', bulk_issue)):
+            timings = []
+            queries = 0
+            for _ in range(options['repeat']):
+                try:
+                    with transaction.atomic():
+                        order = TicketOrder.objects.create(
+                            user=user, event=event, first_name='Bench', last_name='Mark',
+                            email='bench@example.com', total_amount=0, status='paid',
+                        )
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            issue(order)
+                            timings.append(time.perf_counter() - started)
+                        queries = len(captured.captured_queries)
+                        raise _Rollback()
+                except _Rollback:
+                    pass
+
+            best_ms = min(timings) * 1000
+            self.stdout.write(f"{label:>5}: {options['tickets']:>6} tickets  best {best_ms:9.1f} ms  "
+                              f"{best_ms * 1000 / options['tickets']:8.1f} us/ticket  {queries} queries")
@@ -0,0 +1,21 @@
+"""
+🎟️ Release seats held by pending orders whose Stripe checkout expired
+
+Run it from cron every few minutes:
+    python manage.py release_expired_holds
+    python manage.py release_expired_holds --event 12
+"""
+
+from django.core.management.base import BaseCommand
+from tickets.utils import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Cancel pending orders past hold_expires_at and give their seats back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, help='Only this event')
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(options['event'])
+        self.stdout.write(self.style.SUCCESS(f"{released} expired hold(s) released"))
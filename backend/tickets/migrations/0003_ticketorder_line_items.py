@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticketorder_hold_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketorder',
+            name='line_items',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='ticketorder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('paid', 'Paid'), ('cancelled', 'Cancelled'), ('refund_due', 'Refund Due')], default='pending', max_length=20),
+        ),
+    ]
@@ -7,7 +7,8 @@ class TicketOrder(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('paid', 'Paid'),
-        ('cancelled', 'Cancelled')
+        ('cancelled', 'Cancelled'),
+        ('refund_due', 'Refund Due')
     )
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -25,6 +26,13 @@ class TicketOrder(models.Model):
     # Stripe fields
     stripe_session_id = models.CharField(max_length=255, blank=True, null=True)
     stripe_payment_intent = models.CharField(max_length=255, blank=True, null=True)
+
+    # Pending orders hold their seats until then (released by cancel / expiry)
+    hold_expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # [{package_id, quantity}, ...] ordered, so tickets can be re-issued if
+    # Stripe confirms the payment after the hold was released
+    line_items = models.JSONField(default=list, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,127 @@
+"""
+Gate Scanning
+
+🚪 Ticket scans at stadium gates, thousands per minute.
+
+- The issued -> scanned transition is one conditional UPDATE
+  (WHERE status='issued'), so two gates scanning the same QR can't both win
+  and no row lock is held across Python code
+- The scan position goes to the CrowdLocation write-behind queue instead of
+  an INSERT per scan
+- Scan broadcasts are coalesced per event through the location fan-out tick
+- A batch of scans costs the same handful of queries as a single one
+
+scan_tickets() returns one ScanResult per requested QR token, in order.
+"""
+
+from collections import Counter, namedtuple
+from django.db import transaction
+from django.utils import timezone
+from events.counters import bump as bump_event_counters
+from .models import Ticket
+
+SCANNED = 'scanned'
+ALREADY_SCANNED = 'already_scanned'
+INVALIDATED = 'invalidated'
+NOT_FOUND = 'not_found'
+
+ScanResult = namedtuple('ScanResult', 'qr_token outcome ticket_id user_name scanned_at')
+
+
+def _classify(qr_tokens):
+    """Why tokens that didn't transition were rejected: {qr_token: ScanResult}."""
+    rows = Ticket.objects.filter(qr_token__in=qr_tokens).values_list(
+        'qr_token', 'id', 'status', 'scanned_at', 'user__full_name'
+    )
+    found = {}
+    for qr_token, ticket_id, status, scanned_at, user_name in rows:
+        outcome = ALREADY_SCANNED if status == 'scanned' else INVALIDATED
+        found[qr_token] = ScanResult(qr_token, outcome, ticket_id, user_name, scanned_at)
+    return found
+
+
+def scan_tickets(scans):
+    """
+    Scan a batch of tickets.
+
+    Args:
+        scans: iterable of (qr_token, lat, lng); lat/lng are floats or None
+
+    Returns:
+        [ScanResult, ...] in input order (a token repeated in the batch is
+        only scanned once; later copies report already_scanned)
+    """
+    scans = list(scans)
+    tokens = list(dict.fromkeys(qr_token for qr_token, _, _ in scans))
+    if not tokens:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        if len(tokens) == 1:
+            transitioned = Ticket.objects.filter(qr_token=tokens[0], status='issued').update(
+                status='scanned', scanned_at=now
+            )
+            won = tokens if transitioned else []
+        else:
+            Ticket.objects.filter(qr_token__in=tokens, status='issued').update(status='scanned', scanned_at=now)
+            # Rows stamped with this exact scanned_at were transitioned by this UPDATE
+            won = list(Ticket.objects.filter(qr_token__in=tokens, scanned_at=now).values_list('qr_token', flat=True))
+
+        accepted = {}
+        if won:
+            rows = Ticket.objects.filter(qr_token__in=won).values_list(
+                'qr_token', 'id', 'event_id', 'user_id', 'user__full_name'
+            )
+            accepted = {row[0]: row[1:] for row in rows}
+            for event_id, scanned in Counter(event_id for _, event_id, _, _ in accepted.values()).items():
+                bump_event_counters(event_id, scanned=scanned)
+
+    rejected = _classify([t for t in tokens if t not in accepted]) if len(accepted) < len(tokens) else {}
+
+    results = []
+    positions = {}
+    seen = set()
+    for qr_token, lat, lng in scans:
+        if qr_token in accepted and qr_token not in seen:
+            ticket_id, event_id, user_id, user_name = accepted[qr_token]
+            results.append(ScanResult(qr_token, SCANNED, ticket_id, user_name, now))
+            positions[qr_token] = (lat, lng)
+        elif qr_token in accepted:
+            ticket_id, _, _, user_name = accepted[qr_token]
+            results.append(ScanResult(qr_token, ALREADY_SCANNED, ticket_id, user_name, now))
+        else:
+            results.append(rejected.get(qr_token) or ScanResult(qr_token, NOT_FOUND, None, None, None))
+        seen.add(qr_token)
+
+    if accepted:
+        scanned_rows = [(qr_token, *accepted[qr_token], *positions[qr_token]) for qr_token in positions]
+        transaction.on_commit(lambda: _after_scan(scanned_rows))
+    return results
+
+
+def _after_scan(rows):
+    """Side effects that must not slow the gate: crowd position, stats, broadcasts."""
+    from monitoring.fanout import location_fanout
+    from monitoring.stats import invalidate_event_stats
+    from monitoring.writebehind import crowd_writer
+
+    for qr_token, ticket_id, event_id, user_id, user_name, lat, lng in rows:
+        if lat is not None and lng is not None:
+            crowd_writer.enqueue(event_id, user_id, lat, lng, source_type='ticket_scan')
+
+        # 📡 Coalesced per event: one entity_batch per tick however many gates scan
+        location_fanout.publish(f"heatmap_{event_id}", f"ticket:{ticket_id}", {
+            'type': 'entity_broadcast',
+            'entity_type': 'ticket',
+            'action': 'scan',
+            'id': str(ticket_id),
+            'status': 'scanned',
+            'qr_token': qr_token,
+            'user_name': user_name,
+            'lat': lat or 0,
+            'lng': lng or 0,
+        })
+
+    for event_id in {row[2] for row in rows}:
+        invalidate_event_stats(event_id)
@@ -2,7 +2,7 @@ from django.urls import path
 from .views import (
     BookTicketView, UserTicketsListView, ScanTicketView, 
     CreateTicketOrderView, UserOrdersListView, OrganizerOrdersListView,
-    OrganizerTicketsListView
+    OrganizerTicketsListView, BatchScanTicketView
 )
 
 urlpatterns = [
@@ -13,4 +13,5 @@ urlpatterns = [
     path('organizer-orders/', OrganizerOrdersListView.as_view(), name='organizer_orders'),
     path('organizer-tickets/', OrganizerTicketsListView.as_view(), name='organizer_tickets'),
     path('scan/', ScanTicketView.as_view(), name='scan_ticket'),
+    path('scan/batch/', BatchScanTicketView.as_view(), name='batch_scan_ticket'),
 ]
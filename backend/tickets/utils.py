@@ -0,0 +1,201 @@
+"""
+Ticket issuance helpers shared by the order and Stripe checkout views.
+
+⚡ An order costs a fixed number of queries, whatever its size:
+- resolve_order_items(): every package of the order in one in_bulk() lookup
+- issue_tickets(): one bulk_create() with pre-generated UUIDs and QR tokens
+
+🎟️ Seat holds: pending (Stripe) orders reserve their seats until
+hold_expires_at. release_order() gives them back on cancel, Stripe failure or
+session expiry; release_expired_holds() sweeps orders nobody came back for.
+confirm_payment() marks an order paid under the same row lock, re-issuing
+the tickets of an order whose hold was released before the payment landed.
+"""
+
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from events.counters import SoldOut, bump as bump_event_counters, reserve_seats
+from events.models import SEAT_HOLDING_STATUSES
+from monitoring.stats import invalidate_event_stats
+from .models import Ticket, TicketOrder
+
+# Rows per INSERT statement (keeps MySQL packets small for huge group orders)
+ISSUE_BATCH_SIZE = 500
+
+
+class InvalidOrderItem(Exception):
+    """An order line references a package that doesn't exist for this event."""
+
+    def __init__(self, package_id):
+        self.package_id = package_id
+        super().__init__(f"Invalid ticket package ID: {package_id}")
+
+
+def resolve_order_items(event, items):
+    """
+    Validate order lines against the event's packages.
+
+    Args:
+        event: Event being ordered
+        items: [{package_id, quantity}, ...] from the request
+
+    Returns:
+        ([(package, quantity), ...], total_amount); lines with quantity <= 0 are skipped
+
+    Raises:
+        InvalidOrderItem: unknown package, package of another event, or bad values
+    """
+    lines = []
+    for item in items:
+        package_id = item.get('package_id')
+        try:
+            lines.append((int(package_id), int(item.get('quantity', 0))))
+        except (TypeError, ValueError):
+            raise InvalidOrderItem(package_id)
+
+    packages = event.ticket_packages.in_bulk([package_id for package_id, _ in lines])
+
+    order_items = []
+    total_amount = 0
+    for package_id, qty in lines:
+        pkg = packages.get(package_id)
+        if pkg is None:
+            raise InvalidOrderItem(package_id)
+        if qty <= 0:
+            continue
+        total_amount += pkg.price * qty
+        order_items.append((pkg, qty))
+    return order_items, total_amount
+
+
+def issue_tickets(order, order_items, status='issued'):
+    """
+    Create every ticket of an order in bulk. Call inside the order's transaction.
+
+    Returns:
+        List of created Ticket objects
+    """
+    tickets = [
+        Ticket(
+            id=uuid.uuid4(),
+            event_id=order.event_id,
+            user_id=order.user_id,
+            order=order,
+            package=pkg,
+            price_at_purchase=pkg.price,
+            qr_token=str(uuid.uuid4()),
+            status=status,
+        )
+        for pkg, qty in order_items
+        for _ in range(qty)
+    ]
+    return Ticket.objects.bulk_create(tickets, batch_size=ISSUE_BATCH_SIZE)
+
+
+# Stripe only accepts session expiries between 30 minutes and 24 hours after
+# the session is created; the extra minute covers the time spent before the call
+STRIPE_MIN_EXPIRY = timedelta(minutes=31)
+STRIPE_MAX_EXPIRY = timedelta(hours=24)
+
+
+def hold_deadline():
+    """When a pending order created now stops holding its seats."""
+    hold = timedelta(minutes=getattr(settings, 'TICKET_HOLD_MINUTES', 30))
+    return timezone.now() + min(max(hold, STRIPE_MIN_EXPIRY), STRIPE_MAX_EXPIRY - timedelta(minutes=1))
+
+
+def stripe_session_expiry(hold_expires_at):
+    """
+    Stripe expires_at for an order's hold, computed right before the session
+    is created: the hold itself, pushed out if it got within Stripe's minimum.
+    The caller must extend hold_expires_at to it so the hold outlives the session.
+    """
+    expires_at = max(hold_expires_at, timezone.now() + STRIPE_MIN_EXPIRY)
+    return expires_at.replace(microsecond=0) + timedelta(seconds=1 if expires_at.microsecond else 0)
+
+
+def release_order_tickets(order):
+    """Delete an order's tickets and give their seats back to the event counters."""
+    counts = order.tickets.aggregate(
+        issued=Count('id', filter=Q(status__in=SEAT_HOLDING_STATUSES)),
+        scanned=Count('id', filter=Q(status='scanned')),
+    )
+    order.tickets.all().delete()
+    bump_event_counters(order.event_id, issued=-counts['issued'], scanned=-counts['scanned'])
+
+
+def release_order(order_id):
+    """
+    Cancel a pending order and free its seats.
+
+    The order row is locked and re-checked, so a cancel racing a payment
+    webhook or the expiry sweep releases the seats at most once.
+
+    Returns:
+        True if the order was released, False if it was no longer pending
+    """
+    with transaction.atomic():
+        order = TicketOrder.objects.select_for_update().filter(id=order_id, status='pending').first()
+        if order is None:
+            return False
+        release_order_tickets(order)
+        order.status = 'cancelled'
+        order.hold_expires_at = None
+        order.save(update_fields=['status', 'hold_expires_at', 'updated_at'])
+    return True
+
+
+def release_expired_holds(event_id=None):
+    """Release every pending order whose hold has expired. Returns how many were released."""
+    expired = TicketOrder.objects.filter(status='pending', hold_expires_at__lt=timezone.now())
+    if event_id is not None:
+        expired = expired.filter(event_id=event_id)
+    return sum(release_order(order_id) for order_id in expired.values_list('id', flat=True))
+
+
+def confirm_payment(order_id, payment_intent=''):
+    """
+    Mark an order paid once Stripe has taken the money.
+
+    The order row is locked like in release_order(), so a payment racing a
+    cancel or the expiry sweep sees the final state:
+    - pending: its held tickets simply become paid
+    - cancelled (hold already released): seats are reserved and tickets
+      issued again from the stored line items; if the event sold out in
+      between (or the order has no stored line items) it is flagged
+      'refund_due' instead
+
+    Returns:
+        The order's status afterwards, or None if there is no such order
+    """
+    with transaction.atomic():
+        order = TicketOrder.objects.select_for_update().filter(id=order_id).first()
+        if order is None:
+            return None
+        if order.status not in ('pending', 'cancelled'):
+            return order.status
+
+        new_status = 'paid'
+        if order.status == 'cancelled':
+            try:
+                order_items, _ = resolve_order_items(order.event, order.line_items)
+                with transaction.atomic():
+                    reserve_seats(order.event, sum(qty for _, qty in order_items))
+                    issue_tickets(order, order_items)
+                transaction.on_commit(lambda: invalidate_event_stats(order.event_id))
+            except (SoldOut, InvalidOrderItem) as e:
+                order_items = []
+                print(f"[PAYMENTS] Order {order.id} was paid after its hold was released: {e}")
+            if not order_items:
+                # Sold out, or released before line items were stored: nothing was re-issued
+                new_status = 'refund_due'
+
+        order.status = new_status
+        order.stripe_payment_intent = payment_intent or order.stripe_payment_intent
+        order.hold_expires_at = None
+        order.save(update_fields=['status', 'stripe_payment_intent', 'hold_expires_at', 'updated_at'])
+    return new_status
@@ -1,13 +1,14 @@
-import uuid
-from django.utils import timezone
 from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Ticket, TicketOrder
-from events.models import Event, TicketPackage
+from events.models import Event
+from events.counters import SoldOut, reserve_seats
+from monitoring.stats import invalidate_event_stats
 from .serializers import TicketSerializer, TicketOrderSerializer
+from .utils import InvalidOrderItem, issue_tickets, release_expired_holds, resolve_order_items
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
@@ -28,48 +29,33 @@ class CreateTicketOrderView(generics.CreateAPIView):
         except Event.DoesNotExist:
             return Response({"error": "Event not found or inactive."}, status=status.HTTP_404_NOT_FOUND)
 
-        total_quantity = sum(item.get('quantity', 0) for item in items)
-        
-        current_tickets = Ticket.objects.filter(event=event, status__in=['issued', 'scanned']).count()
-        if current_tickets + total_quantity > event.capacity:
-            return Response({"error": "Not enough capacity for this event."}, status=status.HTTP_400_BAD_REQUEST)
-
-        total_amount = 0
-        order_items_to_create = []
+        try:
+            order_items_to_create, total_amount = resolve_order_items(event, items)
+        except InvalidOrderItem as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        total_quantity = sum(qty for _, qty in order_items_to_create)
 
-        for item in items:
+        # Second attempt only if expired Stripe holds gave seats back
+        for attempt in range(2):
             try:
-                pkg = TicketPackage.objects.get(id=item.get('package_id'), event=event)
-                qty = item.get('quantity', 0)
-                if qty <= 0: continue
-                
-                total_amount += pkg.price * qty
-                order_items_to_create.append((pkg, qty))
-            except TicketPackage.DoesNotExist:
-                return Response({"error": f"Invalid ticket package ID: {item.get('package_id')}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        with transaction.atomic():
-            order = TicketOrder.objects.create(
-                user=request.user,
-                event=event,
-                first_name=billing_info.get('first_name', ''),
-                last_name=billing_info.get('last_name', ''),
-                email=billing_info.get('email', ''),
-                total_amount=total_amount,
-                status='paid'
-            )
-
-            for pkg, qty in order_items_to_create:
-                for _ in range(qty):
-                    Ticket.objects.create(
-                        event=event,
+                with transaction.atomic():
+                    reserve_seats(event, total_quantity)
+                    order = TicketOrder.objects.create(
                         user=request.user,
-                        order=order,
-                        package=pkg,
-                        price_at_purchase=pkg.price,
-                        qr_token=str(uuid.uuid4()),
-                        status='issued'
+                        event=event,
+                        first_name=billing_info.get('first_name', ''),
+                        last_name=billing_info.get('last_name', ''),
+                        email=billing_info.get('email', ''),
+                        total_amount=total_amount,
+                        status='paid'
                     )
+                    issue_tickets(order, order_items_to_create)
+                    # bulk_create skips post_save, so the dashboard stats are dropped here
+                    transaction.on_commit(lambda: invalidate_event_stats(event.id))
+                break
+            except SoldOut:
+                if attempt or not release_expired_holds(event.id):
+                    return Response({"error": "Not enough capacity for this event."}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = self.get_serializer(order)
         
@@ -130,69 +116,103 @@ class OrganizerOrdersListView(generics.ListAPIView):
             return TicketOrder.objects.all().order_by('-created_at')
         return TicketOrder.objects.filter(event__organizer=self.request.user).order_by('-created_at')
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from monitoring.models import CrowdLocation
+from collections import Counter
+from django.conf import settings
+from .scanning import ALREADY_SCANNED, INVALIDATED, NOT_FOUND, SCANNED, scan_tickets
+
+SCAN_STAFF_ROLES = ['organizer', 'admin', 'volunteer', 'authority']
+
+
+def _scan_position(lat, lng):
+    """(lat, lng) as floats, or (None, None) when missing or malformed."""
+    try:
+        if lat in (None, '') or lng in (None, ''):
+            return None, None
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None, None
+
 
 class ScanTicketView(APIView):
+    """
+    Scan one ticket at the gate.
+    
+    ⚡ Fast path (see scanning.py): conditional UPDATE instead of a locked
+    fetch + save, write-behind crowd position, coalesced broadcast.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        if request.user.role not in ['organizer', 'admin', 'volunteer', 'authority']:
+        if request.user.role not in SCAN_STAFF_ROLES:
             return Response({"error": "Permission denied. Only staff can scan tickets."}, status=status.HTTP_403_FORBIDDEN)
 
         qr_token = request.data.get('qr_token')
-        lat = request.data.get('lat')
-        lng = request.data.get('lng')
-
         if not qr_token:
             return Response({"error": "QR token is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            with transaction.atomic():
-                ticket = Ticket.objects.select_for_update().get(qr_token=qr_token)
-                
-                if ticket.status == 'scanned':
-                    return Response({
-                        "error": "Ticket has already been scanned.", 
-                        "scanned_at": ticket.scanned_at
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                if ticket.status == 'invalidated':
-                    return Response({"error": "Ticket is invalidated."}, status=status.HTTP_400_BAD_REQUEST)
-
-                ticket.status = 'scanned'
-                ticket.scanned_at = timezone.now()
-                ticket.save()
-        except Ticket.DoesNotExist:
+        lat, lng = _scan_position(request.data.get('lat'), request.data.get('lng'))
+        result = scan_tickets([(qr_token, lat, lng)])[0]
+
+        if result.outcome == ALREADY_SCANNED:
+            return Response({
+                "error": "Ticket has already been scanned.", 
+                "scanned_at": result.scanned_at
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if result.outcome == INVALIDATED:
+            return Response({"error": "Ticket is invalidated."}, status=status.HTTP_400_BAD_REQUEST)
+        if result.outcome == NOT_FOUND:
             return Response({"error": "Invalid ticket QR code."}, status=status.HTTP_404_NOT_FOUND)
 
+        return Response({"message": "Ticket successfully scanned and validated.", "ticket_id": result.ticket_id, "user": result.user_name}, status=status.HTTP_200_OK)
 
-        if lat and lng:
-            CrowdLocation.objects.create(
-                event=ticket.event,
-                user=ticket.user,
-                latitude=lat,
-                longitude=lng,
-                source_type='ticket_scan'
-            )
 
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"heatmap_{ticket.event.id}",
-            {
-                'type': 'entity_broadcast',
-                'entity_type': 'ticket',
-                'action': 'scan',
-                'id': ticket.id,
-                'status': ticket.status,
-                'qr_token': ticket.qr_token,
-                'user_name': ticket.user.full_name,
-                'lat': float(lat) if lat else 0,
-                'lng': float(lng) if lng else 0,
-            }
-        )
-
-
-        return Response({"message": "Ticket successfully scanned and validated.", "ticket_id": ticket.id, "user": ticket.user.full_name}, status=status.HTTP_200_OK)
+class BatchScanTicketView(APIView):
+    """
+    🚪 Scan many tickets in one request (gate devices buffering scans).
+    
+    POST {"scans": [{"qr_token": "...", "lat": 27.7, "lng": 85.3}, ...]}
+    lat/lng per scan are optional; top-level lat/lng apply to scans without one.
+    
+    Returns one result per scan, in order:
+    {"qr_token", "outcome": scanned | already_scanned | invalidated | not_found,
+     "ticket_id", "user", "scanned_at"}
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request, *args, **kwargs):
+        if request.user.role not in SCAN_STAFF_ROLES:
+            return Response({"error": "Permission denied. Only staff can scan tickets."}, status=status.HTTP_403_FORBIDDEN)
+
+        scans = request.data.get('scans')
+        if not isinstance(scans, list) or not scans:
+            return Response({"error": "scans must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        max_batch = getattr(settings, 'TICKET_SCAN_MAX_BATCH', 500)
+        if len(scans) > max_batch:
+            return Response({"error": f"At most {max_batch} scans per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        default_lat = request.data.get('lat')
+        default_lng = request.data.get('lng')
+        parsed = []
+        for scan in scans:
+            qr_token = scan.get('qr_token') if isinstance(scan, dict) else None
+            if not qr_token or not isinstance(qr_token, str):
+                return Response({"error": "Every scan needs a qr_token."}, status=status.HTTP_400_BAD_REQUEST)
+            lat, lng = _scan_position(scan.get('lat', default_lat), scan.get('lng', default_lng))
+            parsed.append((qr_token, lat, lng))
+
+        results = scan_tickets(parsed)
+        outcomes = Counter(result.outcome for result in results)
+        return Response({
+            "scanned": outcomes[SCANNED],
+            "rejected": len(results) - outcomes[SCANNED],
+            "results": [
+                {
+                    "qr_token": result.qr_token,
+                    "outcome": result.outcome,
+                    "ticket_id": result.ticket_id,
+                    "user": result.user_name,
+                    "scanned_at": result.scanned_at,
+                }
+                for result in results
+            ],
+        }, status=status.HTTP_200_OK)